@@ -14,6 +14,7 @@ from PyRoute.Allies.AllyGen import AllyGen
 import PyRoute.AreaItems.Galaxy as Galaxy
 from PyRoute.Outputs.Colour import Colour
 from PyRoute.Position.Hex import Hex, HexPos
+from PyRoute.Position.SpatialIndex import SpatialIndex
 from PyRoute.Star import Star
 
 Alg: TypeAlias = Optional[str]
@@ -198,12 +199,9 @@ class Borders(object):
             if AllyGen.is_nonaligned(alg):
                 max_range = 2
             for dist in range(max_range):
-                neighbor = Hex.get_neighbor(cand_hex, 4, dist)
-                for direction in range(6):
-                    for _ in range(dist):
-                        star_dist = Hex.axial_distance(cand_hex, neighbor)
-                        ally_map[neighbor].add((alg, star_dist))
-                        neighbor = Hex.get_neighbor(neighbor, direction)
+                # Every hex in the ring is dist away from cand_hex
+                for neighbor in SpatialIndex.ring(cand_hex, dist):
+                    ally_map[neighbor].add((alg, dist))
 
         # Pass 2: find overlapping areas and reduce
         # 0: hexes with only one claimant, give it to them
@@ -426,13 +424,8 @@ class Borders(object):
 
             # Walk the ring filling in the hexes around star with this neighbour
             for dist in range(1, max_range):  # pragma: no mutate
-                # Start in direction 0, at distance n
-                neighbour = Hex.get_neighbor(cand_hex, 4, dist)
-                # walk six sides
-                for side in range(6):
-                    for _ in range(dist):
-                        ally_map[neighbour].add((alg, Hex.axial_distance(cand_hex, neighbour)))
-                        neighbour = Hex.get_neighbor(neighbour, side)
+                for neighbour in SpatialIndex.ring(cand_hex, dist):
+                    ally_map[neighbour].add((alg, dist))
 
         # Pass 2: find overlapping areas and reduce
         # 0: hexes with only one claimant, give it to them
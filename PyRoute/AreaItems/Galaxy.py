@@ -10,6 +10,7 @@ import os
 import ast
 import itertools
 import math
+from typing import Optional, Union
 
 import networkx as nx
 import numpy as np
@@ -29,6 +30,8 @@ from PyRoute.Calculation.NoneCalculation import NoneCalculation
 from PyRoute.Calculation.XRouteCalculation import XRouteCalculation
 from PyRoute.DataClasses.ReadSectorOptions import ReadSectorOptions
 from PyRoute.Pathfinding.RouteLandmarkGraph import RouteLandmarkGraph
+from PyRoute.Position.Hex import Hex
+from PyRoute.Position.SpatialIndex import SpatialIndex
 
 
 class Galaxy(AreaItem):
@@ -50,6 +53,7 @@ class Galaxy(AreaItem):
         self.max_jump_range = max_jump
         self.min_btn = min_btn
         self.historic_costs = None
+        self.spatial_index = None
         self.big_component = None
         self.star_mapping = dict()
         self.trade = None
@@ -64,6 +68,7 @@ class Galaxy(AreaItem):
         del state['trade']
         del state['sectors']
         del state['alg_sorted']
+        del state['spatial_index']
         return state
 
     # def read_sectors(self, sectors, pop_code, ru_calc,
@@ -80,7 +85,14 @@ class Galaxy(AreaItem):
         ru_calc = options.ru_calc
         fix_pop = options.fix_pop
         fix_econ = options.fix_econ
-        self._set_trade_object(route_reuse, trade_choice, route_btn, mp_threads, debug_flag)
+        self._set_trade_object(route_reuse, trade_choice, route_btn, mp_threads, debug_flag,
+                               bidirectional=options.bidirectional, group_by_source=options.group_by_source,
+                               landmark_cache_dir=options.landmark_cache_dir,
+                               speculative_batch=options.speculative_batch,
+                               active_landmarks=options.active_landmarks,
+                               checkpoint_dir=options.checkpoint_dir, resume=options.resume,
+                               checkpoint_routes=options.checkpoint_routes,
+                               checkpoint_minutes=options.checkpoint_minutes)
         star_counter = 0
         loaded_sectors: set[str] = set()
         from PyRoute.Inputs.ParseStarInput import ParseStarInput
@@ -147,6 +159,7 @@ class Galaxy(AreaItem):
         for item in self.stars.nodes:
             assert 'star' in self.stars.nodes[item], "Star attribute not set for item " + str(item)
         self.historic_costs = RouteLandmarkGraph(self.stars)
+        self.spatial_index = SpatialIndex(list(self.ranges))
 
     def set_bounding_sectors(self) -> None:
         for sector, neighbor in itertools.combinations(self.sectors.values(), 2):
@@ -173,15 +186,23 @@ class Galaxy(AreaItem):
     def generate_routes(self) -> None:
         self.trade.generate_routes()
 
-    def _set_trade_object(self, reuse, routes, route_btn, mp_threads, debug_flag):
+    def _set_trade_object(self, reuse, routes, route_btn, mp_threads, debug_flag, bidirectional=False,
+                          group_by_source=False, landmark_cache_dir=None, speculative_batch=0, active_landmarks=0,
+                          checkpoint_dir=None, resume=False, checkpoint_routes=10000, checkpoint_minutes=15.0):
         # if trade object already set, bail out
         if self.trade is not None:
             return
         self.is_well_formed()
         if routes == 'trade':
-            self.trade = TradeCalculation(self, self.min_btn, route_btn, reuse, debug_flag)
+            self.trade = TradeCalculation(self, self.min_btn, route_btn, reuse, debug_flag,
+                                          group_by_source=group_by_source, bidirectional=bidirectional,
+                                          landmark_cache_dir=landmark_cache_dir, speculative_batch=speculative_batch,
+                                          speculative_workers=mp_threads, active_landmarks=active_landmarks,
+                                          checkpoint_dir=checkpoint_dir, resume=resume,
+                                          checkpoint_routes=checkpoint_routes, checkpoint_minutes=checkpoint_minutes)
         elif routes == 'trade-mp':
-            self.trade = TradeMPCalculation(self, self.min_btn, route_btn, reuse, debug_flag, mp_threads)
+            self.trade = TradeMPCalculation(self, self.min_btn, route_btn, reuse, debug_flag, mp_threads,
+                                            bidirectional=bidirectional, landmark_cache_dir=landmark_cache_dir)
         elif routes == 'comm':
             self.trade = CommCalculation(self, reuse)
         elif routes == 'xroute':
@@ -260,8 +281,8 @@ class Galaxy(AreaItem):
                 hex2 = data[5]
                 routeData = ast.literal_eval(data[6])
 
-                world1 = self.sectors[sec1].find_world_by_pos(hex1)
-                world2 = self.sectors[sec2].find_world_by_pos(hex2)
+                world1 = self.find_world_by_pos(self.sectors[sec1], hex1)
+                world2 = self.find_world_by_pos(self.sectors[sec2], hex2)
 
                 self.ranges.add_edge_from([world1, world2, routeData])
 
@@ -284,7 +305,7 @@ class Galaxy(AreaItem):
                 ownedBy.sort(reverse=True,
                              key=lambda star: star.importance - (star.distance(worldstar) - 1))
 
-                owner = None
+                owner: Union[str, Star, None] = None
                 if worldstar.ownedBy is None:
                     owner = None
                 elif worldstar.ownedBy == 'Mr':
@@ -300,20 +321,20 @@ class Galaxy(AreaItem):
                     self.logger.debug(
                         "World {}@({},{}) owned by {} - {}".format(worldstar, worldstar.col, worldstar.row, ownedSec, ownedHex))
                     if worldstar.col < 4 and worldstar.sector.spinward:
-                        owner = worldstar.sector.spinward.find_world_by_pos(ownedHex)
+                        owner = self.find_world_by_pos(worldstar.sector.spinward, ownedHex)
                     elif worldstar.col > 28 and worldstar.sector.trailing:
-                        owner = worldstar.sector.trailing.find_world_by_pos(ownedHex)
+                        owner = self.find_world_by_pos(worldstar.sector.trailing, ownedHex)
 
                     if worldstar.row < 4 and owner is None and worldstar.sector.coreward:
-                        owner = worldstar.sector.coreward.find_world_by_pos(ownedHex)
+                        owner = self.find_world_by_pos(worldstar.sector.coreward, ownedHex)
                     elif worldstar.row > 36 and owner is None and worldstar.sector.rimward:
-                        owner = worldstar.sector.rimward.find_world_by_pos(ownedHex)
+                        owner = self.find_world_by_pos(worldstar.sector.rimward, ownedHex)
 
                     # If we can't find world in the sector next door, try the this one
                     if owner is None:
-                        owner = worldstar.sector.find_world_by_pos(ownedHex)
+                        owner = self.find_world_by_pos(worldstar.sector, ownedHex)
                 elif len(worldstar.ownedBy) == 4:
-                    owner = worldstar.sector.find_world_by_pos(worldstar.ownedBy)
+                    owner = self.find_world_by_pos(worldstar.sector, worldstar.ownedBy)
 
                 self.logger.debug("Worlds {} is owned by {}".format(worldstar, owner))
 
@@ -333,6 +354,22 @@ class Galaxy(AreaItem):
 
                 worldstar.ownedBy = (owner, ownedBy[0:4])
 
+    def find_world_by_pos(self, sector: Sector, pos: str) -> Optional[Star]:
+        """
+        Look up the world at hex position pos in sector, via the spatial index when it's available.
+        """
+        if self.spatial_index is not None:
+            try:
+                world_hex = Hex(sector, pos)
+            except ValueError:
+                return None
+            world = self.spatial_index.at(world_hex.q, world_hex.r)
+            if world is None:
+                return None
+            if world.sector is sector and world.position == pos:
+                return world
+        return sector.find_world_by_pos(pos)
+
     def is_well_formed(self) -> None:  # type: ignore
         for item in self.sectors:
             sector = self.sectors[item]
@@ -61,6 +61,10 @@ class CommCalculation(RouteCalculation):
             return dist
         return None
 
+    def _raw_range_radius(self) -> int:
+        # Capital and base pairs up to 99 pc apart get added to ranges
+        return max(99, self.galaxy.max_jump_range)
+
     def capitals(self, star) -> bool:
         # Capital of sector, subsector, or empire are in the list
         return star.tradeCode.capital
@@ -12,6 +12,7 @@ from collections import defaultdict
 from typing import Any, Optional
 
 import networkx as nx
+import numpy as np
 
 from PyRoute.Allies.AllyGen import AllyGen
 from PyRoute.Pathfinding.DistanceGraph import DistanceGraph
@@ -108,9 +109,24 @@ class RouteCalculation(object):
                           self.galaxy.ranges.number_of_edges()))
 
     def _raw_ranges(self):
-        raw_ranges = ((star, neighbour) for (star, neighbour) in itertools.combinations(self.galaxy.ranges, 2) if
-                      not star.is_redzone and not neighbour.is_redzone)
-        return raw_ranges
+        index = self.galaxy.spatial_index
+        if index is None or len(index) != self.galaxy.ranges.number_of_nodes():
+            raw_ranges = ((star, neighbour) for (star, neighbour) in itertools.combinations(self.galaxy.ranges, 2) if
+                          not star.is_redzone and not neighbour.is_redzone)
+            return raw_ranges
+
+        # Pairs further apart than the raw range radius can't turn into routes, so don't bother generating them
+        stars = index.stars
+        left, right, _ = index.pairs_within(self._raw_range_radius())
+        redzone = np.array([star.is_redzone for star in stars], dtype=bool)
+        keep = ~(redzone[left] | redzone[right])
+        return [(stars[i], stars[j]) for (i, j) in zip(left[keep].tolist(), right[keep].tolist())]
+
+    def _raw_range_radius(self) -> int:
+        """
+        Largest distance, in parsecs, between two worlds that base_range_routes needs to see
+        """
+        return self.galaxy.max_jump_range
 
     def check_existing_routes(self, star, neighbor) -> None:
         for route in star.routes:
@@ -176,6 +192,32 @@ class RouteCalculation(object):
         btn = min(btn, RouteCalculation.get_max_btn(star1.wtn, star2.wtn))
         return min_btn if min_btn > btn and distance <= max_range else btn
 
+    @staticmethod
+    def _get_btn_upper_bound_bulk(wtn1: np.ndarray, wtn2: np.ndarray, allies: np.ndarray, distance: np.ndarray,
+                                  max_range: int, min_btn: int, offset) -> np.ndarray:
+        """
+        Array version of _get_btn_upper_bound, over pairs of worlds.  allies holds each pair's _get_btn_allies value,
+        and offset can either be a scalar, or an array holding each pair's offset.
+        """
+        btn = wtn1 + wtn2 + offset + allies + RouteCalculation.get_btn_offset_bulk(distance)
+        btn = np.minimum(btn, np.minimum(wtn1, wtn2) * 2 + 1)
+        return np.where((min_btn > btn) & (distance <= max_range), min_btn, btn)
+
+    @staticmethod
+    def _get_btn_allies_matrix(alg_codes: list) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Map each of the supplied allegiance codes to an integer ID, and tabulate _get_btn_allies between every pair of
+        IDs.
+
+        @return: Tuple of the ID for each supplied code, and the square matrix of allegiance modifiers
+        """
+        distinct: dict[Optional[str], int] = {}
+        alg_ids = np.array([distinct.setdefault(code, len(distinct)) for code in alg_codes], dtype=np.int64)
+        codes = list(distinct)
+        alliances = np.array([[RouteCalculation._get_btn_allies(code1, code2) for code2 in codes] for code1 in codes],
+                             dtype=np.int64).reshape((len(codes), len(codes)))
+        return alg_ids, alliances
+
     @staticmethod
     def get_passenger_btn(btn, star, neighbor) -> int:
         passBTN = btn + star.passenger_btn_mod + neighbor.passenger_btn_mod
@@ -187,6 +229,11 @@ class RouteCalculation(object):
         jump_index = bisect.bisect_left(RouteCalculation.btn_jump_range, distance)
         return RouteCalculation.btn_jump_mod[jump_index]
 
+    @staticmethod
+    def get_btn_offset_bulk(distance: np.ndarray) -> np.ndarray:
+        jump_index = np.searchsorted(RouteCalculation.btn_jump_range, distance, side='left')
+        return np.array(RouteCalculation.btn_jump_mod)[jump_index]
+
     @staticmethod
     @functools.cache
     def get_vol_offset(distance) -> int:
@@ -0,0 +1,85 @@
+"""
+Created on Oct 18, 2026
+
+Child-process half of TradeCalculation's optimistic parallel route search.  Each child holds the star graph's (fixed)
+topology, and searches batches of routes against whatever arc-weight and landmark-label snapshot the parent sends along
+with each batch.  The parent process decides which of those results are still valid when it commits them.
+"""
+from typing import Optional
+
+import networkx as nx
+import numpy as np
+
+try:
+    from PyRoute.Pathfinding.astar_numpy import astar_path_numpy
+except ModuleNotFoundError:
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+except ImportError:
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+except AttributeError:
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+
+
+class SnapshotGraph(object):
+    """
+    Just enough of a DistanceGraph - its compressed-sparse-row arrays and node count - for astar_path_numpy to search.
+    Arc weights are swapped out for each batch's snapshot.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray):
+        self.reset(indptr, indices)
+
+    def reset(self, indptr: np.ndarray, indices: np.ndarray) -> None:
+        self._indptr = indptr
+        self._indices = indices
+        self._weights = np.zeros(len(indices), dtype=float)
+
+    def __len__(self) -> int:
+        return len(self._indptr) - 1
+
+    @property
+    def csr(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self._indptr, self._indices, self._weights
+
+
+# The child process' own copy of the star graph, filled in by init_worker
+snapshot_graph = SnapshotGraph(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+
+def init_worker(indptr: np.ndarray, indices: np.ndarray) -> None:
+    snapshot_graph.reset(indptr, indices)
+
+
+def lower_bound_bulk(labels: np.ndarray, target: int) -> np.ndarray:
+    """
+    Landmark lower bounds from every node to target, given a snapshot of a forest's distance labels.  This has to
+    give exactly the same answers as ApproximateShortestPathForestUnified.lower_bound_bulk over the same labels.
+    """
+    overdrive = labels[target, :] != float('+inf')
+    if overdrive.all():
+        raw = labels - labels[target, :]
+    else:
+        if not overdrive.any():
+            return np.zeros(len(labels), dtype=float)
+        raw = labels[:, overdrive] - labels[target, overdrive]
+    return np.max(np.abs(raw), axis=1)
+
+
+def search_batch(task: tuple) -> list[tuple[int, Optional[list[int]], Optional[dict]]]:
+    """
+    Search each (position, source, target, upbound) route in task against task's weight and label snapshot, returning
+    (position, route, diagnostics) for each - route and diagnostics are None if no route was found.  Diagnostics are
+    always collected, as the parent needs the list of expanded nodes to check the result.
+    """
+    weights, labels, routes = task
+    snapshot_graph._weights = weights
+    results: list[tuple[int, Optional[list[int]], Optional[dict]]] = []
+    for (position, source, target, upbound) in routes:
+        heuristic = {target: lower_bound_bulk(labels, target)}
+        try:
+            rawroute, diag = astar_path_numpy(snapshot_graph, source, target, heuristic.__getitem__, upbound=upbound,
+                                              diagnostics=True, explored_nodes=True)
+        except nx.NetworkXNoPath:
+            rawroute, diag = None, None
+        results.append((position, rawroute, diag))
+    return results
@@ -4,16 +4,20 @@ Created on Mar 15, 2014
 @author: tjoneslo
 """
 import functools
-import itertools
 import math
-from typing import Optional
+from multiprocessing import Pool
+from typing import Callable, Optional
 
 import numpy as np
 import networkx as nx
 
 from PyRoute.Pathfinding.DistanceGraph import DistanceGraph
+from PyRoute.Pathfinding.LandmarkCache import LandmarkCache
+from PyRoute.Position.AxialBuckets import AxialBuckets
 from PyRoute.Allies.AllyGen import AllyGen
+from PyRoute.Calculation import SpeculativeSearch
 from PyRoute.Calculation.RouteCalculation import RouteCalculation
+from PyRoute.Calculation.TradeCheckpoint import TradeCheckpoint
 try:
     from PyRoute.Pathfinding.ApproximateShortestPathForestUnified import ApproximateShortestPathForestUnified
 except ModuleNotFoundError:
@@ -24,13 +28,17 @@ except AttributeError:
     from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified  # type: ignore
 from PyRoute.TradeBalance import TradeBalance
 try:
-    from PyRoute.Pathfinding.astar_numpy import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy import astar_path_numpy, astar_path_numpy_bidirectional, \
+        astar_path_numpy_multi
 except ModuleNotFoundError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_bidirectional, \
+        astar_path_numpy_multi
 except ImportError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_bidirectional, \
+        astar_path_numpy_multi
 except AttributeError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_bidirectional, \
+        astar_path_numpy_multi
 from PyRoute.Star import Star
 
 
@@ -70,7 +78,10 @@ class TradeCalculation(RouteCalculation):
     # Maximum WTN to process routes for
     max_wtn = 15
 
-    def __init__(self, galaxy, min_btn=13, route_btn=8, route_reuse=10, debug_flag=False):
+    def __init__(self, galaxy, min_btn=13, route_btn=8, route_reuse=10, debug_flag=False, group_by_source=False,
+                 bidirectional=False, landmark_cache_dir=None, speculative_batch=0, speculative_workers=1,
+                 active_landmarks=0, checkpoint_dir=None, resume=False, checkpoint_routes=10000,
+                 checkpoint_minutes=15.0):
         super(TradeCalculation, self).__init__(galaxy)
 
         # Minimum BTN to calculate routes for. BTN between two worlds less than
@@ -97,8 +108,34 @@ class TradeCalculation(RouteCalculation):
         # Count routes that get trimmed by as-found route length
         self.penumbra_routes = 0
 
+        # Search routes from both ends at once, rather than only forward from the source?
+        self.bidirectional = bidirectional
+        self.pathfinder = astar_path_numpy_bidirectional if bidirectional else astar_path_numpy
+
+        # Should consecutive same-source routes within a BTN tier be settled by a single one-to-many search?
+        self.group_by_source = group_by_source
+        self.group_stats = {'searches': 0, 'reused': 0, 'researched': 0}
+
+        # Should batches of upcoming routes be searched ahead of time in child processes, against a snapshot of the
+        # current weights?  Results are only kept if nothing they depended on has changed by the time they're committed,
+        # so the routes found are the same as searching them one at a time.
+        self.speculative_batch = speculative_batch
+        self.speculative_workers = max(1, speculative_workers)
+        self.speculative_stats = {'batches': 0, 'reused': 0, 'researched': 0}
+
+        # Bound each route's search with only this many of its tightest landmarks, rather than all of them?  0 uses all.
+        self.active_landmarks = active_landmarks
+        self.landmark_stats = {'queries': 0, 'active_bound': 0.0, 'full_bound': 0.0}
+
         self.shortest_path_tree = None
         self.shortest_dist_tree = None
+        # Where to keep landmark tree labels between runs, if anywhere
+        self.landmark_cache = None if landmark_cache_dir is None else LandmarkCache(landmark_cache_dir)
+        # Where to snapshot route processing, if anywhere, and should an earlier run's snapshot be resumed from?
+        self.checkpoint = None if checkpoint_dir is None else TradeCheckpoint(checkpoint_dir, resume, checkpoint_routes,
+                                                                             checkpoint_minutes)
+        # Historic-route edges added to galaxy.stars, in the order they were added
+        self.route_edges: list[tuple[int, int]] = []
         # Track inter-sector passenger imbalances
         self.sector_passenger_balance = TradeBalance(stat_field="passengers", region=galaxy)
         # Track inter-sector trade imbalances
@@ -143,55 +180,119 @@ class TradeCalculation(RouteCalculation):
     def _raw_ranges(self):
         max_route_dist = max(self.btn_range)
         max_range = self.galaxy.max_jump_range
-        min_btn = self.min_btn
         min_wtn = self.min_route_wtn
 
         hiball = [item for item in self.galaxy.ranges if item.wtn >= min_wtn and not item.is_redzone]
         loball = [item for item in self.galaxy.ranges if item.wtn < min_wtn and not item.is_redzone]
 
-        def two_boost(x: tuple[Star, Star]) -> bool:
-            return (x[0].tradeCode.ag_code_boost and x[1].tradeCode.ag_code_boost
-                    and (x[0].tradeCode.agricultural or x[1].tradeCode.agricultural)) and \
-                   (x[0].tradeCode.in_code_boost and x[1].tradeCode.in_code_boost
-                    and (x[0].tradeCode.industrial or x[1].tradeCode.industrial))
-
-        def one_boost(x: tuple[Star, Star]) -> bool:
-            return (x[0].tradeCode.ag_code_boost and x[1].tradeCode.ag_code_boost
-                    and (x[0].tradeCode.agricultural or x[1].tradeCode.agricultural)) ^ \
-                   (x[0].tradeCode.in_code_boost and x[1].tradeCode.in_code_boost
-                    and (x[0].tradeCode.industrial or x[1].tradeCode.industrial))
-
-        def foo_boost(x: tuple[Star, Star]) -> bool:
-            return (x[0].tradeCode.ag_code_boost and x[1].tradeCode.ag_code_boost
-                    and (x[0].tradeCode.agricultural or x[1].tradeCode.agricultural)) or \
-                   (x[0].tradeCode.in_code_boost and x[1].tradeCode.in_code_boost
-                    and (x[0].tradeCode.industrial or x[1].tradeCode.industrial))
-
-        ranges = [(star, neighbour) for (star, neighbour) in itertools.combinations(hiball, 2)
-                  if (dist := star.distance(neighbour)) <= self._max_dist(star.wtn, neighbour.wtn, True)
-                  and self._get_btn_upper_bound(star, neighbour, max_range, min_btn, distance=dist) >= min_btn
-                  ]
-        hi_hi_ranges = [(star, neighbour) for (star, neighbour) in filter(two_boost, ranges)]
-        hi_hi_ranges1 = [(star, neighbour) for (star, neighbour) in filter(one_boost, ranges)
-                         if self._get_btn_upper_bound(star, neighbour, max_range, min_btn, offset=1) >= min_btn
-                         ]
-        hi_hi_ranges2 = [(star, neighbour) for (star, neighbour) in itertools.filterfalse(foo_boost, ranges)
-                         if self._get_btn_upper_bound(star, neighbour, max_range, min_btn, offset=0) >= min_btn
-                         ]
-        lo_lo_ranges = [(star, neighbour) for (star, neighbour) in itertools.combinations(loball, 2)
-                        if (star.distance(neighbour)) <= max_range
-                        ]
-        hi_lo_ranges = [(star, neighbour) for (star, neighbour) in itertools.product(hiball, loball)
-                        if (star.distance(neighbour)) <= max_range
-                        ]
+        hi_q = np.array([item.hex.q for item in hiball], dtype=np.int64)
+        hi_r = np.array([item.hex.r for item in hiball], dtype=np.int64)
+        lo_q = np.array([item.hex.q for item in loball], dtype=np.int64)
+        lo_r = np.array([item.hex.r for item in loball], dtype=np.int64)
+
+        # Any pair with a low-WTN endpoint can't meet min BTN, so only needs to be linked out to max jump range
+        lo_buckets = AxialBuckets(lo_q, lo_r, max(1, max_range))
+        left, right, _ = lo_buckets.pairs_within(lo_q, lo_r, max_range)
+        keep = left < right
+        lo_lo_ranges = self._pairs_in_order(loball, loball, left[keep], right[keep])
+        left, right, _ = lo_buckets.pairs_within(hi_q, hi_r, max_range)
+        hi_lo_ranges = self._pairs_in_order(hiball, loball, left, right)
+
+        left, right, boost = self._hi_hi_candidates(hiball, hi_q, hi_r)
+
+        # Keep the pairs in the same order as the old all-pairs scan, grouped by how many trade-code boosts they get,
+        # so the stars graph is built identically
+        hi_hi_ranges = self._pairs_in_order(hiball, hiball, left[2 == boost], right[2 == boost])
         hi_hi_ranges.extend(lo_lo_ranges)
         hi_hi_ranges.extend(hi_lo_ranges)
-        hi_hi_ranges.extend(hi_hi_ranges1)
-        hi_hi_ranges.extend(hi_hi_ranges2)
+        hi_hi_ranges.extend(self._pairs_in_order(hiball, hiball, left[1 == boost], right[1 == boost]))
+        hi_hi_ranges.extend(self._pairs_in_order(hiball, hiball, left[0 == boost], right[0 == boost]))
         self.logger.info("Routes with endpoints more than " + str(max_route_dist) + " pc apart, trimmed")
 
         return hi_hi_ranges
 
+    def _hi_hi_candidates(self, hiball, hi_q, hi_r) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find the pairs of high-WTN worlds that can possibly meet min BTN.  Each WTN value present is bucketed on its
+        own, so each pair of WTN values only gets compared out to the distance their BTN upper bound allows.
+
+        @return: Tuple of left and right hiball indexes (left < right), and how many trade code boosts (0-2) each pair
+        gets
+        """
+        max_range = self.galaxy.max_jump_range
+        min_btn = self.min_btn
+        wtn = np.array([item.wtn for item in hiball], dtype=np.int64)
+
+        wtn_values = [int(item) for item in np.unique(wtn)]
+        groups = {value: np.flatnonzero(wtn == value) for value in wtn_values}
+        lefts = []
+        rights = []
+        for i, big in enumerate(wtn_values):
+            query = groups[big]
+            for small in wtn_values[:i + 1]:
+                members = groups[small]
+                radius = self._candidate_radius(big, small)
+                buckets = AxialBuckets(hi_q[members], hi_r[members], max(1, radius))
+                left, right, _ = buckets.pairs_within(hi_q[query], hi_r[query], radius)
+                left = query[left]
+                right = members[right]
+                if big == small:
+                    keep = left < right
+                    left = left[keep]
+                    right = right[keep]
+                lefts.append(np.minimum(left, right))
+                rights.append(np.maximum(left, right))
+
+        if 0 == len(lefts):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        left = np.concatenate(lefts)
+        right = np.concatenate(rights)
+
+        dist = AxialBuckets._distance(hi_q[left], hi_r[left], hi_q[right], hi_r[right])
+        left_wtn = wtn[left]
+        right_wtn = wtn[right]
+        max_wtn = np.maximum(left_wtn, right_wtn)
+        max_dist = np.maximum(np.array(self.btn_range)[np.clip(max_wtn - self.min_wtn, 0, 6)], max_range)
+
+        codes = [item.tradeCode for item in hiball]
+        ag_boost = np.array([code.ag_code_boost for code in codes], dtype=bool)
+        agricultural = np.array([code.agricultural for code in codes], dtype=bool)
+        in_boost = np.array([code.in_code_boost for code in codes], dtype=bool)
+        industrial = np.array([code.industrial for code in codes], dtype=bool)
+        boost = (ag_boost[left] & ag_boost[right] & (agricultural[left] | agricultural[right])).astype(np.int64)
+        boost += in_boost[left] & in_boost[right] & (industrial[left] | industrial[right])
+
+        alg_ids, alliances = self._get_btn_allies_matrix([item.alg_code for item in hiball])
+        allies = alliances[alg_ids[left], alg_ids[right]]
+
+        upper = self._get_btn_upper_bound_bulk(left_wtn, right_wtn, allies, dist, max_range, min_btn, boost)
+        keep = (dist <= max_dist) & (upper >= min_btn)
+
+        return left[keep], right[keep], boost[keep]
+
+    def _candidate_radius(self, star_wtn, neighbour_wtn) -> int:
+        """
+        Upper bound on the distance two worlds with the given WTNs can be apart and still have a BTN upper bound
+        meeting min BTN.  Beyond max jump range, that needs the distance modifier alone to keep the sum of WTNs
+        (plus both trade code boosts) at or above min BTN, as allegiance modifiers never increase BTN.
+        """
+        max_dist = self._max_dist(star_wtn, neighbour_wtn, True)
+        need = self.min_btn - star_wtn - neighbour_wtn - 2
+        allowed = [i for (i, mod) in enumerate(self.btn_jump_mod) if mod >= need]
+        if 0 == len(allowed):
+            reach = 0
+        elif len(self.btn_jump_range) == allowed[-1]:
+            reach = max_dist
+        else:
+            reach = self.btn_jump_range[allowed[-1]]
+        return min(max_dist, max(self.galaxy.max_jump_range, reach))
+
+    @staticmethod
+    def _pairs_in_order(left_stars, right_stars, left, right) -> list[tuple[Star, Star]]:
+        order = np.lexsort((right, left))
+        return [(left_stars[i], right_stars[j]) for (i, j) in zip(left[order].tolist(), right[order].tolist())]
+
     def generate_routes(self) -> None:
         """
         Generate the basic routes between all the stars. This creates two sets
@@ -278,35 +379,58 @@ class TradeCalculation(RouteCalculation):
         # Feed the landmarks in as roots of their respective shortest-path trees.
         # This sets up the approximate-shortest-path bounds to be during the first pathfinding call.
         self.shortest_path_tree = ApproximateShortestPathForestUnified(source.index, self.galaxy.stars,
-                                                                             self.epsilon, sources=landmarks)
+                                                                             self.epsilon, sources=landmarks,
+                                                                             cache=self.landmark_cache)
         self.shortest_dist_tree = ApproximateShortestPathForestUnified(source.index, self.galaxy.stars,
                                                                              0, sources=landmarks,
-                                                                             use_distances=True)
+                                                                             use_distances=True,
+                                                                             cache=self.landmark_cache)
+        if self.landmark_cache is not None:
+            self.logger.info("Landmark cache: {} hits, {} misses".format(self.landmark_cache.hits,
+                                                                          self.landmark_cache.misses))
         self.star_len_root = max(1, math.floor(math.sqrt(len(self.star_graph))) // 2)
 
         np.seterr(invalid="ignore")
         btn = [(s, n, d) for (s, n, d) in btn if (lobound := self.shortest_dist_tree.lower_bound(s.index, n.index) > 0)
                and (self.get_btn(s, n, lobound) >= self.min_btn)]
 
-        base_btn = 0  # pragma: no mutate
-        counter = 0
-        processed = 0
         total = len(btn)
-        for (star, neighbor, data) in btn:
-            if base_btn != data['btn']:
-                if counter > 0:
-                    self.logger.info('processed {} routes at BTN {}'.format(counter, base_btn))
-                base_btn = data['btn']
-                counter = 0
-            if total > 100 and processed % (total // 20) == 0:  # pragma: no mutate
-                self.logger.info('processed {} routes, at {}%'.format(processed, processed // (total // 100)))  # pragma: no mutate
-            self.get_trade_between(star, neighbor)
-            counter += 1
-            processed += 1
+        if self.group_by_source:
+            schedule = self.group_routes_by_source(btn)
+        else:
+            schedule = [(star, [(star, neighbor)], data) for (star, neighbor, data) in btn]
+        progress = (0, 0, 0, 0)
+        if self.checkpoint is not None:
+            self.checkpoint.start(TradeCheckpoint.schedule_key(self.star_graph, schedule, self.route_reuse))
+            if self.checkpoint.resume:
+                progress = self.checkpoint.load(self) or progress
+        if self._speculate_routes():
+            indptr, indices, _ = self.star_graph.csr
+            with Pool(processes=self.speculative_workers, initializer=SpeculativeSearch.init_worker,
+                      initargs=(indptr, indices)) as pool:
+                base_btn, counter, processed = self._process_schedule(schedule, total, pool, progress)
+        else:
+            base_btn, counter, processed = self._process_schedule(schedule, total, progress=progress)
         self.multilateral_balance_trade()
         self.multilateral_balance_pass()
         self.logger.info('processed {} routes at BTN {}'.format(counter, base_btn))
         self.logger.info('{} penumbra routes included out of {}'.format(self.penumbra_routes, processed))
+        if self.group_by_source:
+            self.logger.info('{} grouped searches, {} routes reused, {} routes re-searched'.
+                             format(self.group_stats['searches'], self.group_stats['reused'],
+                                    self.group_stats['researched']))
+        if self._speculate_routes():
+            self.logger.info('{} speculative batches, {} routes reused, {} routes re-searched'.
+                             format(self.speculative_stats['batches'], self.speculative_stats['reused'],
+                                    self.speculative_stats['researched']))
+        if self.debug_flag:
+            bound_cache = self.shortest_path_tree.bound_cache
+            self.logger.info('Landmark bound cache: {} hits, {} misses'.format(bound_cache.hits, bound_cache.misses))
+        if self.debug_flag and 0 < self.landmark_stats['queries']:
+            stats = self.landmark_stats
+            self.logger.info('{} searches bounded by {} active landmarks, keeping {:.1%} of the full landmark bound'.
+                             format(stats['queries'], self.active_landmarks,
+                                    stats['active_bound'] / max(stats['full_bound'], 1e-9)))
         if self.debug_flag:
             num_stars = len(self.galaxy.stars)
             self.logger.info('Pathfinding diagnostic data for route reuse {}, {} stars, {} routes'.
@@ -317,7 +441,7 @@ class TradeCalculation(RouteCalculation):
             branchdata = branchdata[branchdata < float('+inf')]  # pragma: no mutate
             branch = np.percentile(branchdata, [50, 80, 98])  # pragma: no mutate
             branch_geomean = round(10 ** np.mean(np.log10(branchdata)), 3)
-            neighbourhood_size = np.round(np.percentile(self.pathfinding_data['neighbourhood_size'], [50, 80, 98]), 3)  # pragma: no mutate
+            neighbourhood_size = np.round(np.percentile(self.pathfinding_data['neighbourhood_size'][keep], [50, 80, 98]), 3)  # pragma: no mutate
             total_expanded = int(np.sum(self.pathfinding_data['nodes_expanded'][keep]))
             total_queued = int(np.sum(self.pathfinding_data['nodes_queued'][keep]))
             total_revisited = int(np.sum(self.pathfinding_data['nodes_revisited'][keep]))
@@ -340,6 +464,145 @@ class TradeCalculation(RouteCalculation):
             self.logger.info('Total target-exhausted nodes {}'.format(total_targ_exhausted))
             self.logger.info('Total un-exhausted nodes {}'.format(total_un_exhausted))
 
+    def _process_schedule(self, schedule, total, pool=None, progress=(0, 0, 0, 0)) -> tuple[int, int, int]:
+        """
+        Find and apply each scheduled route in turn, returning the last BTN tier seen, the number of routes processed
+        in that tier, and the number of routes processed overall.  If a process pool is supplied, single routes are
+        searched ahead of time in batches of speculative_batch.
+
+        Processing starts from progress, a (schedule position, BTN tier, routes in tier, routes processed) tuple as
+        saved in a checkpoint, and is checkpointed whenever one is due.
+        """
+        start, base_btn, counter, processed = progress
+        speculation: dict = {}
+        for position in range(start, len(schedule)):
+            source, pairs, data = schedule[position]
+            if base_btn != data['btn']:
+                if counter > 0:
+                    self.logger.info('processed {} routes at BTN {}'.format(counter, base_btn))
+                base_btn = data['btn']
+                counter = 0
+            if total > 100 and processed % (total // 20) == 0:  # pragma: no mutate
+                self.logger.info('processed {} routes, at {}%'.format(processed, processed // (total // 100)))  # pragma: no mutate
+            if pool is not None and (0 == position % self.speculative_batch or start == position):
+                speculation = self._speculate_batch(pool, schedule[position:position + self.speculative_batch],
+                                                    position)
+            if 1 == len(pairs) and position in speculation:
+                self.get_trade_between_speculative(pairs[0][0], pairs[0][1], speculation, position)
+            elif 1 == len(pairs):
+                self.get_trade_between(pairs[0][0], pairs[0][1])
+            else:
+                self.get_trade_between_group(source, pairs)
+            counter += len(pairs)
+            processed += len(pairs)
+            if self.checkpoint is not None and self.checkpoint.due(processed):
+                self.checkpoint.save(self, (position + 1, base_btn, counter, processed))
+        return base_btn, counter, processed
+
+    def _speculate_routes(self) -> bool:
+        # Speculative search needs a batch of more than one route to be worth it, and checks its results against the
+        # forward search's expanded nodes, so it stands down for grouped and bidirectional searches
+        return 1 < self.speculative_batch and not self.group_by_source and not self.bidirectional
+
+    def _speculate_batch(self, pool, batch, offset) -> dict:
+        """
+        Search every single route in batch in the child processes, against a snapshot of the current arc weights and
+        landmark labels.  Returns the snapshot, and for each route's schedule position, the upper bound it was
+        searched with, along with the route and diagnostics found.
+        """
+        weights = self.star_graph.csr[2].copy()
+        labels = np.array(self.shortest_path_tree.distances)
+        routes = []
+        for (position, (_, pairs, _)) in enumerate(batch, offset):
+            if 1 != len(pairs):
+                continue
+            star, target = pairs[0]
+            # Reheating changes historic route costs, so it has to wait until the route is committed in its turn
+            upbound = self._preheat_upper_bound(star.index, target.index, allow_reheat=False) * 1.005
+            left, right = self._orient_route(star, target)
+            routes.append((position, left.index, right.index, upbound))
+
+        self.speculative_stats['batches'] += 1
+        speculation: dict = {'weights': weights, 'labels': labels}
+        upbounds = {position: upbound for (position, _, _, upbound) in routes}
+        # Deal routes out round-robin, so each child gets a similar mix of long and short routes
+        tasks = [(weights, labels, routes[i::self.speculative_workers]) for i in range(self.speculative_workers)]
+        for results in pool.map(SpeculativeSearch.search_batch, [task for task in tasks if 0 < len(task[2])]):
+            for (position, rawroute, diag) in results:
+                speculation[position] = (upbounds[position], rawroute, diag)
+        return speculation
+
+    def get_trade_between_speculative(self, star, target, speculation, position) -> None:
+        """
+        Calculate the route between star and target, reusing the route searched ahead of time for this schedule
+        position if that search would go exactly the same way now.
+
+        A* only reads the arc weights out of the nodes it expands, and the heuristic values (landmark labels) of those
+        nodes, their neighbours and the target.  If those weights and labels are unchanged since the snapshot, and the
+        upper bound is the same, then searching now would repeat the snapshot search step for step and find the same
+        route.  Otherwise, the route is searched again against the current weights.
+        """
+        assert 'actual distance' not in self.galaxy.ranges._adj[target][star],\
+            "This route from " + str(star) + " to " + str(target) + " has already been processed in reverse"
+
+        # Get upper bound value, and increase by 0.5% to ensure it _is_ an upper bound
+        upbound = self._preheat_upper_bound(star.index, target.index, allow_reheat=True) * 1.005
+
+        star, target = self._orient_route(star, target)
+
+        snap_upbound, rawroute, diag = speculation[position]
+        if rawroute is not None and upbound == snap_upbound and \
+                self._search_unchanged(diag['explored'], target.index, speculation['weights'], speculation['labels']):
+            self.speculative_stats['reused'] += 1
+            if self.debug_flag:
+                self._record_pathfinding_data(diag)
+        else:
+            self.speculative_stats['researched'] += 1
+            rawroute = self._search_route(star, target, upbound)
+            if rawroute is None:
+                return
+
+        self._apply_route(star, target, rawroute)
+
+    def _search_unchanged(self, explored, target, weights, labels) -> bool:
+        """
+        Are the arc weights out of every explored node, and the landmark labels of explored nodes, their neighbours and
+        target, the same now as in the weights and labels snapshot?
+        """
+        indptr, indices, current = self.star_graph.csr
+        explored = np.array(explored, dtype=np.int64)
+        starts = indptr[explored]
+        lengths = indptr[explored + 1] - starts
+        # Offsets of every arc out of every explored node, in one array
+        arcs = np.arange(np.sum(lengths)) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        if not np.array_equal(current[arcs], weights[arcs]):
+            return False
+        nodes = np.union1d(np.union1d(explored, indices[arcs]), [target])
+        return np.array_equal(self.shortest_path_tree.distances[nodes], labels[nodes])
+
+    @staticmethod
+    def group_routes_by_source(btn) -> list[tuple[Star, list[tuple[Star, Star]], dict]]:
+        """
+        Gather consecutive (star, neighbour) pairs that share an endpoint and a BTN tier into groups, each keyed by
+        that shared endpoint.  Pairs keep their original order, both within and across groups, so the sequence in which
+        routes get reweighted is unchanged.
+        """
+        groups: list[tuple[Star, list[tuple[Star, Star]], dict]] = []
+        for (star, neighbor, data) in btn:
+            if 0 < len(groups) and groups[-1][2]['btn'] == data['btn']:
+                source, pairs, _ = groups[-1]
+                if 1 == len(pairs) and source is not star and source is not neighbor:
+                    # A singleton group's source is provisional - re-key it on whichever endpoint it shares
+                    first = pairs[0][1]
+                    if first is star or first is neighbor:
+                        groups[-1] = (first, pairs, groups[-1][2])
+                        source = first
+                if source is star or source is neighbor:
+                    pairs.append((star, neighbor))
+                    continue
+            groups.append((star, [(star, neighbor)], data))
+        return groups
+
     def get_trade_between(self, star, target) -> None:
         """
         Calculate the route between star and target
@@ -349,38 +612,162 @@ class TradeCalculation(RouteCalculation):
         assert 'actual distance' not in self.galaxy.ranges._adj[target][star],\
             "This route from " + str(star) + " to " + str(target) + " has already been processed in reverse"
 
-        try:
-            # Get upper bound value, and increase by 0.5% to ensure it _is_ an upper bound
-            upbound = self._preheat_upper_bound(star.index, target.index, allow_reheat=True) * 1.005
+        # Get upper bound value, and increase by 0.5% to ensure it _is_ an upper bound
+        upbound = self._preheat_upper_bound(star.index, target.index, allow_reheat=True) * 1.005
 
-            comp_id = star.component
-            if star.index in self.component_landmarks[comp_id] and \
-                    target.index not in self.component_landmarks[comp_id]:
-                target, star = star, target
+        star, target = self._orient_route(star, target)
 
-            rawroute, diag = astar_path_numpy(self.star_graph, star.index, target.index,
-                                              self.shortest_path_tree.lower_bound_bulk, upbound=upbound,
-                                              diagnostics=self.debug_flag)
+        rawroute = self._search_route(star, target, upbound)
+        if rawroute is None:
+            return
 
-            if self.debug_flag:
-                moshdex = np.where(self.pathfinding_data['branch_factor'] == -1.0)[0][0]
-                # Now load up this route's summary data
-                self.pathfinding_data['nodes_expanded'][moshdex] = diag['nodes_expanded']
-                self.pathfinding_data['nodes_queued'][moshdex] = diag['nodes_queued']
-                self.pathfinding_data['branch_factor'][moshdex] = diag['branch_factor']
-                self.pathfinding_data['nodes_revisited'][moshdex] = diag['nodes_revisited']
-                self.pathfinding_data['neighbour_bound'][moshdex] = diag['neighbour_bound']
-                self.pathfinding_data['new_upbounds'][moshdex] = diag['new_upbounds']
-                self.pathfinding_data['g_exhausted'][moshdex] = diag['g_exhausted']
-                self.pathfinding_data['f_exhausted'][moshdex] = diag['f_exhausted']
-                self.pathfinding_data['targ_exhausted'][moshdex] = diag['targ_exhausted']
-                self.pathfinding_data['un_exhausted'][moshdex] = diag['un_exhausted']
-                neighbourhood_size = 1 if diag['un_exhausted'] == 0 else diag['nodes_queued'] / diag['un_exhausted']
-                self.pathfinding_data['neighbourhood_size'][moshdex] = neighbourhood_size
+        self._apply_route(star, target, rawroute)
 
+    def _search_route(self, star, target, upbound) -> Optional[list[int]]:
+        """
+        Search for the route from star to target under the current weights, returning None if there isn't one
+        """
+        try:
+            rawroute, diag = self.pathfinder(self.star_graph, star.index, target.index,
+                                             self._bulk_heuristic(star.index, target.index), upbound=upbound,
+                                             diagnostics=self.debug_flag)
         except nx.NetworkXNoPath:
-            return
+            return None
+
+        if self.debug_flag:
+            self._record_pathfinding_data(diag)
+        return rawroute
+
+    def _bulk_heuristic(self, source: int, target: int) -> Callable[[int], np.ndarray]:
+        """
+        Return the bulk heuristic to search between source and target with.  With active landmarks turned on, that's
+        the landmark bound over only the landmarks giving the tightest source-target bounds, picked once per search.
+        """
+        tree = self.shortest_path_tree
+        if 0 >= self.active_landmarks or self.active_landmarks >= tree.num_trees:
+            return tree.lower_bound_bulk
+        columns = tree.select_landmarks(source, target, self.active_landmarks)
+
+        if self.debug_flag:
+            # The active landmarks always keep the full set's bound at the source, as the tightest landmark between the
+            # endpoints is always picked - so compare the bounds over every star that can reach the target
+            full = tree.lower_bound_bulk(target)
+            active = tree.lower_bound_bulk_columns(target, columns)
+            keep = np.isfinite(full)
+            self.landmark_stats['queries'] += 1
+            self.landmark_stats['full_bound'] += float(np.sum(full[keep]))
+            self.landmark_stats['active_bound'] += float(np.sum(active[keep]))
+
+        def heuristic(node: int) -> np.ndarray:
+            return tree.lower_bound_bulk_columns(node, columns)
+
+        return heuristic
+
+    def get_trade_between_group(self, source, pairs) -> None:
+        """
+        Calculate the routes for each (star, target) pair in pairs, all of which have source as one endpoint, by
+        settling every far endpoint in a single one-to-many search.
+
+        Routes are still applied (and reweighted) one at a time, in the order given.  Once earlier routes in the group
+        have lightened edges, a route found by the shared search is only reused if the landmark bounds indicate it's
+        still a shortest path - if the entire weight reduction since the search landed on that route, no other path
+        can have gained enough to undercut it.  Otherwise, that pair falls back to its own search via
+        get_trade_between.  Those bounds are the same approximate ones A* itself is guided by, so this is no stronger
+        a guarantee than the per-pair search gives.
+        """
+        for (star, target) in pairs:
+            assert 'actual distance' not in self.galaxy.ranges._adj[target][star],\
+                "This route from " + str(star) + " to " + str(target) + " has already been processed in reverse"
+
+        far_ends = [target if star is source else star for (star, target) in pairs]
+        # Get upper bound values, and increase by 0.5% to ensure they _are_ upper bounds
+        upbounds = [self._preheat_upper_bound(star.index, target.index, allow_reheat=True) * 1.005
+                    for (star, target) in pairs]
+
+        paths, _, diag = astar_path_numpy_multi(self.star_graph, source.index, [item.index for item in far_ends],
+                                                self.shortest_path_tree.lower_bound_bulk, upbounds=upbounds,
+                                                diagnostics=self.debug_flag)
+        self.group_stats['searches'] += 1
+        if self.debug_flag:
+            # One summary slot for the shared search - routes it supplies are covered by it, rather than leaving
+            # their own slots unfilled
+            self._record_pathfinding_data(diag)
+
+        weights = self.star_graph.csr[2]
+        snapshot = weights.copy()
+
+        for (star, target), far_end in zip(pairs, far_ends):
+            rawroute = paths.get(far_end.index)
+            if rawroute is None:
+                self.group_stats['researched'] += 1
+                self.get_trade_between(star, target)
+                continue
+
+            if not self._route_still_shortest(rawroute, snapshot, weights):
+                self.group_stats['researched'] += 1
+                self.get_trade_between(star, target)
+                continue
+
+            self.group_stats['reused'] += 1
+            left, right = self._orient_route(star, target)
+            if rawroute[0] != left.index:
+                rawroute = rawroute[::-1]
+            self._apply_route(left, right, rawroute)
+
+    def _route_still_shortest(self, rawroute, snapshot, weights) -> bool:
+        """
+        Do the landmark bounds show rawroute, a shortest path when arc weights were snapshot, is still a shortest path
+        under the current weights?
+
+        Any competing path that only uses lightened edges lying on rawroute can't have gained more than rawroute did.
+        Any competing path using some other lightened edge (u, v) costs at least the landmark lower bound from
+        rawroute's source to u, plus (u, v)'s new weight, plus the lower bound from v to rawroute's target.  If that
+        bound stays above rawroute's new cost for every such edge, rawroute is taken to still be shortest.  The
+        landmark labels are approximate (built with edge weights scaled by 1 / (1 + epsilon)), so this is a heuristic
+        check rather than a proof.
+        """
+        changed = np.flatnonzero(snapshot != weights)
+        if 0 == len(changed):
+            return True
+        on_path = np.concatenate((self.star_graph.path_arcs(rawroute), self.star_graph.path_arcs(rawroute[::-1])))
+        changed = changed[np.isin(changed, on_path, invert=True)]
+        if 0 == len(changed):
+            return True
 
+        indptr, indices, _ = self.star_graph.csr
+        tails = np.searchsorted(indptr, changed, side='right') - 1
+        heads = indices[changed]
+        from_source = self.shortest_path_tree.lower_bound_bulk(rawroute[0])
+        to_target = self.shortest_path_tree.lower_bound_bulk(rawroute[-1])
+
+        via = np.minimum(from_source[tails] + to_target[heads], from_source[heads] + to_target[tails])
+        return bool(np.all(via + weights[changed] > np.sum(weights[on_path[:len(rawroute) - 1]])))
+
+    def _orient_route(self, star, target) -> tuple[Star, Star]:
+        # Search _from_ the non-landmark end when only one end is a landmark
+        comp_id = star.component
+        if star.index in self.component_landmarks[comp_id] and \
+                target.index not in self.component_landmarks[comp_id]:
+            return target, star
+        return star, target
+
+    def _record_pathfinding_data(self, diag) -> None:
+        moshdex = np.where(self.pathfinding_data['branch_factor'] == -1.0)[0][0]
+        # Now load up this route's summary data
+        self.pathfinding_data['nodes_expanded'][moshdex] = diag['nodes_expanded']
+        self.pathfinding_data['nodes_queued'][moshdex] = diag['nodes_queued']
+        self.pathfinding_data['branch_factor'][moshdex] = diag['branch_factor']
+        self.pathfinding_data['nodes_revisited'][moshdex] = diag['nodes_revisited']
+        self.pathfinding_data['neighbour_bound'][moshdex] = diag['neighbour_bound']
+        self.pathfinding_data['new_upbounds'][moshdex] = diag['new_upbounds']
+        self.pathfinding_data['g_exhausted'][moshdex] = diag['g_exhausted']
+        self.pathfinding_data['f_exhausted'][moshdex] = diag['f_exhausted']
+        self.pathfinding_data['targ_exhausted'][moshdex] = diag['targ_exhausted']
+        self.pathfinding_data['un_exhausted'][moshdex] = diag['un_exhausted']
+        neighbourhood_size = 1 if diag['un_exhausted'] == 0 else diag['nodes_queued'] / diag['un_exhausted']
+        self.pathfinding_data['neighbourhood_size'][moshdex] = neighbourhood_size
+
+    def _apply_route(self, star, target, rawroute) -> None:
         route = [self.galaxy.star_mapping[item] for item in rawroute]
 
         distance = self.route_distance(route)
@@ -411,14 +798,13 @@ class TradeCalculation(RouteCalculation):
         upbound = self.shortest_path_tree.triangle_upbound(stardex, targdex)
 
         # Case 0 - Source and target are directly connected
-        keep = self.star_graph._arcs[stardex][0] == targdex
-        if keep.any():
-            flip = self.star_graph._arcs[stardex][1][keep]
-            return min(upbound, flip[0])
+        direct = self.star_graph.arc_weight(stardex, targdex)
+        if direct is not None:
+            return min(upbound, direct)
 
         # Grab arrays to support Case 1
-        hist_targ = self.galaxy.historic_costs._arcs[targdex]
-        hist_src = self.galaxy.historic_costs._arcs[stardex]
+        hist_targ = self.galaxy.historic_costs.neighbours(targdex)
+        hist_src = self.galaxy.historic_costs.neighbours(stardex)
 
         # Case 1 - Historic-route source neighbour to historic-route target neighbour
         if 0 < len(hist_src[0]) and 0 < len(hist_targ[0]):
@@ -556,6 +942,7 @@ class TradeCalculation(RouteCalculation):
             self.galaxy.stars.add_edge(source.index, target.index, distance=distance, weight=cost, trade=0, btn=0,
                                        count=0, exhaust=0, route=route)
             self.galaxy.historic_costs.add_edge(source.index, target.index, cost)
+            self.route_edges.append((source.index, target.index))
 
         # Gather basic statistics.
         tradeBTN = self.get_btn(source, target, distance)
@@ -0,0 +1,257 @@
+"""
+Created on Oct 18, 2026
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+
+
+class TradeCheckpoint(object):
+    """
+    Periodic on-disk snapshot of a TradeCalculation part-way through calculate_routes, so a long run that dies can pick
+    up from its last snapshot rather than starting over.
+
+    A snapshot holds everything route processing changes - the schedule position, the star graph's arc weights, the
+    galaxy.stars edge counts and trade totals (including historic-route edges, in the order they were added),
+    historic_costs, the landmark forest's labels, the per-star and per-area trade statistics and the TradeBalance
+    accumulators - as numpy arrays in a single compressed .npz file.
+
+    Snapshots are keyed by a hash of the route schedule and the initial star graph, so a snapshot from a different
+    galaxy or different settings is never resumed from.
+    """
+
+    filename = 'trade-checkpoint.npz'
+    star_fields = ['tradeIn', 'tradeOver', 'tradeCount', 'passIn', 'passOver']
+    stat_fields = ['trade', 'tradeExt', 'passengers', 'tradeDton', 'tradeDtonExt']
+    balances = ['sector_passenger_balance', 'sector_trade_balance', 'sector_trade_volume_balance',
+                'allegiance_passenger_balance', 'allegiance_trade_balance', 'allegiance_trade_volume_balance']
+
+    def __init__(self, checkpoint_dir: str, resume: bool = False, every_routes: int = 10000,
+                 every_minutes: float = 15.0):
+        self.logger = logging.getLogger('PyRoute.TradeCheckpoint')
+        self.checkpoint_dir = checkpoint_dir
+        self.resume = resume
+        self.every_routes = every_routes
+        self.every_minutes = every_minutes
+        self.key = ''
+        self.saves = 0
+        self._last_processed = 0
+        self._last_time = time.monotonic()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.checkpoint_dir, self.filename)
+
+    @staticmethod
+    def schedule_key(star_graph, schedule: list, route_reuse: int) -> str:
+        """
+        Return the key for snapshots of schedule's routes over star_graph, a DistanceGraph, taken before any route has
+        been processed
+        """
+        indptr, indices, weights = star_graph.csr
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(indptr, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(indices, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(weights, dtype=np.float64).tobytes())
+        for (_, pairs, _) in schedule:
+            digest.update(np.array([(s.index, n.index) for (s, n) in pairs], dtype=np.int64).tobytes())
+            digest.update(b'|')
+        digest.update(np.int64(route_reuse).tobytes())
+        return digest.hexdigest()
+
+    def start(self, key: str, processed: int = 0) -> None:
+        """
+        Start counting towards the next snapshot of the run keyed by key
+        """
+        self.key = key
+        self._last_processed = processed
+        self._last_time = time.monotonic()
+
+    def due(self, processed: int) -> bool:
+        """
+        Is a snapshot due, now processed routes have been handled?
+        """
+        if 0 < self.every_routes and processed - self._last_processed >= self.every_routes:
+            return True
+        return 0 < self.every_minutes and time.monotonic() - self._last_time >= 60 * self.every_minutes
+
+    def save(self, trade, progress: tuple[int, int, int, int]) -> None:
+        """
+        Snapshot trade, which has just processed its schedule up to (but not including) position progress[0], after
+        processed progress[3] routes, with the current BTN tier progress[1] holding progress[2] of them.  Failures to
+        write are logged and otherwise ignored, so a full disk doesn't take the run down with it.
+        """
+        arrays = self._gather(trade, progress)
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            # Write to a scratch file and move it into place, so a crash mid-write leaves the previous snapshot intact
+            handle, scratch = tempfile.mkstemp(dir=self.checkpoint_dir, suffix='.npz')
+            try:
+                with os.fdopen(handle, 'wb') as f:
+                    np.savez_compressed(f, **arrays)
+                os.replace(scratch, self.path)
+            finally:
+                if os.path.exists(scratch):
+                    os.remove(scratch)
+        except OSError as e:
+            self.logger.warning("Unable to write trade checkpoint {}: {}".format(self.path, e))
+            return
+        self.saves += 1
+        self.start(self.key, progress[3])
+        self.logger.info("Checkpointed {} routes to {}".format(progress[3], self.path))
+
+    def load(self, trade) -> Optional[tuple[int, int, int, int]]:
+        """
+        Restore trade from the last snapshot of the current run, returning the (position, BTN tier, routes in tier,
+        routes processed) progress it was taken at, or None if there's no usable snapshot.  Trade must be freshly set
+        up, with none of its schedule processed.
+        """
+        try:
+            with np.load(self.path, allow_pickle=False) as raw:
+                arrays = {name: raw[name] for name in raw.files}
+        except (OSError, ValueError, EOFError) as e:
+            self.logger.warning("No usable trade checkpoint at {}: {}".format(self.path, e))
+            return None
+        if str(arrays['key']) != self.key:
+            self.logger.warning("Trade checkpoint {} is from a different galaxy or settings, ignoring".format(self.path))
+            return None
+        progress = self._restore(trade, arrays)
+        self.start(self.key, progress[3])
+        self.logger.info("Resumed {} routes from {}".format(progress[3], self.path))
+        return progress
+
+    def _areas(self, galaxy) -> list:
+        areas = [galaxy]
+        for sector in galaxy.sectors.values():
+            areas.append(sector)
+            areas.extend(sector.subsectors.values())
+        areas.extend(galaxy.alg.values())
+        return areas
+
+    def _gather(self, trade, progress: tuple[int, int, int, int]) -> dict[str, np.ndarray]:
+        galaxy = trade.galaxy
+        arrays: dict[str, np.ndarray] = {
+            'key': np.array(self.key),
+            'progress': np.array(list(progress) + [trade.penumbra_routes], dtype=np.int64),
+            'group_stats': np.array(list(trade.group_stats.values()), dtype=np.int64),
+            'speculative_stats': np.array(list(trade.speculative_stats.values()), dtype=np.int64),
+            'landmark_stats': np.array(list(trade.landmark_stats.values()), dtype=float),
+            'star_weights': trade.star_graph.csr[2],
+            'forest_distances': trade.shortest_path_tree.distances,
+            'forest_max_labels': trade.shortest_path_tree.max_labels,
+        }
+
+        tails, heads, weights = galaxy.historic_costs.arcs()
+        arrays['historic_tails'] = tails
+        arrays['historic_heads'] = heads
+        arrays['historic_weights'] = weights
+
+        # Historic-route edges go back in the order they were first added, so galaxy.stars' adjacency order (and with
+        # it, the order of everything written out from it) comes out the same
+        stars_adj = galaxy.stars._adj
+        routes = [stars_adj[u][v]['route'] for (u, v) in trade.route_edges]
+        arrays['route_edges'] = np.array(trade.route_edges, dtype=np.int64).reshape(-1, 2)
+        arrays['route_distances'] = np.array([stars_adj[u][v]['distance'] for (u, v) in trade.route_edges],
+                                             dtype=np.int64)
+        arrays['route_lengths'] = np.array([len(route) for route in routes], dtype=np.int64)
+        arrays['route_stars'] = np.array([star.index for route in routes for star in route], dtype=np.int64)
+
+        edges = list(galaxy.stars.edges(data=True))
+        arrays['edges'] = np.array([(u, v) for (u, v, _) in edges], dtype=np.int64).reshape(-1, 2)
+        arrays['edge_weights'] = np.array([data['weight'] for (_, _, data) in edges], dtype=float)
+        # Untouched base-route weights are still integers, and have to stay that way to be written out the same
+        arrays['edge_int_weights'] = np.array([isinstance(data['weight'], int) for (_, _, data) in edges], dtype=bool)
+        arrays['edge_counts'] = np.array([data['count'] for (_, _, data) in edges], dtype=np.int64)
+        arrays['edge_trade'] = np.array([data['trade'] for (_, _, data) in edges], dtype=np.int64)
+
+        ranges = list(galaxy.ranges.edges(data=True))
+        arrays['ranges'] = np.array([(s.index, n.index) for (s, n, _) in ranges], dtype=np.int64).reshape(-1, 2)
+        arrays['range_distances'] = np.array([data.get('actual distance', -1) for (_, _, data) in ranges],
+                                             dtype=np.int64)
+        arrays['range_jumps'] = np.array([data.get('jumps', -1) for (_, _, data) in ranges], dtype=np.int64)
+
+        stars = [galaxy.star_mapping[item] for item in sorted(galaxy.star_mapping)]
+        arrays['star_stats'] = np.array([[getattr(star, field) for field in self.star_fields] for star in stars],
+                                        dtype=np.int64)
+        arrays['area_stats'] = np.array([[getattr(area.stats, field) for field in self.stat_fields]
+                                         for area in self._areas(galaxy)], dtype=np.int64)
+
+        for name in self.balances:
+            balance = getattr(trade, name)
+            arrays[name + '_keys'] = np.array(list(balance.keys()), dtype=str).reshape(-1, 2)
+            arrays[name + '_values'] = np.array(list(balance.values()), dtype=np.int64)
+
+        if trade.pathfinding_data is not None:
+            for (name, data) in trade.pathfinding_data.items():
+                arrays['pathfinding_' + name] = data
+        return arrays
+
+    def _restore(self, trade, arrays: dict[str, np.ndarray]) -> tuple[int, int, int, int]:
+        galaxy = trade.galaxy
+        progress = arrays['progress'].tolist()
+        trade.penumbra_routes = progress[4]
+        for (name, stats) in [('group_stats', trade.group_stats), ('speculative_stats', trade.speculative_stats),
+                              ('landmark_stats', trade.landmark_stats)]:
+            stats.update(zip(stats.keys(), arrays[name].tolist()))
+
+        # The star graph and the forest's copy of it are lightened in lockstep, so share one set of weights
+        trade.star_graph.csr[2][:] = arrays['star_weights']
+        trade.shortest_path_tree.graph.csr[2][:] = arrays['star_weights']
+        trade.shortest_path_tree.restore_labels(arrays['forest_distances'], arrays['forest_max_labels'])
+        galaxy.historic_costs.add_arcs(arrays['historic_tails'], arrays['historic_heads'], arrays['historic_weights'])
+
+        star_mapping = galaxy.star_mapping
+        route_stars = [star_mapping[item] for item in arrays['route_stars'].tolist()]
+        start = 0
+        for ((u, v), distance, length) in zip(arrays['route_edges'].tolist(), arrays['route_distances'].tolist(),
+                                              arrays['route_lengths'].tolist()):
+            galaxy.stars.add_edge(u, v, distance=distance, weight=0.0, trade=0, btn=0, count=0, exhaust=0,
+                                  route=route_stars[start:start + length])
+            trade.route_edges.append((u, v))
+            start += length
+
+        stars_adj = galaxy.stars._adj
+        for ((u, v), weight, int_weight, count, tradeCr) in zip(arrays['edges'].tolist(),
+                                                                arrays['edge_weights'].tolist(),
+                                                                arrays['edge_int_weights'].tolist(),
+                                                                arrays['edge_counts'].tolist(),
+                                                                arrays['edge_trade'].tolist()):
+            data = stars_adj[u][v]
+            data['weight'] = int(weight) if int_weight else weight
+            data['count'] = count
+            data['trade'] = tradeCr
+
+        ranges_adj = galaxy.ranges._adj
+        for ((s, n), distance, jumps) in zip(arrays['ranges'].tolist(), arrays['range_distances'].tolist(),
+                                             arrays['range_jumps'].tolist()):
+            if 0 > jumps:
+                continue
+            data = ranges_adj[star_mapping[s]][star_mapping[n]]
+            data['actual distance'] = distance
+            data['jumps'] = jumps
+
+        stars = [star_mapping[item] for item in sorted(star_mapping)]
+        for (star, values) in zip(stars, arrays['star_stats'].tolist()):
+            for (field, value) in zip(self.star_fields, values):
+                setattr(star, field, value)
+        for (area, values) in zip(self._areas(galaxy), arrays['area_stats'].tolist()):
+            for (field, value) in zip(self.stat_fields, values):
+                setattr(area.stats, field, value)
+
+        for name in self.balances:
+            balance = getattr(trade, name)
+            balance.clear()
+            balance.update({tuple(key): value for (key, value) in
+                            zip(arrays[name + '_keys'].tolist(), arrays[name + '_values'].tolist())})
+
+        # Pathfinding diagnostics only get kept in debug mode, and either run may not have been in it
+        if trade.pathfinding_data is not None:
+            for name in trade.pathfinding_data:
+                if 'pathfinding_' + name in arrays:
+                    trade.pathfinding_data[name] = arrays['pathfinding_' + name].copy()
+        return progress[0], progress[1], progress[2], progress[3]
@@ -1,13 +1,17 @@
 """
 @author: tjoneslo
 """
+import contextlib
 import math
 import os
+import time
+from typing import Iterator
 
 import networkx as nx
+import numpy as np
 from networkx import is_path
 from multiprocessing import Queue, Pool
-from queue import Empty
+from multiprocessing.shared_memory import SharedMemory
 
 from PyRoute.Calculation.TradeCalculation import TradeCalculation
 from PyRoute.Pathfinding.DistanceGraph import DistanceGraph
@@ -19,34 +23,82 @@ except ImportError:
     from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified  # type: ignore
 except AttributeError:
     from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified  # type: ignore
-try:
-    from PyRoute.Pathfinding.astar_numpy import astar_path_numpy
-except ModuleNotFoundError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
-except ImportError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
-except AttributeError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
 
 # Convert the TradeMPCalculation to a global variable to allow the child processes to access it, and all the data.
 tradeCalculation = None
 
+# Number of routes a child process gathers up before sending them to the parent, and number of star pairs the parent
+# hands out to a child at a time for long routes
+ROUTE_BATCH = 32
+
+
+def pack_routes(routes: list[list[int]]) -> np.ndarray:
+    """
+    Pack routes into one flat integer array - each route's length, followed by that route's star indexes - so a whole
+    batch of them goes between processes as a single pickled object
+    """
+    packed = np.zeros(len(routes) + sum(len(route) for route in routes), dtype=np.int64)
+    i = 0
+    for route in routes:
+        packed[i] = len(route)
+        packed[i + 1:i + 1 + len(route)] = route
+        i += 1 + len(route)
+    return packed
+
+
+def unpack_routes(packed: np.ndarray) -> list[list[int]]:
+    routes = []
+    i = 0
+    while i < len(packed):
+        length = int(packed[i])
+        routes.append(packed[i + 1:i + 1 + length].tolist())
+        i += 1 + length
+    return routes
+
+
+class RouteBatcher(object):
+    """
+    Gathers a child process' routes into packed batches on their way to the parent, and counts them.  finish() sends
+    the last batch, followed by the child's completion sentinel, carrying its pid, route count and elapsed time.
+    """
+
+    def __init__(self, processed_queue):
+        self.processed_queue = processed_queue
+        self.routes: list[list[int]] = []
+        self.count = 0
+        self.start = time.perf_counter()
+
+    def add(self, rawroute: list[int]) -> None:
+        self.routes.append(rawroute)
+        self.count += 1
+        if ROUTE_BATCH <= len(self.routes):
+            self.flush()
+
+    def flush(self) -> None:
+        if 0 < len(self.routes):
+            self.processed_queue.put(('routes', pack_routes(self.routes)))
+            self.routes = []
+
+    def finish(self) -> None:
+        self.flush()
+        self.processed_queue.put(('done', os.getpid(), self.count, time.perf_counter() - self.start))
+
 
 def intrasector_process(working_queue, processed_queue) -> None:
     """
     This is the core working function used by the child processes spawned by the start_mp_services() functions.
-    :param working_queue: List of sectors to process
-    :param processed_queue: List of routes found by the child process, consumed by the paraent.
+    :param working_queue: List of sectors to process, followed by one None sentinel per child process
+    :param processed_queue: Batches of routes found by the child process, consumed by the parent.
     :return: None
     """
     global tradeCalculation
     assert isinstance(tradeCalculation, TradeMPCalculation), "Global tradeCalculation instance not TradeMPCalculation"
+    batcher = RouteBatcher(processed_queue)
     while True:
         # Read the sector names from the queue created by parent process.
-        # When the queue is empty we're done and can complete the process
-        try:
-            sector = working_queue.get(block=True, timeout=1)
-        except Empty:
+        # A None sentinel means there's no more work, and we can complete the process
+        sector = working_queue.get()
+        if sector is None:
             break
         count = 0
         tradeCalculation.logger.info(f"starting work in {sector}")
@@ -71,55 +123,55 @@ def intrasector_process(working_queue, processed_queue) -> None:
                     if float('+inf') != upbound:
                         upbound = round(upbound * 1.005 + 0.0005, 3)
 
-                    rawroute, _ = astar_path_numpy(tradeCalculation.star_graph, star.index, neighbor.index,
-                                               tradeCalculation.galaxy.heuristic_distance_bulk, upbound=upbound)
+                    rawroute, _ = tradeCalculation.pathfinder(tradeCalculation.star_graph, star.index, neighbor.index,
+                                                              tradeCalculation.galaxy.heuristic_distance_bulk,
+                                                              upbound=upbound)
                 except nx.NetworkXNoPath:
                     continue
 
-                # Update the routes in the child's internal list, like we would for the primary one,
-                # But only for the child data. This makes sure the routes are properly reduced in weights for the next
-                # route search.
-                route = [tradeCalculation.galaxy.star_mapping[item] for item in rawroute]
-                tradeCalculation.route_update_simple(route, True)
+                # The parent applies the route, reducing the shared weights that later searches here will read.  Only mark
+                # the range as done in the child's own copy, so it isn't searched again from the other end.
+                data['jumps'] = len(rawroute) - 1
 
-                # Put the rawroute (list of indexes) on the return queue to the parent process.
-                processed_queue.put(rawroute)
+                # Queue up the rawroute (list of indexes) for the return trip to the parent process.
+                batcher.add(rawroute)
                 count += 1
 
+        # Don't hold the sector's last few routes back while starting on the next sector
+        batcher.flush()
         tradeCalculation.logger.info(f"Process for {sector} completed, {count} routes processed.")
-    # And were done. Note this for the user.
+    # And were done. Tell the parent, and note this for the user.
+    batcher.finish()
     tradeCalculation.logger.info(f"child process {os.getpid()} completed.")
 
 
 def long_route_process(working_queue, processed_queue) -> None:
     global tradeCalculation
     assert isinstance(tradeCalculation, TradeMPCalculation), "Global tradeCalculation instance not TradeMPCalculation"
-    processed = 0
-    total = working_queue.qsize()
+    batcher = RouteBatcher(processed_queue)
 
-    # Working queue here is sending a pair of star indexes to process.
+    # Working queue here is sending arrays of star index pairs to process, followed by one None sentinel per child.
     while True:
-        try:
-            (star, neighbor) = working_queue.get(block=True, timeout=1)
-        except Empty:
+        pairs = working_queue.get()
+        if pairs is None:
             break
 
-        try:
-            upbound = tradeCalculation._preheat_upper_bound(star, neighbor)
+        for (star, neighbor) in pairs.tolist():
+            try:
+                upbound = tradeCalculation._preheat_upper_bound(star, neighbor)
 
-            rawroute, _ = astar_path_numpy(tradeCalculation.star_graph, star, neighbor,
-                                       tradeCalculation.galaxy.heuristic_distance_bulk, upbound=upbound)
-        except nx.NetworkXNoPath:
-            continue
+                rawroute, _ = tradeCalculation.pathfinder(tradeCalculation.star_graph, star, neighbor,
+                                                          tradeCalculation.galaxy.heuristic_distance_bulk,
+                                                          upbound=upbound)
+            except nx.NetworkXNoPath:
+                continue
 
-        # Route is a list of star indexes, which is what the parent process is assuming.
-        processed_queue.put(rawroute)
-        processed += 1
-        if total > 100 and processed % (total // 20) == 0:
-            tradeCalculation.logger.info(f'Child {os.getpid()} processed {processed} routes, at {processed // (total // 100)}%')
+            # Route is a list of star indexes, which is what the parent process is assuming.
+            batcher.add(rawroute)
 
-    # And were done. Note this for the user.
-    tradeCalculation.logger.info(f"child process {os.getpid()} completed, processed {processed} routes")
+    # And were done. Tell the parent, and note this for the user.
+    batcher.finish()
+    tradeCalculation.logger.info(f"child process {os.getpid()} completed, processed {batcher.count} routes")
 
 
 class TradeMPCalculation(TradeCalculation):
@@ -128,8 +180,10 @@ class TradeMPCalculation(TradeCalculation):
     between all the trade pairs using a multi-process route finder
     """
 
-    def __init__(self, galaxy, min_btn=13, route_btn=8, route_reuse=10, debug_flag=False, mp_threads=os.cpu_count() - 1):
-        super(TradeMPCalculation, self).__init__(galaxy, min_btn, route_btn, route_reuse, debug_flag)
+    def __init__(self, galaxy, min_btn=13, route_btn=8, route_reuse=10, debug_flag=False, mp_threads=os.cpu_count() - 1,
+                 bidirectional=False, landmark_cache_dir=None):
+        super(TradeMPCalculation, self).__init__(galaxy, min_btn, route_btn, route_reuse, debug_flag,
+                                                 bidirectional=bidirectional, landmark_cache_dir=landmark_cache_dir)
 
         self.btn = []
         self.mp_threads = mp_threads
@@ -163,7 +217,8 @@ class TradeMPCalculation(TradeCalculation):
         source.is_landmark = True
         # Feed the landmarks in as roots of their respective shortest-path trees.
         # This sets up the approximate-shortest-path bounds to be during the first pathfinding call.
-        self.shortest_path_tree = ApproximateShortestPathForestUnified(source.index, self.galaxy.stars, self.epsilon, sources=landmarks)
+        self.shortest_path_tree = ApproximateShortestPathForestUnified(source.index, self.galaxy.stars, self.epsilon, sources=landmarks,
+                                                                       cache=self.landmark_cache)
         self.star_graph = DistanceGraph(self.galaxy.stars)
         self.star_len_root = max(1, math.floor(math.sqrt(len(self.star_graph))) // 2)
 
@@ -190,27 +245,20 @@ class TradeMPCalculation(TradeCalculation):
         sector_queue = Queue()  # type: ignore
         routes_queue = Queue()  # type: ignore
         count = 0
-        # write sector names to the queue
+        # write sector names to the queue, followed by a sentinel for each child process to stop on
         for sector in self.galaxy.sectors:
             sector_queue.put(sector)
+        for _ in range(self.mp_threads):
+            sector_queue.put(None)
 
         # This starts the child processes.
         # Use a "with ... as ..." to ensure the workers and everything is cleaned up
         # when the workers are completed.
         self.logger.info(f"Starting {self.mp_threads} child processes for sector route calculations")
-        with Pool(processes=self.mp_threads, initializer=intrasector_process, initargs=(sector_queue, routes_queue)):
-            # Loop over the routes found by the child processes.
-            while True:
-                try:
-                    # Get a route from the child processes. This assumes the child processes (collectively)
-                    # won't take more than 3 seconds to produce a route. And they will produce routes faster
-                    # than the parent process can consume them. Which is why we have the queue.
-                    # Once we run out of routes to process, break from the loop
-                    route_list = routes_queue.get(block=True, timeout=3)
-                except Empty:
-                    if not sector_queue.empty():
-                        continue
-                    break
+        with self.shared_pathfinding_arrays(), \
+                Pool(processes=self.mp_threads, initializer=intrasector_process, initargs=(sector_queue, routes_queue)):
+            # Loop over the routes found by the child processes, until every one of them has reported it's done.
+            for route_list in self._receive_routes(routes_queue):
                 # convert route_list (list of star indexes) to route (list of stars)
                 route = [self.galaxy.star_mapping[item] for item in route_list]
 
@@ -232,37 +280,78 @@ class TradeMPCalculation(TradeCalculation):
         self.logger.info(f"Intra-sector route processing completed. Processed {count} routes")
         self.total_processed += count
 
+    def _receive_routes(self, routes_queue) -> Iterator[list[int]]:
+        """
+        Yield each route (list of star indexes) sent back by the child processes, blocking until every one of them has
+        sent its completion sentinel, then log each child's throughput.
+        """
+        finished = 0
+        while finished < self.mp_threads:
+            message = routes_queue.get()
+            if 'done' == message[0]:
+                _, pid, routes, elapsed = message
+                finished += 1
+                self.logger.info(f"child process {pid} found {routes} routes in {elapsed:.2f} seconds, "
+                                 f"{routes / max(elapsed, 1e-9):.1f} routes/sec")
+                continue
+            yield from unpack_routes(message[1])
+
+    @contextlib.contextmanager
+    def shared_pathfinding_arrays(self):  # noqa: ANN201
+        """
+        Move the star graph's arc weights and the landmark distance labels into shared memory blocks for the duration
+        of the context.  Child processes forked inside the context map the same blocks, so they read the parent's
+        current weights and labels at query time, rather than private copies taken when they were forked.  The parent
+        owns the blocks, and is the only process that writes to them.  Children never see the parent relabel trees, so
+        the landmark bound cache is turned off for the duration, rather than let them serve stale bounds.
+        """
+        blocks: list[SharedMemory] = []
+        try:
+            with self.shortest_path_tree.bound_cache.disabled():
+                self.star_graph.move_weights(self._shared_array(self.star_graph.csr[2], blocks))
+                self.shortest_path_tree.move_distances(self._shared_array(self.shortest_path_tree.distances, blocks))
+                yield
+        finally:
+            # Move both arrays back into private memory, so nothing refers to the blocks when they're released
+            self.star_graph.move_weights(np.array(self.star_graph.csr[2]))
+            self.shortest_path_tree.move_distances(np.array(self.shortest_path_tree.distances, order='F'))
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    @staticmethod
+    def _shared_array(array: np.ndarray, blocks: list[SharedMemory]) -> np.ndarray:
+        block = SharedMemory(create=True, size=max(1, array.nbytes))
+        blocks.append(block)
+        if array.flags.f_contiguous and not array.flags.c_contiguous:
+            return np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf, order='F')
+        return np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf, order='C')
+
     def process_long_routes(self, btn) -> None:
 
         self.shortest_path_tree = ApproximateShortestPathForestUnified(0, self.galaxy.stars,
-                                             0, sources=self.shortest_path_tree.sources)
+                                             0, sources=self.shortest_path_tree.sources, cache=self.landmark_cache)
 
         # Create the Queues for sending data between processes.
-        find_queue: Queue[tuple[int, int]] = Queue()
-        routes_queue: Queue[tuple[int, int]] = Queue()
+        find_queue = Queue()  # type: ignore
+        routes_queue = Queue()  # type: ignore
         processed = 0
 
-        for (start, target, data) in btn:
-            # skip the routes already that have been processed, in the intra-sector processing
-            if data.get('jumps', False):
-                continue
-            find_queue.put((start.index, target.index))
+        # skip the routes already that have been processed, in the intra-sector processing
+        pairs = [(start.index, target.index) for (start, target, data) in btn if not data.get('jumps', False)]
+        total = len(pairs)
+        # Hand the pairs out in chunks, in BTN order, followed by a sentinel for each child process to stop on
+        for i in range(0, total, ROUTE_BATCH):
+            find_queue.put(np.array(pairs[i:i + ROUTE_BATCH], dtype=np.int64))
+        for _ in range(self.mp_threads):
+            find_queue.put(None)
 
-        total = find_queue.qsize()
         self.logger.info(f"Starting {self.mp_threads} child processes for long route calculations. processing {total} routes")
 
-        with Pool(processes=self.mp_threads, initializer=long_route_process, initargs=(find_queue, routes_queue)):
-            # Loop over the routes found by the child processes.
-            while True:
-                try:
-                    # Get a route from the child processes. This assumes the child processes (collectively)
-                    # won't take more than 5 seconds to produce a route. And they will produce routes faster
-                    # than the parent process can consume them. Which is why we have the queue.
-                    route_list = routes_queue.get(block=True, timeout=5)
-                except Empty:
-                    if not find_queue.empty():
-                        continue
-                    break
+        with self.shared_pathfinding_arrays(), \
+                Pool(processes=self.mp_threads, initializer=long_route_process, initargs=(find_queue, routes_queue)):
+            # Loop over the routes found by the child processes, until every one of them has reported it's done.
+            for route_list in self._receive_routes(routes_queue):
                 route = [self.galaxy.star_mapping[item] for item in route_list]
                 assert is_path(self.galaxy.stars, route_list), f"Route returned by mp process is not a correct path: {route}"
 
@@ -337,8 +426,8 @@ class TradeMPCalculation(TradeCalculation):
                     target.index not in self.component_landmarks[comp_id]:
                     target, star = star, target
 
-            rawroute, _ = astar_path_numpy(self.star_graph, star.index, target.index,
-                                           self.galaxy.heuristic_distance_bulk, upbound=upbound)
+            rawroute, _ = self.pathfinder(self.star_graph, star.index, target.index,
+                                          self.galaxy.heuristic_distance_bulk, upbound=upbound)
         except nx.NetworkXNoPath:
             return
 
@@ -20,3 +20,12 @@ class ReadSectorOptions:
     fix_econ: bool = False
     deep_space: dict = None
     map_type: str = 'classic'
+    bidirectional: bool = False
+    group_by_source: bool = False
+    landmark_cache_dir: str = None
+    speculative_batch: int = 0
+    active_landmarks: int = 0
+    checkpoint_dir: str = None
+    resume: bool = False
+    checkpoint_routes: int = 10000
+    checkpoint_minutes: float = 15.0
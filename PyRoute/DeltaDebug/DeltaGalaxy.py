@@ -16,8 +16,10 @@ from PyRoute.Star import Star
 class DeltaGalaxy(Galaxy):
 
     def read_sectors(self, sectors, pop_code, ru_calc,  # type: ignore
-                     route_reuse, trade_choice, route_btn, mp_threads, debug_flag) -> None:
-        self._set_trade_object(route_reuse, trade_choice, route_btn, mp_threads, debug_flag)
+                     route_reuse, trade_choice, route_btn, mp_threads, debug_flag, bidirectional=False,
+                     group_by_source=False) -> None:
+        self._set_trade_object(route_reuse, trade_choice, route_btn, mp_threads, debug_flag,
+                               bidirectional=bidirectional, group_by_source=group_by_source)
         star_counter = 0
         sector: SectorDictionary
 
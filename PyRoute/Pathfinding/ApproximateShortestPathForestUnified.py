@@ -6,11 +6,11 @@ Created on Feb 29, 2024
 """
 import cython
 from cython.cimports.numpy import numpy as cnp
-import functools
 from typing import Any
 
 import numpy as np
 from PyRoute.Star import Star
+from PyRoute.Pathfinding.BoundCache import BoundCache
 from PyRoute.Pathfinding.DistanceGraph import DistanceGraph
 from PyRoute.Pathfinding.single_source_dijkstra import implicit_shortest_path_dijkstra_distance_graph
 try:
@@ -40,8 +40,11 @@ class ApproximateShortestPathForestUnified:
     _graph_len: cython.int
     _distances: cython.declare(cnp.ndarray(cython.float, ndim=2), 'readonly')
     _max_labels: cnp.ndarray(cython.float, ndim=2)
+    _bound_cache: object
+    _overdrive_cache: object
 
-    def __init__(self, source, graph, epsilon, sources=None, use_distances: bool = False):
+    def __init__(self, source, graph, epsilon, sources=None, use_distances: bool = False, cache=None,
+                 bound_cache_size: int = 64):
         seeds, source, num_trees = self._get_sources(graph, source, sources)
         self._graph = DistanceGraph(graph, use_distances)
         self._source = source
@@ -52,9 +55,21 @@ class ApproximateShortestPathForestUnified:
         self._seeds = seeds
         self._num_trees = num_trees
         self._graph_len = len(self._graph)
+        # Lower-bound vectors towards recent targets, and which trees are finite at those targets
+        self._bound_cache = BoundCache(bound_cache_size)
+        self._overdrive_cache = BoundCache(bound_cache_size)
         self._distances = np.ones((self._graph_len, self._num_trees), dtype=float, order='F') * float('+inf')
         self._max_labels = np.ones((self._graph_len, self._num_trees), dtype=float) * float('+inf')
 
+        key = None
+        if cache is not None:
+            key = cache.key(self._graph, self._seeds, self._divisor)
+            cached = cache.load(key, (self._graph_len, self._num_trees))
+            if cached is not None:
+                self._distances = np.asarray(cached[0])
+                self._max_labels = np.asarray(cached[1])
+                return
+
         min_cost = self._graph._min_cost
         # spin up initial distances
         for i in range(self._num_trees):
@@ -67,6 +82,9 @@ class ApproximateShortestPathForestUnified:
                                                                                    divisor=self._divisor)
             self._distances[:, i], self._max_labels[:, i], _ = result
 
+        if cache is not None:
+            cache.save(key, self._distances, self._max_labels)
+
     def lower_bound(self, source, target) -> float:
         raw = np.abs(self._distances[source, :] - self._distances[target, :])
         raw = raw[np.isfinite(raw)]
@@ -86,6 +104,10 @@ class ApproximateShortestPathForestUnified:
         overdrive: cnp.ndarray[cython.bint]
         fastpath: cython.bint
         anypath: cython.bint
+        result: cnp.ndarray[cython.float]
+        cached = self._bound_cache.get(target_node)
+        if cached is not None:
+            return cached
         overdrive, fastpath, anypath = self._mona_lisa_overdrive(target_node)
 
         if fastpath:  # Fastpath - all overdrive elements are _finite_, so all rows are retrieved
@@ -99,6 +121,38 @@ class ApproximateShortestPathForestUnified:
 
             raw = actives - target
 
+        result = np.max(np.abs(raw), axis=1)
+        self._bound_cache.put(target_node, result, overdrive)
+        return result
+
+    def select_landmarks(self, source: cython.int, target: cython.int, count: cython.int) -> cnp.ndarray:
+        """
+        Return the (sorted) columns of the count landmarks giving the tightest lower bounds between source and target,
+        skipping any landmark that can't reach both of them.
+        """
+        raw: cnp.ndarray[cython.float]
+        raw = np.abs(self._distances[source, :] - self._distances[target, :])
+        raw[~np.isfinite(raw)] = -1
+        if count >= self._num_trees:
+            return np.flatnonzero(0 <= raw)
+        columns = np.argpartition(-raw, count - 1)[:count]
+        return np.sort(columns[0 <= raw[columns]])
+
+    @cython.ccall
+    @cython.infer_types(True)
+    @cython.boundscheck(False)
+    @cython.initializedcheck(False)
+    @cython.nonecheck(False)
+    @cython.wraparound(False)
+    @cython.returns(cnp.ndarray)
+    def lower_bound_bulk_columns(self, target_node: cython.int, columns: cnp.ndarray) -> cnp.ndarray:
+        """
+        Lower bounds from every node to target_node, like lower_bound_bulk, over only the landmarks in columns
+        """
+        raw: cnp.ndarray(cython.float, ndim=2)
+        if 0 == len(columns):
+            return np.zeros(self._graph_len, dtype=float)
+        raw = self._distances[:, columns] - self._distances[target_node, columns]
         return np.max(np.abs(raw), axis=1)
 
     def triangle_upbound(self, source: cython.int, target: cython.int) -> float:
@@ -112,12 +166,17 @@ class ApproximateShortestPathForestUnified:
         return np.min(raw) * (1 + self._epsilon)
 
     #  Gratuitous William Gibson reference is gratuitous.
-    @functools.cache
     @cython.cfunc
     def _mona_lisa_overdrive(self, target_node: cython.int) -> tuple[cnp.array[cython.bint], cython.bint, cython.bint]:
         result: cnp.ndarray[cython.bint]
+        cached = self._overdrive_cache.get(target_node)
+        if cached is not None:
+            return cached
         result = self._distances[target_node, :] != float('+inf')
-        return result, result.all(), result.any()
+        # Relabelling a tree can only ever turn its infinite labels finite, so only those trees can stale this entry
+        cached = (result, result.all(), result.any())
+        self._overdrive_cache.put(target_node, cached, ~result)
+        return cached
 
     @cython.ccall
     @cython.infer_types(True)
@@ -131,9 +190,8 @@ class ApproximateShortestPathForestUnified:
         tree_dex = list(range(self._num_trees))
         i: cython.int
         min_cost: cnp.ndarray[cython.float]
-        shelf: cython.tuple[cnp.ndarray[cython.int], cnp.ndarray[cython.float]]
         floatinf = float('+inf')
-        arcs: list[tuple[cnp.ndarray[cython.int], cnp.ndarray[cython.float], dict, cnp.ndarray[float]]] = self._graph._arcs
+        graph = self._graph
         weight: cython.float
         weight_sq: cython.float
         left: cython.int
@@ -144,20 +202,15 @@ class ApproximateShortestPathForestUnified:
         for _ in tree_dex:
             dropspecific.append([])
         for item in edges:
-            targdex: cython.int = -1
             left = item[0]
             right = item[1]
             leftdist = self._distances[left, :]
             rightdist = self._distances[right, :]
 
-            shelf = arcs[left]
-            for i in range(len(shelf[0])):
-                if shelf[0][i] == right:
-                    targdex = i
-                    break
-            if 0 > targdex:
+            raw_weight = graph.arc_weight(left, right)
+            if raw_weight is None:
                 raise ValueError("Selected target index out of range")
-            weight = shelf[1][targdex]
+            weight = raw_weight
             weight_sq = weight * weight
             # Given distance labels, L, on nodes u and v, assuming u's label being smaller,
             # and edge cost between u and v of d(u, v):
@@ -195,11 +248,12 @@ class ApproximateShortestPathForestUnified:
         # Now we have the nodes incident to edges that bust the (1+eps) approximation bound, feed them into restarted
         # dijkstra to update the approx-SP tree/forest.  Some nodes in dropnodes may well be SP descendants of others,
         # but it wasn't worth the time or complexity cost to filter them out here.
-        for i in tree_dex:
-            if 0 == len(dropspecific[i]):
-                continue
+        relabelled = [i for i in tree_dex if 0 < len(dropspecific[i])]
+        self._bound_cache.invalidate(relabelled)
+        self._overdrive_cache.invalidate(relabelled)
+        for i in relabelled:
             self._distances[:, i], _, self._max_labels[:, i], _ = dijkstra_core(
-                                                                  arcs,
+                                                                  graph.csr,
                                                                   self._distances[:, i],
                                                                   self._divisor,
                                                                   dropspecific[i],
@@ -221,6 +275,9 @@ class ApproximateShortestPathForestUnified:
         self._distances = np.append(self._distances, result, 1)
         self._max_labels = np.append(self._distances, maxresult, 1)
         self._num_trees += 1
+        # Every cached entry has just lost out on a tree
+        self._bound_cache.clear()
+        self._overdrive_cache.clear()
 
     def _get_sources(self, graph, source, sources):
         seeds = None
@@ -258,6 +315,26 @@ class ApproximateShortestPathForestUnified:
     def lighten_edge(self, u, v, weight) -> None:
         self._graph.lighten_edge(u, v, weight)
 
+    def move_distances(self, distances) -> None:
+        """
+        Copy the distance labels into distances, an array of the same shape, and keep them there from now on - eg so
+        they can live in a shared memory block
+        """
+        distances[:, :] = self._distances
+        self._distances = distances
+        self._bound_cache.clear()
+        self._overdrive_cache.clear()
+
+    def restore_labels(self, distances, max_labels) -> None:
+        """
+        Overwrite the distance and max labels with those saved from a forest over the same graph and seeds - eg when
+        resuming from a checkpoint
+        """
+        self._distances[:, :] = distances
+        self._max_labels[:, :] = max_labels
+        self._bound_cache.clear()
+        self._overdrive_cache.clear()
+
     @property
     def num_trees(self) -> int:
         return self._num_trees
@@ -266,6 +343,14 @@ class ApproximateShortestPathForestUnified:
     def distances(self) -> cnp.ndarray:
         return self._distances
 
+    @property
+    def max_labels(self) -> cnp.ndarray:
+        return self._max_labels
+
+    @property
+    def bound_cache(self) -> BoundCache:
+        return self._bound_cache
+
     @property
     def graph(self) -> object:
         return self._graph
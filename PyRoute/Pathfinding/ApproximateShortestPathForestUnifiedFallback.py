@@ -3,11 +3,11 @@ Created on Sep 15, 2024
 
 @author: CyberiaResurrection
 """
-import functools
 from typing import Any
 
 import numpy as np
 from PyRoute.Star import Star
+from PyRoute.Pathfinding.BoundCache import BoundCache
 from PyRoute.Pathfinding.DistanceGraph import DistanceGraph
 from PyRoute.Pathfinding.single_source_dijkstra import implicit_shortest_path_dijkstra_distance_graph
 
@@ -16,7 +16,8 @@ float64max = np.finfo(np.float64).max
 
 class ApproximateShortestPathForestUnified:
 
-    def __init__(self, source, graph, epsilon, sources=None, use_distances: bool = False):
+    def __init__(self, source, graph, epsilon, sources=None, use_distances: bool = False, cache=None,
+                 bound_cache_size: int = 64):
         seeds, source, num_trees = self._get_sources(graph, source, sources)
         self._graph = DistanceGraph(graph, use_distances)
         self._source = source
@@ -27,9 +28,21 @@ class ApproximateShortestPathForestUnified:
         self._seeds = seeds
         self._num_trees = num_trees
         self._graph_len = len(self._graph)
+        # Lower-bound vectors towards recent targets, and which trees are finite at those targets
+        self._bound_cache = BoundCache(bound_cache_size)
+        self._overdrive_cache = BoundCache(bound_cache_size)
         self._distances = np.ones((self._graph_len, self._num_trees), order='F') * float('+inf')    # pragma: no mutate
         self._max_labels = np.ones((self._graph_len, self._num_trees)) * float('+inf')  # pragma: no mutate
 
+        key = None
+        if cache is not None:
+            key = cache.key(self._graph, self._seeds, self._divisor)
+            cached = cache.load(key, (self._graph_len, self._num_trees))
+            if cached is not None:
+                self._distances = np.asarray(cached[0])
+                self._max_labels = np.asarray(cached[1])
+                return
+
         min_cost = self._graph.min_cost(self._source, True)  # pragma: no mutate
         # spin up initial distances
         for i in range(self._num_trees):
@@ -37,6 +50,9 @@ class ApproximateShortestPathForestUnified:
             self._distances[raw_seeds, i] = 0
             self._distances[:, i], self._max_labels[:, i], _ = self._dijkstra(self._distances[:, i], None, min_cost, raw_seeds)
 
+        if cache is not None:
+            cache.save(key, self._distances, self._max_labels)
+
     def lower_bound(self, source, target) -> float:
         raw = np.abs(self._distances[source, :] - self._distances[target, :])
         raw = raw[np.isfinite(raw)]
@@ -45,6 +61,9 @@ class ApproximateShortestPathForestUnified:
         return np.max(raw)
 
     def lower_bound_bulk(self, target_node: int) -> np.ndarray:
+        cached = self._bound_cache.get(target_node)
+        if cached is not None:
+            return cached
         overdrive, fastpath, anypath = self._mona_lisa_overdrive(target_node)
 
         if fastpath:  # Fastpath - all overdrive elements are _finite_, so all rows are retrieved
@@ -58,6 +77,29 @@ class ApproximateShortestPathForestUnified:
 
             raw = actives - target
 
+        result = np.max(np.abs(raw), axis=1)
+        self._bound_cache.put(target_node, result, overdrive)
+        return result
+
+    def select_landmarks(self, source: int, target: int, count: int) -> np.ndarray:
+        """
+        Return the (sorted) columns of the count landmarks giving the tightest lower bounds between source and target,
+        skipping any landmark that can't reach both of them.
+        """
+        raw = np.abs(self._distances[source, :] - self._distances[target, :])
+        raw[~np.isfinite(raw)] = -1
+        if count >= self._num_trees:
+            return np.flatnonzero(0 <= raw)
+        columns = np.argpartition(-raw, count - 1)[:count]
+        return np.sort(columns[0 <= raw[columns]])
+
+    def lower_bound_bulk_columns(self, target_node: int, columns: np.ndarray) -> np.ndarray:
+        """
+        Lower bounds from every node to target_node, like lower_bound_bulk, over only the landmarks in columns
+        """
+        if 0 == len(columns):
+            return np.zeros(self._graph_len)
+        raw = self._distances[:, columns] - self._distances[target_node, columns]
         return np.max(np.abs(raw), axis=1)
 
     def triangle_upbound(self, source: int, target: int) -> float:
@@ -70,10 +112,15 @@ class ApproximateShortestPathForestUnified:
         return np.min(raw) * (1 + self._epsilon)
 
     #  Gratuitous William Gibson reference is gratuitous.
-    @functools.cache
     def _mona_lisa_overdrive(self, target_node: int):
+        cached = self._overdrive_cache.get(target_node)
+        if cached is not None:
+            return cached
         result = self._distances[target_node, :] != float('+inf')
-        return result, result.all(), result.any()
+        # Relabelling a tree can only ever turn its infinite labels finite, so only those trees can stale this entry
+        cached = (result, result.all(), result.any())
+        self._overdrive_cache.put(target_node, cached, ~result)
+        return cached
 
     def update_edges(self, edges: list[tuple[int, int]]) -> None:
         dropnodes = False  # pragma: no mutate
@@ -81,26 +128,19 @@ class ApproximateShortestPathForestUnified:
         tree_dex = np.array(list(range(self._num_trees)))
         i: int
         min_cost: np.ndarray[float]
-        shelf: tuple[np.ndarray[int], np.ndarray[float]]
 
         for _ in range(self._num_trees):
             dropspecific.append(set())
         for item in edges:
-            targdex: int = None  # deliberately invalid target index to trip an IndexError as fall-back  # pragma: no mutate
             left = item[0]
             right = item[1]
             leftdist = self._distances[left, :].copy()
             rightdist = self._distances[right, :].copy()
             leftdist[np.isinf(leftdist)] = 0  # pragma: no mutate
             rightdist[np.isinf(rightdist)] = 0  # pragma: no mutate
-            shelf = self._graph._arcs[left]
-            for i in range(len(shelf[0])):
-                if shelf[0][i] == right:
-                    targdex = i
-                    break
-            if not isinstance(targdex, int):
+            weight = self._graph.arc_weight(left, right)
+            if weight is None:
                 raise ValueError("Selected target index out of range")
-            weight = shelf[1][targdex]
             delta = abs(leftdist - rightdist)
             # Given distance labels, L, on nodes u and v, assuming u's label being smaller,
             # and edge cost between u and v of d(u, v):
@@ -131,9 +171,10 @@ class ApproximateShortestPathForestUnified:
         # Now we have the nodes incident to edges that bust the (1+eps) approximation bound, feed them into restarted
         # dijkstra to update the approx-SP tree/forest.  Some nodes in dropnodes may well be SP descendants of others,
         # but it wasn't worth the time or complexity cost to filter them out here.
-        for i in range(self._num_trees):
-            if 0 == len(dropspecific[i]):  # pragma: no mutate
-                continue
+        relabelled = [i for i in range(self._num_trees) if 0 < len(dropspecific[i])]  # pragma: no mutate
+        self._bound_cache.invalidate(relabelled)
+        self._overdrive_cache.invalidate(relabelled)
+        for i in relabelled:
             self._distances[:, i], self._max_labels[:, i], _ = self._dijkstra(self._distances[:, i], self._max_labels[:, i], min_cost, dropspecific[i])
 
     def expand_forest(self, nu_seeds) -> None:
@@ -148,6 +189,9 @@ class ApproximateShortestPathForestUnified:
         self._distances = np.append(self._distances, result, 1)
         self._max_labels = np.append(self._max_labels, maxresult, 1)
         self._num_trees += 1
+        # Every cached entry has just lost out on a tree
+        self._bound_cache.clear()
+        self._overdrive_cache.clear()
 
     def _dijkstra(self, distances, max_labels, min_cost, seeds):
         assert isinstance(distances, np.ndarray)
@@ -203,6 +247,26 @@ class ApproximateShortestPathForestUnified:
     def lighten_edge(self, u, v, weight) -> None:
         self._graph.lighten_edge(u, v, weight)
 
+    def move_distances(self, distances) -> None:
+        """
+        Copy the distance labels into distances, an array of the same shape, and keep them there from now on - eg so
+        they can live in a shared memory block
+        """
+        distances[:, :] = self._distances
+        self._distances = distances
+        self._bound_cache.clear()
+        self._overdrive_cache.clear()
+
+    def restore_labels(self, distances, max_labels) -> None:
+        """
+        Overwrite the distance and max labels with those saved from a forest over the same graph and seeds - eg when
+        resuming from a checkpoint
+        """
+        self._distances[:, :] = distances
+        self._max_labels[:, :] = max_labels
+        self._bound_cache.clear()
+        self._overdrive_cache.clear()
+
     @property
     def num_trees(self) -> int:
         return self._num_trees
@@ -211,6 +275,14 @@ class ApproximateShortestPathForestUnified:
     def distances(self) -> np.ndarray:
         return self._distances
 
+    @property
+    def max_labels(self) -> np.ndarray:
+        return self._max_labels
+
+    @property
+    def bound_cache(self) -> BoundCache:
+        return self._bound_cache
+
     @property
     def graph(self) -> DistanceGraph:
         return self._graph
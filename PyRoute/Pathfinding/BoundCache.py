@@ -0,0 +1,87 @@
+"""
+Created on Oct 18, 2026
+"""
+import contextlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+
+
+class BoundCache(object):
+    """
+    Bounded least-recently-used store of per-target values - eg lower-bound vectors - each tagged with the landmark
+    trees it was calculated from.  When update_edges relabels some trees, only the entries depending on those trees go
+    stale, so bounds towards popular targets outlive updates to unrelated trees.
+
+    Relabelling happens far more often than lookups of any one target, so it only bumps the relabelled trees' version
+    counters - an entry is checked against the versions it was stored under when it's next looked up.
+
+    Cached values are handed back as-is, so callers must not modify them.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._versions = np.zeros(0, dtype=np.int64)
+        self._entries: OrderedDict[int, tuple[Any, np.ndarray, np.ndarray]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, target: int) -> Optional[Any]:
+        """
+        Return the value stored for target, or None if there isn't a current one
+        """
+        if 0 >= self.maxsize:
+            return None
+        entry = self._entries.get(target)
+        if entry is not None and not np.array_equal(self._versions[entry[1]], entry[2]):
+            del self._entries[target]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(target)
+        return entry[0]
+
+    def put(self, target: int, value: Any, trees: np.ndarray) -> None:
+        """
+        Store value for target, where trees is a boolean mask of the landmark trees value was calculated from
+        """
+        if 0 >= self.maxsize:
+            return
+        if len(self._versions) < len(trees):
+            self._versions = np.concatenate((self._versions, np.zeros(len(trees) - len(self._versions),
+                                                                      dtype=np.int64)))
+        trees = np.flatnonzero(trees)
+        self._entries[target] = (value, trees, self._versions[trees])
+        self._entries.move_to_end(target)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, trees: list[int]) -> None:
+        """
+        Mark every entry calculated from any of the given landmark trees as stale
+        """
+        # Nothing stored can depend on a tree past the end of the version counters
+        trees = [item for item in trees if item < len(self._versions)]
+        self._versions[trees] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @contextlib.contextmanager
+    def disabled(self):  # noqa: ANN201
+        """
+        Empty the cache, and neither store nor serve values for the duration of the context
+        """
+        self.clear()
+        old_size = self.maxsize
+        self.maxsize = 0
+        try:
+            yield
+        finally:
+            self.maxsize = old_size
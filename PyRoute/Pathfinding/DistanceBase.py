@@ -3,11 +3,18 @@ Created on Feb 25, 2024
 
 @author: CyberiaResurrection
 """
+from typing import Optional
+
 import numpy as np
 from networkx.classes import Graph
 
 
 class DistanceBase:
+    """
+    Arcs are held in compressed-sparse-row form - row u's neighbours and arc weights are the slices
+    _row_starts[u]:_row_ends[u] of the contiguous _indices and _weights arrays.  _arc_pos maps each (u, v) arc, keyed as
+    u * len(self) + v, to its offset within row u, so single arcs can be found without scanning the row.
+    """
 
     def __init__(self, graph: Graph):
         raw_nodes = graph.nodes()
@@ -20,6 +27,11 @@ class DistanceBase:
         self._positions = np.zeros((num_nodes, 2), dtype=int)
         for i in range(num_nodes):
             self._positions[i, :] = np.array(positions[i])
+        self._row_starts = np.zeros(num_nodes, dtype=np.int64)
+        self._row_ends = np.zeros(num_nodes, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._weights = np.zeros(0, dtype=float)
+        self._arc_pos: dict[int, int] = {}
 
     def __len__(self) -> int:
         return len(self._nodes)
@@ -27,6 +39,44 @@ class DistanceBase:
     def lighten_edge(self, u: int, v: int, weight: float) -> None:
         raise NotImplementedError("Base Class")
 
+    def move_weights(self, weights: np.ndarray) -> None:
+        """
+        Copy the arc weights into weights, an array of the same length, and keep them there from now on - eg so they
+        can live in a shared memory block
+        """
+        weights[:] = self._weights
+        self._weights = weights
+
+    def neighbours(self, u: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return views of u's neighbour nodes and the weights of the arcs to them
+        """
+        start = self._row_starts[u]
+        end = self._row_ends[u]
+        return self._indices[start:end], self._weights[start:end]
+
+    def arc_weight(self, u: int, v: int) -> Optional[float]:
+        """
+        Return the weight of the arc from u to v, or None if there's no such arc
+        """
+        offset = self._arc_pos.get(self._arc_key(u, v))
+        if offset is None:
+            return None
+        return float(self._weights[self._row_starts[u] + offset])
+
+    def path_arcs(self, path: list[int]) -> np.ndarray:
+        """
+        Return the offsets into the weights array of each arc along path, in path order
+        """
+        arcs = np.zeros(max(0, len(path) - 1), dtype=np.int64)
+        for i in range(len(arcs)):
+            u = path[i]
+            offset = self._arc_pos.get(self._arc_key(u, path[i + 1]))
+            if offset is None:
+                raise ValueError("No arc between " + str(u) + " and " + str(path[i + 1]))
+            arcs[i] = self._row_starts[u] + offset
+        return arcs
+
     def distances_from_target(self, active_nodes, target: int) -> int:
         if len(active_nodes) == len(self):
             dq = self._positions[:, 0] - self._positions[target, 0]
@@ -37,5 +87,10 @@ class DistanceBase:
 
         return (abs(dq) + abs(dr) + abs(dq + dr)) // 2
 
+    def _arc_key(self, u: int, v: int) -> int:
+        return u * len(self._nodes) + v
+
     def _lighten_arc(self, u: int, v: int, weight: float) -> None:
-        self._arcs[u][1][self._arcs[u][0] == v] = weight
+        offset = self._arc_pos.get(self._arc_key(u, v))
+        if offset is not None:
+            self._weights[self._row_starts[u] + offset] = weight
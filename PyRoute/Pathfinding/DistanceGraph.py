@@ -6,6 +6,7 @@ Created on Sep 23, 2023
 Thanks to @GamesByDavidE for original prototype and design discussions
 """
 import copy
+import itertools
 
 import numpy as np
 from networkx.classes import Graph
@@ -15,32 +16,45 @@ from PyRoute.Pathfinding.DistanceBase import DistanceBase
 
 class DistanceGraph(DistanceBase):
 
-    __slots__ = '_arcs', '_positions', '_nodes', '_indexes', '_min_cost', '_min_indirect'
+    __slots__ = '_indptr', '_indices', '_weights', '_arc_pos', '_row_starts', '_row_ends', '_positions', '_nodes',\
+        '_indexes', '_min_cost', '_min_indirect'
 
     def __init__(self, graph: Graph, use_distances: bool = False):
         super().__init__(graph)
         inline = 'distance' if use_distances else 'weight'
-        outline = 'weight' if use_distances else 'distance'
-
-        self._arcs = [
-            (
-                np.array(graph.adj[u], dtype=int),
-                np.array([data[inline] for data in list(graph.adj[u].values())], dtype=float),
-                {v: k for (k, v) in enumerate(list(graph.adj[u].keys()))},
-                np.array([data[outline] for data in list(graph.adj[u].values())], dtype=float)
-            )
-            for u in self._nodes
-        ]
-        self._min_cost = np.zeros(len(self._nodes))
-        self._min_indirect = np.zeros(len(self._nodes))
-        for i in range(0, len(self._nodes)):
-            node_edges = self._arcs[i][1]
-            if 0 < len(node_edges):
-                self._min_cost[i] = min(node_edges)
-        for i in range(0, len(self._nodes)):
-            node_neighbours = self._arcs[i][0]
-            if 0 < len(node_neighbours):
-                self._min_indirect[i] = min(self._min_cost[node_neighbours])
+        num_nodes = len(self._nodes)
+
+        # Rows are packed end-to-end, so row u runs from _indptr[u] up to _indptr[u + 1]
+        degrees = np.array([len(graph.adj[u]) for u in self._nodes], dtype=np.int64)
+        self._indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(degrees, out=self._indptr[1:])
+        num_arcs = int(self._indptr[-1])
+        self._row_starts = self._indptr[:-1]
+        self._row_ends = self._indptr[1:]
+        self._indices = np.fromiter(itertools.chain.from_iterable(graph.adj[u] for u in self._nodes), dtype=np.int64,
+                                    count=num_arcs)
+        self._weights = np.fromiter((data[inline] for u in self._nodes for data in graph.adj[u].values()), dtype=float,
+                                    count=num_arcs)
+        self._arc_pos = {}
+        for i in range(num_nodes):
+            row = i * num_nodes
+            for k, v in enumerate(self._indices[self._indptr[i]:self._indptr[i + 1]].tolist()):
+                self._arc_pos[row + v] = k
+
+        self._min_cost = np.zeros(num_nodes)
+        self._min_indirect = np.zeros(num_nodes)
+        occupied = 0 < degrees
+        if occupied.any():
+            starts = self._indptr[:-1][occupied]
+            self._min_cost[occupied] = np.minimum.reduceat(self._weights, starts)
+            self._min_indirect[occupied] = np.minimum.reduceat(self._min_cost[self._indices], starts)
+
+    @property
+    def csr(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Row pointer, neighbour index and arc weight arrays, in the form the pathfinding cores consume
+        """
+        return self._indptr, self._indices, self._weights
 
     def min_cost(self, target: int, indirect: bool = False) -> np.ndarray:
         if not isinstance(target, int):
@@ -52,7 +66,7 @@ class DistanceGraph(DistanceBase):
             return min_cost
 
         min_indirect = copy.deepcopy(self._min_indirect)
-        neighbours = self._arcs[target][0]  # Skip neighbours of target and target itself in the indirect leg
+        neighbours, _ = self.neighbours(target)  # Skip neighbours of target and target itself in the indirect leg
         min_indirect[target] = 0
         min_indirect[neighbours] = 0
 
@@ -61,7 +75,7 @@ class DistanceGraph(DistanceBase):
         return min_cost
 
     def lighten_edge(self, u: int, v: int, weight: float) -> None:
-        if v not in self._arcs[u][2]:
+        if self._arc_key(u, v) not in self._arc_pos:
             assert False
         self._lighten_arc(u, v, weight)
         self._lighten_arc(v, u, weight)
@@ -70,5 +84,7 @@ class DistanceGraph(DistanceBase):
         if weight < self._min_cost[v]:
             self._min_cost[v] = weight
 
-        self._min_indirect[self._arcs[u][0]] = np.fmin(self._min_indirect[self._arcs[u][0]], weight)
-        self._min_indirect[self._arcs[v][0]] = np.fmin(self._min_indirect[self._arcs[v][0]], weight)
+        u_neighbours, _ = self.neighbours(u)
+        v_neighbours, _ = self.neighbours(v)
+        self._min_indirect[u_neighbours] = np.fmin(self._min_indirect[u_neighbours], weight)
+        self._min_indirect[v_neighbours] = np.fmin(self._min_indirect[v_neighbours], weight)
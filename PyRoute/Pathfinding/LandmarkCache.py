@@ -0,0 +1,89 @@
+"""
+Created on Oct 18, 2026
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+
+class LandmarkCache(object):
+    """
+    On-disk store of the initial distance-label and max-label matrices of approximate shortest path forests, so
+    unchanged galaxies don't have to re-run a full Dijkstra per landmark on every run.
+
+    Entries are keyed by a hash of everything the initial labels depend on - the star graph's topology and arc weights,
+    the landmark seeds and the forest's divisor.  Any change to those gives a different key, so stale entries are
+    never read back, merely left behind.
+
+    Matrices are read back memory-mapped copy-on-write, so pages are only loaded as they are touched, and later label
+    updates stay in memory without writing back to the cache.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.logger = logging.getLogger('PyRoute.LandmarkCache')
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(graph, seeds: list, divisor: float) -> str:
+        """
+        Return the cache key for forest labels over graph, a DistanceGraph, grown from seeds with the given divisor
+        """
+        indptr, indices, weights = graph.csr
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(indptr, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(indices, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(weights, dtype=np.float64).tobytes())
+        for item in seeds:
+            raw_seeds = item if isinstance(item, list) else list(item.values())
+            digest.update(np.array(raw_seeds, dtype=np.int64).tobytes())
+            digest.update(b'|')
+        digest.update(np.float64(divisor).tobytes())
+        return digest.hexdigest()
+
+    def load(self, key: str, shape: tuple[int, int]) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        Return the (distances, max labels) pair stored under key, or None if there's no usable entry of the given shape
+        """
+        dist_file, label_file = self._filenames(key)
+        try:
+            distances = np.load(dist_file, mmap_mode='c')
+            max_labels = np.load(label_file, mmap_mode='c')
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if distances.shape != shape or max_labels.shape != shape:
+            self.logger.warning("Landmark cache entry {} has wrong-shaped matrices, ignoring".format(key))
+            self.misses += 1
+            return None
+        self.hits += 1
+        return distances, max_labels
+
+    def save(self, key: str, distances: np.ndarray, max_labels: np.ndarray) -> None:
+        """
+        Store distances and max_labels under key.  Failures to write are logged and otherwise ignored, as the
+        cache is only ever an optimisation.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for (filename, matrix) in zip(self._filenames(key), (distances, max_labels)):
+                # Write to a scratch file and move it into place, so concurrent readers never see a partial entry
+                handle, scratch = tempfile.mkstemp(dir=self.cache_dir, suffix='.npy')
+                try:
+                    with os.fdopen(handle, 'wb') as f:
+                        np.save(f, matrix)
+                    os.replace(scratch, filename)
+                finally:
+                    if os.path.exists(scratch):
+                        os.remove(scratch)
+        except OSError as e:
+            self.logger.warning("Unable to write landmark cache entry {}: {}".format(key, e))
+
+    def _filenames(self, key: str) -> tuple[str, str]:
+        return (os.path.join(self.cache_dir, key + '-distances.npy'),
+                os.path.join(self.cache_dir, key + '-max-labels.npy'))
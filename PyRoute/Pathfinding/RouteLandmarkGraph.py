@@ -10,17 +10,25 @@ from PyRoute.Pathfinding.DistanceBase import DistanceBase
 
 
 class RouteLandmarkGraph(DistanceBase):
+    """
+    Historic-route arcs arrive one at a time, so each row gets spare capacity.  When a row fills up, it's moved to the
+    end of the arc arrays with double its previous capacity, and the arc arrays themselves double in size when they
+    run out of room, which keeps the cost of adding an arc amortised constant.
+    """
+
+    min_row_capacity = 4
 
     def __init__(self, graph):
         super().__init__(graph)
-        self._arcs = [
-            (np.array([], dtype=int), np.array([], dtype=float), dict())
-            for u in self._nodes
-        ]
+        self._capacity = np.zeros(len(self._nodes), dtype=np.int64)
+        self._indices = np.zeros(self.min_row_capacity * len(self._nodes), dtype=np.int64)
+        self._weights = np.zeros(self.min_row_capacity * len(self._nodes), dtype=float)
+        self._tail = 0
 
     def __getitem__(self, item):
         self._check_index(item)
-        return self._arcs[item]
+        neighbours, weights = self.neighbours(item)
+        return neighbours, weights, {v: k for (k, v) in enumerate(neighbours.tolist())}
 
     def add_edge(self, u, v, weight) -> None:
         self._check_index(u)
@@ -29,15 +37,40 @@ class RouteLandmarkGraph(DistanceBase):
         self._extend_arc(v, u, weight)
 
     def _extend_arc(self, u, v, weight):
-        arcs = self._arcs[u]
-        u_dict = arcs[2]
-        if v not in u_dict:
-            u_dict[v] = len(u_dict)
-            u_first = np.append(arcs[0], [v], 0)
-            u_last = np.append(arcs[1], [weight], 0)
-            self._arcs[u] = (u_first, u_last, u_dict)
-        else:
+        key = self._arc_key(u, v)
+        if key in self._arc_pos:
             self._lighten_arc(u, v, weight)
+            return
+
+        start = int(self._row_starts[u])
+        end = int(self._row_ends[u])
+        if end - start == self._capacity[u]:
+            start, end = self._grow_row(u)
+        self._indices[end] = v
+        self._weights[end] = weight
+        self._arc_pos[key] = end - start
+        self._row_ends[u] = end + 1
+
+    def _grow_row(self, u) -> tuple[int, int]:
+        start = int(self._row_starts[u])
+        end = int(self._row_ends[u])
+        capacity = max(self.min_row_capacity, 2 * int(self._capacity[u]))
+        needed = self._tail + capacity
+        if needed > len(self._indices):
+            size = max(needed, 2 * len(self._indices))
+            self._indices = np.resize(self._indices, size)
+            self._weights = np.resize(self._weights, size)
+
+        # Rows never move backwards, so the old row's slots can't overlap the new row's slots
+        nu_start = self._tail
+        nu_end = nu_start + end - start
+        self._indices[nu_start:nu_end] = self._indices[start:end]
+        self._weights[nu_start:nu_end] = self._weights[start:end]
+        self._row_starts[u] = nu_start
+        self._row_ends[u] = nu_end
+        self._capacity[u] = capacity
+        self._tail = needed
+        return nu_start, nu_end
 
     @functools.cache
     def _check_index(self, item):
@@ -51,3 +84,19 @@ class RouteLandmarkGraph(DistanceBase):
     def lighten_edge(self, u, v, weight) -> None:
         self._lighten_arc(u, v, weight)
         self._lighten_arc(v, u, weight)
+
+    def arcs(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the tail, head and weight of every arc, row by row, each row in the order its arcs arrived
+        """
+        rows = [np.arange(self._row_starts[u], self._row_ends[u]) for u in range(len(self))]
+        slots = np.concatenate(rows) if 0 < len(rows) else np.zeros(0, dtype=np.int64)
+        tails = np.repeat(np.arange(len(self), dtype=np.int64), self._row_ends - self._row_starts)
+        return tails, self._indices[slots], self._weights[slots]
+
+    def add_arcs(self, tails: np.ndarray, heads: np.ndarray, weights: np.ndarray) -> None:
+        """
+        Add arcs in the form arcs() returns them - unlike add_edge, each arc only goes in one direction
+        """
+        for (u, v, weight) in zip(tails.tolist(), heads.tolist(), weights.tolist()):
+            self._extend_arc(u, v, weight)
@@ -74,12 +74,15 @@ def _calc_branching_factor(nodes_queued: cython.int, path_len: cython.int):
 @cython.wraparound(False)
 @cython.nonecheck(False)
 def astar_path_numpy(G, source: cython.int, target: cython.int, bulk_heuristic,
-                     upbound: cython.float = float64max, diagnostics: cython.bint = False) -> tuple[list, dict]:
-    G_succ: list[tuple[cnp.ndarray[cython.int], cnp.ndarray[cython.float]]]
+                     upbound: cython.float = float64max, diagnostics: cython.bint = False,
+                     explored_nodes: cython.bint = False) -> tuple[list, dict]:
+    indptr: cnp.ndarray[cython.long]
+    indices: cnp.ndarray[cython.long]
+    weights: cnp.ndarray[cython.float]
     potentials: cnp.ndarray[cython.float]
     upbound: cython.float
     distances: cnp.ndarray[cython.float]
-    G_succ = G._arcs  # For speed-up
+    indptr, indices, weights = G.csr  # For speed-up
 
     # pre-calc heuristics for all nodes to the target node
     potentials = bulk_heuristic(target)
@@ -87,9 +90,10 @@ def astar_path_numpy(G, source: cython.int, target: cython.int, bulk_heuristic,
         raise ValueError("Bulk heuristic function cannot be None")
 
     # Traces lowest distance from source node found for each node
-    distances = np.ones(len(G_succ), dtype=float) * upbound
+    distances = np.ones(len(G), dtype=float) * upbound
 
-    bestpath, diag = astar_numpy_core(G_succ, diagnostics, distances, potentials, source, target, upbound)
+    bestpath, diag = astar_numpy_core(indptr, indices, weights, diagnostics, distances, potentials, source, target,
+                                      upbound, explored_nodes)
 
     if 0 == len(bestpath):
         raise nx.NetworkXNoPath(f"Node {target} not reachable from {source}")
@@ -103,14 +107,18 @@ def astar_path_numpy(G, source: cython.int, target: cython.int, bulk_heuristic,
 @cython.nonecheck(False)
 @cython.wraparound(False)
 @cython.returns(tuple[list[cython.int], dict])
-def astar_numpy_core(G_succ: cython.list[cython.tuple[cnp.ndarray[cython.int], cnp.ndarray[cython.float]]], diagnostics: cython.bint,
+def astar_numpy_core(indptr: cnp.ndarray[cython.long], indices: cnp.ndarray[cython.long],
+                     weights: cnp.ndarray[cython.float], diagnostics: cython.bint,
                      distances: cnp.ndarray[cython.float], potentials: cnp.ndarray[cython.float], source: cython.int,
-                     target: cython.int, upbound: cython.float) -> tuple[list, dict]:
+                     target: cython.int, upbound: cython.float, explored_nodes: cython.bint) -> tuple[list, dict]:
     distances_view: cython.double[:] = distances
     distances_view[source] = 0.0
     potentials_view: cython.double[:] = potentials
-    active_nodes_view: cython.long[:]
-    active_costs_view: cython.double[:]
+    indptr_view: cython.long[:] = indptr
+    indices_view: cython.long[:] = indices
+    weights_view: cython.double[:] = weights
+    start: cython.long
+    end: cython.long
 
     node_counter: cython.int = 0
     queue_counter: cython.int = 0
@@ -164,6 +172,8 @@ def astar_numpy_core(G_succ: cython.list[cython.tuple[cnp.ndarray[cython.int], c
                            'num_jumps': len(path) - 1, 'nodes_revisited': revisited, 'neighbour_bound': neighbour_bound,
                            'new_upbounds': new_upbounds, 'g_exhausted': g_exhausted, 'f_exhausted': f_exhausted,
                            'un_exhausted': un_exhausted, 'targ_exhausted': targ_exhausted}
+            if explored_nodes:
+                diag['explored'] = list(explored)
             return path, diag
 
         if curnode in explored:
@@ -182,19 +192,17 @@ def astar_numpy_core(G_succ: cython.list[cython.tuple[cnp.ndarray[cython.int], c
 
         explored[curnode] = parent
 
-        active_nodes_view = G_succ[curnode][0]
-        active_costs_view = G_succ[curnode][1]
+        start = indptr_view[curnode]
+        end = indptr_view[curnode + 1]
 
         targdex = -1
 
-        num_nodes = len(active_nodes_view)
-
         # Now unconditionally queue _all_ nodes that are still active, worrying about filtering out the bound-busting
         # neighbours later.
         counter = 0
-        for i in range(num_nodes):
-            act_nod = active_nodes_view[i]
-            act_wt = dist + active_costs_view[i]
+        for i in range(start, end):
+            act_nod = indices_view[i]
+            act_wt = dist + weights_view[i]
             if target == act_nod:
                 targdex = i
             if act_wt > distances_view[act_nod]:
@@ -218,3 +226,392 @@ def astar_numpy_core(G_succ: cython.list[cython.tuple[cnp.ndarray[cython.int], c
             queue_counter += counter
 
     return path, diag
+
+
+@cython.ccall
+@cython.boundscheck(False)
+@cython.initializedcheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def astar_path_numpy_bidirectional(G, source: cython.int, target: cython.int, bulk_heuristic,
+                                   upbound: cython.float = float64max,
+                                   diagnostics: cython.bint = False) -> tuple[list, dict]:
+    """
+    Bidirectional counterpart to astar_path_numpy.  The forward search runs from source and the backward search from
+    target, using the consistent average potentials p_f(v) = (pi_t(v) - pi_s(v)) / 2 and p_r(v) = -p_f(v), where pi_t
+    and pi_s are the bulk heuristic lower bounds towards target and source respectively.  As the potentials sum to zero,
+    the searches stop once the sum of their minimum queue keys reaches the best complete path found so far.
+
+    As with astar_path_numpy, any node whose lower-bounded path cost busts the supplied upper bound is pruned.
+    """
+    indptr: cnp.ndarray[cython.long]
+    indices: cnp.ndarray[cython.long]
+    weights: cnp.ndarray[cython.float]
+    pot_target: cnp.ndarray[cython.float]
+    pot_source: cnp.ndarray[cython.float]
+    indptr, indices, weights = G.csr  # For speed-up
+
+    # pre-calc heuristics for all nodes to both the target and source nodes
+    pot_target = bulk_heuristic(target)
+    pot_source = bulk_heuristic(source)
+    if pot_target is None or pot_source is None:
+        raise ValueError("Bulk heuristic function cannot be None")
+
+    if source == target:
+        return [source], {}
+
+    bestpath, diag = bidirectional_numpy_core(indptr, indices, weights, diagnostics, pot_target, pot_source, source,
+                                              target, upbound)
+
+    if 0 == len(bestpath):
+        raise nx.NetworkXNoPath(f"Node {target} not reachable from {source}")
+    return bestpath, diag
+
+
+@cython.cfunc
+@cython.infer_types(True)
+@cython.boundscheck(False)
+@cython.initializedcheck(False)
+@cython.nonecheck(False)
+@cython.wraparound(False)
+@cython.returns(tuple[list[cython.int], dict])
+def bidirectional_numpy_core(indptr: cnp.ndarray[cython.long], indices: cnp.ndarray[cython.long],
+                             weights: cnp.ndarray[cython.float], diagnostics: cython.bint,
+                             pot_target: cnp.ndarray[cython.float], pot_source: cnp.ndarray[cython.float],
+                             source: cython.int, target: cython.int, upbound: cython.float) -> tuple[list, dict]:
+    num_nodes: cython.int = len(indptr) - 1
+    # Row 0 of each 2-D array is the forward search from source, row 1 the backward search from target.
+    distances: cnp.ndarray[cython.float] = np.ones((2, num_nodes), dtype=float) * float('inf')
+    parents: cnp.ndarray[cython.long] = np.ones((2, num_nodes), dtype=np.int64) * ROOT_NODE
+    explored: cnp.ndarray[cython.long] = np.zeros((2, num_nodes), dtype=np.int64)
+    potentials: cnp.ndarray[cython.float] = np.zeros((2, num_nodes), dtype=float)
+    lower_bounds: cnp.ndarray[cython.float] = np.zeros((2, num_nodes), dtype=float)
+    # Nodes with infinite bounds towards _both_ ends can't be on any source-target path, so zero out their potentials
+    with np.errstate(invalid='ignore'):
+        potentials[0, :] = np.nan_to_num(0.5 * (pot_target - pot_source), nan=0.0, posinf=float('inf'),
+                                         neginf=-float('inf'))
+    potentials[1, :] = -potentials[0, :]
+    lower_bounds[0, :] = pot_target
+    lower_bounds[1, :] = pot_source
+
+    distances_view: cython.double[:, :] = distances
+    parents_view: cython.long[:, :] = parents
+    explored_view: cython.long[:, :] = explored
+    potentials_view: cython.double[:, :] = potentials
+    lower_bounds_view: cython.double[:, :] = lower_bounds
+    indptr_view: cython.long[:] = indptr
+    indices_view: cython.long[:] = indices
+    weights_view: cython.double[:] = weights
+    fwd_root: cython.int = source
+    bwd_root: cython.int = target
+    distances_view[0, source] = 0.0
+    distances_view[1, target] = 0.0
+
+    node_counter: cython.int = 0
+    queue_counter: cython.int = 0
+    revisited: cython.int = 0
+    g_exhausted: cython.int = 0
+    f_exhausted: cython.int = 0
+    new_upbounds: cython.int = 0
+    targ_exhausted: cython.int = 0
+    revis_continue: cython.int = 0
+    path: cython.list[cython.int] = []
+    diag = {}
+
+    side: cython.int
+    other: cython.int
+    root: cython.int
+    other_root: cython.int
+    act_nod: cython.int
+    act_wt: cython.float
+    bound_wt: cython.float
+    dist: cython.float
+    curnode: cython.int
+    start: cython.long
+    end: cython.long
+    g_counter: cython.int
+    counter: cython.int
+    root_seen: cython.bint
+    best: cython.float = float('inf')
+    meet: cython.int = ROOT_NODE
+    node: cython.int
+
+    forward: MinMaxHeap[astar_t] = MinMaxHeap[astar_t]()
+    backward: MinMaxHeap[astar_t] = MinMaxHeap[astar_t]()
+    queue: cython.pointer(MinMaxHeap[astar_t])
+    forward.insert({'augment': potentials_view[0, source], 'dist': 0.0, 'curnode': source, 'parent': ROOT_NODE})
+    backward.insert({'augment': potentials_view[1, target], 'dist': 0.0, 'curnode': target, 'parent': ROOT_NODE})
+
+    while 0 < forward.size() and 0 < backward.size():
+        if forward.peekmin().augment + backward.peekmin().augment >= best:
+            break
+        # Expand whichever search has the smaller frontier
+        if forward.size() <= backward.size():
+            side = 0
+            root = fwd_root
+            other_root = bwd_root
+            queue = cython.address(forward)
+        else:
+            side = 1
+            root = bwd_root
+            other_root = fwd_root
+            queue = cython.address(backward)
+        other = 1 - side
+
+        result = queue.popmin()
+        dist = result.dist
+        curnode = result.curnode
+        node_counter += 1
+
+        if 0 != explored_view[side, curnode]:
+            revisited += 1
+            # Do not override the parent of a root node, and skip bad paths enqueued before finding a better one
+            if curnode == root or distances_view[side, curnode] < dist:
+                continue
+            revis_continue += 1
+        explored_view[side, curnode] = 1
+
+        start = indptr_view[curnode]
+        end = indptr_view[curnode + 1]
+        g_counter = 0
+        counter = 0
+        root_seen = False
+
+        for i in range(start, end):
+            act_nod = indices_view[i]
+            act_wt = dist + weights_view[i]
+            if act_nod == other_root:
+                root_seen = True
+            if act_wt >= distances_view[side, act_nod]:
+                continue
+            g_counter += 1
+            # Drop neighbours that can't be on a path beating either the supplied upper bound or the best path found
+            bound_wt = act_wt + lower_bounds_view[side, act_nod]
+            if bound_wt > upbound or bound_wt >= best:
+                continue
+            distances_view[side, act_nod] = act_wt
+            parents_view[side, act_nod] = curnode
+            queue.insert({'augment': act_wt + potentials_view[side, act_nod], 'dist': act_wt, 'curnode': act_nod,
+                          'parent': curnode})
+            counter += 1
+            # Check for the two searches meeting over this neighbour
+            if act_wt + distances_view[other, act_nod] < best:
+                best = act_wt + distances_view[other, act_nod]
+                meet = act_nod
+                new_upbounds += 1
+
+        if 0 == g_counter:
+            if root_seen:
+                targ_exhausted += 1
+            else:
+                g_exhausted += 1
+        elif 0 == counter:
+            f_exhausted += 1
+        else:
+            queue_counter += counter
+
+    if ROOT_NODE == meet:
+        return path, diag
+
+    path.append(meet)
+    node = parents_view[0, meet]
+    while node != ROOT_NODE:
+        assert node not in path, "Node " + str(node) + " duplicated in discovered path"
+        path.append(node)
+        node = parents_view[0, node]
+    path.reverse()
+    node = parents_view[1, meet]
+    while node != ROOT_NODE:
+        assert node not in path, "Node " + str(node) + " duplicated in discovered path"
+        path.append(node)
+        node = parents_view[1, node]
+
+    if diagnostics is not True:
+        return path, diag
+    branch = _calc_branching_factor(queue_counter, len(path) - 1)
+    neighbour_bound = node_counter + revis_continue - revisited
+    un_exhausted = neighbour_bound - f_exhausted - g_exhausted - targ_exhausted
+    diag = {'nodes_expanded': node_counter, 'nodes_queued': queue_counter, 'branch_factor': branch,
+            'num_jumps': len(path) - 1, 'nodes_revisited': revisited, 'neighbour_bound': neighbour_bound,
+            'new_upbounds': new_upbounds, 'g_exhausted': g_exhausted, 'f_exhausted': f_exhausted,
+            'un_exhausted': un_exhausted, 'targ_exhausted': targ_exhausted}
+    return path, diag
+
+
+@cython.ccall
+@cython.boundscheck(False)
+@cython.initializedcheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def astar_path_numpy_multi(G, source: cython.int, targets, bulk_heuristic, upbounds=None,
+                           diagnostics: cython.bint = False) -> tuple[dict, dict, dict]:
+    """
+    One-to-many variant of astar_path_numpy, settling every node in targets from source in a single expansion.
+        The potential on each node is the minimum of the per-target bulk heuristics - as each per-target heuristic is
+            a lower bound on distance to its own target, their minimum lower-bounds distance to the nearest
+            remaining target
+        Each target carries its own upper bound.  Candidates are pruned against the largest upper bound among
+            targets still to be settled, and that bound shrinks as targets get settled
+        Targets whose best-found path cost busts their own upper bound are reported as unreachable, just as
+            astar_path_numpy would raise NetworkXNoPath for them
+
+    Returns a tuple of (paths, costs, diagnostics), where paths and costs are keyed by target index and only
+    contain targets that were reached within their respective upper bounds.
+    """
+    indptr: cnp.ndarray[cython.long]
+    indices: cnp.ndarray[cython.long]
+    weights: cnp.ndarray[cython.float]
+    potentials: cnp.ndarray[cython.float]
+    bounds: cnp.ndarray[cython.float]
+    targets = list(dict.fromkeys(targets))
+    if 0 == len(targets):
+        return {}, {}, {}
+    upbounds = [float64max] * len(targets) if upbounds is None else list(upbounds)
+    if len(targets) != len(upbounds):
+        raise ValueError("Must supply exactly one upper bound per target")
+
+    indptr, indices, weights = G.csr  # For speed-up
+
+    # pre-calc heuristics for all nodes to the nearest target node
+    raw_potentials = []
+    for target in targets:
+        item = bulk_heuristic(target)
+        if item is None:
+            raise ValueError("Bulk heuristic function cannot be None")
+        raw_potentials.append(item)
+    potentials = np.min(raw_potentials, axis=0)
+
+    # Per-node upper bound for targets still to be settled, negative for everything else
+    bounds = np.ones(len(G), dtype=float) * -1.0
+    bounds[targets] = upbounds
+
+    paths, costs, counters = multi_numpy_core(indptr, indices, weights, potentials, bounds, source, targets)
+
+    diag = {}
+    if diagnostics is True:
+        diag = _multi_diagnostics(paths, len(targets), *counters)
+
+    return paths, costs, diag
+
+
+@cython.cfunc
+@cython.infer_types(True)
+@cython.boundscheck(False)
+@cython.initializedcheck(False)
+@cython.nonecheck(False)
+@cython.wraparound(False)
+@cython.returns(tuple[dict, dict, tuple])
+def multi_numpy_core(indptr: cnp.ndarray[cython.long], indices: cnp.ndarray[cython.long],
+                     weights: cnp.ndarray[cython.float], potentials: cnp.ndarray[cython.float],
+                     bounds: cnp.ndarray[cython.float], source: cython.int, targets: list) -> tuple[dict, dict, tuple]:
+    num_nodes: cython.int = len(indptr) - 1
+    distances: cnp.ndarray[cython.float] = np.ones(num_nodes, dtype=float) * float('inf')
+    parents: cnp.ndarray[cython.long] = np.ones(num_nodes, dtype=np.int64) * ROOT_NODE
+    explored: cnp.ndarray[cython.long] = np.zeros(num_nodes, dtype=np.int64)
+    distances_view: cython.double[:] = distances
+    distances_view[source] = 0.0
+    parents_view: cython.long[:] = parents
+    explored_view: cython.long[:] = explored
+    potentials_view: cython.double[:] = potentials
+    bounds_view: cython.double[:] = bounds
+    indptr_view: cython.long[:] = indptr
+    indices_view: cython.long[:] = indices
+    weights_view: cython.double[:] = weights
+    start: cython.long
+    end: cython.long
+
+    node_counter: cython.int = 0
+    queue_counter: cython.int = 0
+    revisited: cython.int = 0
+    g_exhausted: cython.int = 0
+    new_upbounds: cython.int = 0
+    revis_continue: cython.int = 0
+    remaining: cython.int = len(targets)
+    paths: cython.dict = {}
+    costs: cython.dict = {}
+
+    act_nod: cython.int
+    act_wt: cython.float
+    aug_wt: cython.float
+    limit: cython.float = max(bounds[targets])
+    dist: cython.float
+    curnode: cython.int
+    node: cython.int
+    counter: cython.int
+
+    # The queue stores priority, cost to reach, node, and parent.
+    # Comparisons are handled by astar_t directly.
+    queue: MinMaxHeap[astar_t] = MinMaxHeap[astar_t]()
+    queue.insert({'augment': potentials_view[source], 'dist': 0.0, 'curnode': source, 'parent': ROOT_NODE})
+
+    while 0 < queue.size() and 0 < remaining:
+        result = queue.popmin()
+        if result.augment > limit:
+            break
+        dist = result.dist
+        curnode = result.curnode
+        node_counter += 1
+
+        if 1 == explored_view[curnode]:
+            revisited += 1
+            # Do not override the parent of starting node, and skip bad paths enqueued before finding a better one
+            if curnode == source or distances_view[curnode] < dist:
+                continue
+            revis_continue += 1
+        explored_view[curnode] = 1
+        parents_view[curnode] = result.parent
+
+        if 0.0 <= bounds_view[curnode]:
+            if dist <= bounds_view[curnode]:
+                path: cython.list[cython.int] = [curnode]
+                node = result.parent
+                while node != ROOT_NODE:
+                    assert node not in path, "Node " + str(node) + " duplicated in discovered path"
+                    path.append(node)
+                    node = parents_view[node]
+                path.reverse()
+                paths[curnode] = path
+                costs[curnode] = dist
+            bounds_view[curnode] = -1.0
+            remaining -= 1
+            if 0 == remaining:
+                break
+            limit = max(bounds[targets])
+            new_upbounds += 1
+
+        start = indptr_view[curnode]
+        end = indptr_view[curnode + 1]
+
+        counter = 0
+        for i in range(start, end):
+            act_nod = indices_view[i]
+            act_wt = dist + weights_view[i]
+            if act_wt >= distances_view[act_nod]:
+                continue
+            aug_wt = act_wt + potentials_view[act_nod]
+            if aug_wt > limit:
+                continue
+            distances_view[act_nod] = act_wt
+            queue.insert({'augment': aug_wt, 'dist': act_wt, 'curnode': act_nod, 'parent': curnode})
+            counter += 1
+
+        if 0 == counter:
+            g_exhausted += 1
+        else:
+            queue_counter += counter
+
+    return paths, costs, (node_counter, queue_counter, revisited, revis_continue, g_exhausted, new_upbounds)
+
+
+def _multi_diagnostics(paths, num_targets, node_counter, queue_counter, revisited, revis_continue, g_exhausted,
+                       new_upbounds) -> dict:
+    # Same keys as astar_path_numpy reports, plus how many targets were settled and missed, so one-to-many searches
+    # can be folded into the same pathfinding summary
+    num_jumps = max([len(path) - 1 for path in paths.values()], default=0)
+    branch = _calc_branching_factor(queue_counter, num_jumps) if 0 < num_jumps else 1.0
+    neighbour_bound = node_counter - 1 + revis_continue - revisited
+    un_exhausted = neighbour_bound - g_exhausted
+    return {'nodes_expanded': node_counter, 'nodes_queued': queue_counter, 'branch_factor': branch,
+            'num_jumps': num_jumps, 'nodes_revisited': revisited, 'neighbour_bound': neighbour_bound,
+            'new_upbounds': new_upbounds, 'g_exhausted': g_exhausted, 'f_exhausted': 0, 'un_exhausted': un_exhausted,
+            'targ_exhausted': 0, 'targets_settled': len(paths), 'targets_missed': num_targets - len(paths)}
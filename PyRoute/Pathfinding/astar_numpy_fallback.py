@@ -15,15 +15,27 @@ Compared to the ancestral networkx version of astar_path, this code:
         When a new upper bound is found, discards queue entries whose f-values bust the new upper bound
         When a _longer_ path is found to a previously-queued node, discards queue entries whose g-values bust
             the corresponding node's distance label
+    In astar_path_numpy, the queue is a min-max heap - f-value busts are peeled off its max end, and g-value busts are
+    discarded as they're popped, so neither needs a pass over the whole queue
 
 """
 import math
-from heapq import heappop, heappush, heapify
+from heapq import heappop, heappush
+from typing import Optional
 
 import networkx as nx
 import numpy as np
+try:
+    from PyRoute.Pathfinding.minmaxheap import AStarOpenList
+except ModuleNotFoundError:
+    from PyRoute.Pathfinding.minmaxheap_fallback import AStarOpenList
+except ImportError:
+    from PyRoute.Pathfinding.minmaxheap_fallback import AStarOpenList
+except AttributeError:
+    from PyRoute.Pathfinding.minmaxheap_fallback import AStarOpenList
 
 float64max = np.finfo(np.float64).max
+ROOT_NODE = -1
 
 
 def _calc_branching_factor(nodes_queued, path_len):
@@ -59,9 +71,10 @@ def _calc_branching_factor(nodes_queued, path_len):
     return round(new, 3)
 
 
-def astar_path_numpy(G, source, target, bulk_heuristic, min_cost=None, upbound=float64max, diagnostics=False) -> tuple[list, dict]:
+def astar_path_numpy(G, source, target, bulk_heuristic, min_cost=None, upbound=float64max, diagnostics=False,
+                     explored_nodes=False) -> tuple[list, dict]:
 
-    G_succ = G._arcs  # For speed-up
+    indptr, indices, weights = G.csr  # For speed-up
 
     # pre-calc heuristics for all nodes to the target node
     potentials = bulk_heuristic(target)
@@ -69,9 +82,8 @@ def astar_path_numpy(G, source, target, bulk_heuristic, min_cost=None, upbound=f
         raise ValueError("Bulk heuristic function cannot be None")
 
     # The queue stores priority, cost to reach, node,  and parent.
-    # Uses Python heapq to keep in priority order.
-    # The nodes themselves, being integers, are directly comparable.
-    queue = [(potentials[source], 0, source, None)]
+    queue = AStarOpenList()
+    queue.push(potentials[source], 0, source, ROOT_NODE)
 
     # Maps explored nodes to parent closest to the source.
     explored = {}
@@ -100,15 +112,18 @@ def astar_path_numpy(G, source, target, bulk_heuristic, min_cost=None, upbound=f
     targ_exhausted = 0
     revis_continue = 0
 
-    while queue:
+    while 0 < len(queue):
         # Pop the smallest item from queue.
-        _, dist, curnode, parent = heappop(queue)
+        _, dist, curnode, parent = queue.pop()
+        # Discard entries whose g-value has been busted since they were queued
+        if dist > upper_limit[curnode]:
+            continue
         node_counter += 1
 
         if curnode == target:
             path = [curnode]
             node = parent
-            while node is not None:
+            while node != ROOT_NODE:
                 assert node not in path, "Node " + str(node) + " duplicated in discovered path"
                 path.append(node)
                 node = explored[node]
@@ -122,19 +137,19 @@ def astar_path_numpy(G, source, target, bulk_heuristic, min_cost=None, upbound=f
                            'num_jumps': len(path) - 1, 'nodes_revisited': revisited, 'neighbour_bound': neighbour_bound,
                            'new_upbounds': new_upbounds, 'g_exhausted': g_exhausted, 'f_exhausted': f_exhausted,
                            'un_exhausted': un_exhausted, 'targ_exhausted': targ_exhausted}
+            if explored_nodes:
+                diagnostics['explored'] = list(explored)
             return path, diagnostics
 
         if curnode in explored:
             revisited += 1
             # Do not override the parent of starting node
-            if explored[curnode] is None:
+            if explored[curnode] == ROOT_NODE:
                 continue
 
             # Skip bad paths that were enqueued before finding a better one
             qcost = distances[curnode]
             if qcost <= dist:
-                queue = [item for item in queue if not (item[1] > distances[item[2]])]
-                heapify(queue)
                 continue
             # If we've found a better path, update
             revis_continue += 1
@@ -142,9 +157,10 @@ def astar_path_numpy(G, source, target, bulk_heuristic, min_cost=None, upbound=f
 
         explored[curnode] = parent
 
-        raw_nodes = G_succ[curnode]
-        active_nodes = raw_nodes[0]
-        active_weights = dist + raw_nodes[1]
+        start = indptr[curnode]
+        end = indptr[curnode + 1]
+        active_nodes = indices[start:end]
+        active_weights = dist + weights[start:end]
         augmented_weights = active_weights + potentials[active_nodes]
 
         # Even if we have the target node as a candidate neighbour, of itself, that's _no_ guarantee that the target
@@ -167,19 +183,10 @@ def astar_path_numpy(G, source, target, bulk_heuristic, min_cost=None, upbound=f
             distances[target] = ncost
             up_threshold = upbound - min_cost
             upper_limit = np.minimum(upper_limit, up_threshold)
-            if 0 < len(queue):
-                queue = [item for item in queue if item[0] < upbound]
-                if 0 < len(queue):
-                    # While we're taking a brush-hook to queue, rip out items whose dist value exceeds enqueued value
-                    # or is too close to upbound
-                    queue = [item for item in queue if item[1] <= upper_limit[item[2]]]
-                    # Finally, dedupe the queue after cleaning all bound-busts out and 2 or more elements are left.
-                    # Empty or single-element sets cannot require deduplication, and are already heaps themselves.
-                    if 1 < len(queue):
-                        queue = list(set(queue))
-                        heapify(queue)
-            # heappush(queue, (ncost + 0, ncost, target, curnode))
-            heappush(queue, (ncost, ncost, target, curnode))
+            # Entries busting the new upper bound are all at the max end of the queue.  Entries whose dist value
+            # now exceeds their node's upper limit are discarded as they're popped.
+            queue.prune(upbound)
+            queue.push(ncost, ncost, target, curnode)
             queue_counter += 1
             #  If target node is only active node, and is neighbour node of only active queue element, bail out now
             #  and dodge the now-known-to-be-pointless neighbourhood bookkeeping.
@@ -207,23 +214,268 @@ def astar_path_numpy(G, source, target, bulk_heuristic, min_cost=None, upbound=f
         num_nodes = len(active_nodes)
 
         queue_counter += num_nodes
-
-        if 1 == num_nodes:
-            heappush(queue, (augmented_weights[0], active_weights[0], active_nodes[0], curnode))
-        elif 2 == num_nodes:
-            heappush(queue, (augmented_weights[0], active_weights[0], active_nodes[0], curnode))
-            heappush(queue, (augmented_weights[1], active_weights[1], active_nodes[1], curnode))
-        elif 3 == num_nodes:
-            heappush(queue, (augmented_weights[0], active_weights[0], active_nodes[0], curnode))
-            heappush(queue, (augmented_weights[1], active_weights[1], active_nodes[1], curnode))
-            heappush(queue, (augmented_weights[2], active_weights[2], active_nodes[2], curnode))
-        elif 4 == num_nodes:
-            heappush(queue, (augmented_weights[0], active_weights[0], active_nodes[0], curnode))
-            heappush(queue, (augmented_weights[1], active_weights[1], active_nodes[1], curnode))
-            heappush(queue, (augmented_weights[2], active_weights[2], active_nodes[2], curnode))
-            heappush(queue, (augmented_weights[3], active_weights[3], active_nodes[3], curnode))
-        else:
-            for i in range(num_nodes):
-                heappush(queue, (augmented_weights[i], active_weights[i], active_nodes[i], curnode))
+        queue.push_bulk(augmented_weights, active_weights, active_nodes, curnode)
 
     raise nx.NetworkXNoPath(f"Node {target} not reachable from {source}")
+
+
+def astar_path_numpy_bidirectional(G, source, target, bulk_heuristic, min_cost=None, upbound=float64max,
+                                   diagnostics=False) -> tuple[list, dict]:
+    """
+    Bidirectional counterpart to astar_path_numpy.  The forward search runs from source and the backward search from
+    target, using the consistent average potentials p_f(v) = (pi_t(v) - pi_s(v)) / 2 and p_r(v) = -p_f(v), where pi_t
+    and pi_s are the bulk heuristic lower bounds towards target and source respectively.  As the potentials sum to zero,
+    the searches stop once the sum of their minimum queue keys reaches the best complete path found so far.
+
+    As with astar_path_numpy, any node whose lower-bounded path cost busts the supplied upper bound is pruned.
+    """
+    indptr, indices, weights = G.csr  # For speed-up
+
+    # pre-calc heuristics for all nodes to both the target and source nodes
+    pot_target = bulk_heuristic(target)
+    pot_source = bulk_heuristic(source)
+    if pot_target is None or pot_source is None:
+        raise ValueError("Bulk heuristic function cannot be None")
+
+    floatinf = float('inf')
+    upbound = floatinf if upbound is None else upbound
+    assert upbound != floatinf, "Supplied upbound must not be infinite"
+
+    if source == target:
+        return [source], {}
+
+    # Nodes with infinite bounds towards _both_ ends can't be on any source-target path, so zero out their potentials
+    with np.errstate(invalid='ignore'):
+        forward_potentials = np.nan_to_num(0.5 * (pot_target - pot_source), nan=0.0, posinf=float('inf'),
+                                           neginf=-float('inf'))
+    # Index 0 is the forward search from source, index 1 the backward search from target.
+    potentials = [forward_potentials, -forward_potentials]
+    lower_bounds = [pot_target, pot_source]
+    roots = [source, target]
+    queues = [[(forward_potentials[source], 0, source, -1)], [(-forward_potentials[target], 0, target, -1)]]
+    distances = [np.ones(len(G)) * floatinf, np.ones(len(G)) * floatinf]
+    distances[0][source] = 0
+    distances[1][target] = 0
+    parents = [np.ones(len(G), dtype=int) * -1, np.ones(len(G), dtype=int) * -1]
+    explored: list[dict[int, int]] = [{}, {}]
+
+    # Cost of the best complete path found so far, and the node at which its two halves meet
+    best = floatinf
+    meet = -1
+
+    node_counter = 0
+    queue_counter = 0
+    revisited = 0
+    g_exhausted = 0
+    f_exhausted = 0
+    new_upbounds = 0
+    targ_exhausted = 0
+    revis_continue = 0
+
+    while queues[0] and queues[1]:
+        if queues[0][0][0] + queues[1][0][0] >= best:
+            break
+        # Expand whichever search has the smaller frontier
+        side = 0 if len(queues[0]) <= len(queues[1]) else 1
+        other = 1 - side
+        _, dist, curnode, parent = heappop(queues[side])
+        node_counter += 1
+
+        if curnode in explored[side]:
+            revisited += 1
+            # Do not override the parent of a root node, and skip bad paths enqueued before finding a better one
+            if explored[side][curnode] == -1 or distances[side][curnode] < dist:
+                continue
+            revis_continue += 1
+        explored[side][curnode] = parent
+
+        start = indptr[curnode]
+        end = indptr[curnode + 1]
+        active_nodes = indices[start:end]
+        active_weights = dist + weights[start:end]
+
+        keep = active_weights < distances[side][active_nodes]
+        if not keep.any():
+            if roots[other] in active_nodes:
+                targ_exhausted += 1
+            else:
+                g_exhausted += 1
+            continue
+        active_nodes = active_nodes[keep]
+        active_weights = active_weights[keep]
+
+        # Drop neighbours that can't be on a path beating either the supplied upper bound or the best path found so far
+        bounded_weights = active_weights + lower_bounds[side][active_nodes]
+        keep = np.logical_and(bounded_weights <= upbound, bounded_weights < best)
+        if not keep.any():
+            f_exhausted += 1
+            continue
+        active_nodes = active_nodes[keep]
+        active_weights = active_weights[keep]
+
+        distances[side][active_nodes] = active_weights
+        parents[side][active_nodes] = curnode
+        num_nodes = len(active_nodes)
+        queue_counter += num_nodes
+
+        # Check for the two searches meeting over any of the surviving neighbours
+        through = active_weights + distances[other][active_nodes]
+        mindex = np.argmin(through)
+        if through[mindex] < best:
+            best = through[mindex]
+            meet = active_nodes[mindex]
+            new_upbounds += 1
+
+        augmented_weights = active_weights + potentials[side][active_nodes]
+        for i in range(num_nodes):
+            heappush(queues[side], (augmented_weights[i], active_weights[i], active_nodes[i], curnode))
+
+    if -1 == meet:
+        raise nx.NetworkXNoPath(f"Node {target} not reachable from {source}")
+
+    path = [meet]
+    node = parents[0][meet]
+    while node != -1:
+        assert node not in path, "Node " + str(node) + " duplicated in discovered path"
+        path.append(node)
+        node = parents[0][node]
+    path.reverse()
+    node = parents[1][meet]
+    while node != -1:
+        assert node not in path, "Node " + str(node) + " duplicated in discovered path"
+        path.append(node)
+        node = parents[1][node]
+    path = [int(item) for item in path]
+
+    if diagnostics is not True:
+        return path, {}
+    branch = _calc_branching_factor(queue_counter, len(path) - 1)
+    neighbour_bound = node_counter + revis_continue - revisited
+    un_exhausted = neighbour_bound - f_exhausted - g_exhausted - targ_exhausted
+    diagnostics = {'nodes_expanded': node_counter, 'nodes_queued': queue_counter, 'branch_factor': branch,
+                   'num_jumps': len(path) - 1, 'nodes_revisited': revisited, 'neighbour_bound': neighbour_bound,
+                   'new_upbounds': new_upbounds, 'g_exhausted': g_exhausted, 'f_exhausted': f_exhausted,
+                   'un_exhausted': un_exhausted, 'targ_exhausted': targ_exhausted}
+    return path, diagnostics
+
+
+def astar_path_numpy_multi(G, source, targets, bulk_heuristic, upbounds=None, diagnostics=False) -> tuple[dict, dict, dict]:
+    """
+    One-to-many variant of astar_path_numpy, settling every node in targets from source in a single expansion.
+        The potential on each node is the minimum of the per-target bulk heuristics - as each per-target heuristic is
+            a lower bound on distance to its own target, their minimum lower-bounds distance to the nearest
+            remaining target
+        Each target carries its own upper bound.  Candidates are pruned against the largest upper bound among
+            targets still to be settled, and that bound shrinks as targets get settled
+        Targets whose best-found path cost busts their own upper bound are reported as unreachable, just as
+            astar_path_numpy would raise NetworkXNoPath for them
+
+    Returns a tuple of (paths, costs, diagnostics), where paths and costs are keyed by target index and only
+    contain targets that were reached within their respective upper bounds.
+    """
+    targets = list(dict.fromkeys(targets))
+    if 0 == len(targets):
+        return {}, {}, {}
+    upbounds = [float64max] * len(targets) if upbounds is None else list(upbounds)
+    if len(targets) != len(upbounds):
+        raise ValueError("Must supply exactly one upper bound per target")
+
+    indptr, indices, weights = G.csr  # For speed-up
+
+    # pre-calc heuristics for all nodes to the nearest target node
+    raw_potentials = [bulk_heuristic(target) for target in targets]
+    if any(item is None for item in raw_potentials):
+        raise ValueError("Bulk heuristic function cannot be None")
+    potentials = np.min(raw_potentials, axis=0)
+
+    bounds = dict(zip(targets, upbounds))
+    remaining = set(targets)
+    limit = max(bounds.values())
+
+    # The queue stores priority, cost to reach, node,  and parent.
+    queue = [(potentials[source], 0.0, source, None)]
+
+    # Maps explored nodes to parent closest to the source.
+    explored: dict[int, Optional[int]] = {}
+    distances = np.ones(len(G)) * float('inf')
+    distances[source] = 0
+
+    paths = {}
+    costs = {}
+    node_counter = 0
+    queue_counter = 0
+    revisited = 0
+    g_exhausted = 0
+    new_upbounds = 0
+    revis_continue = 0
+
+    while queue and remaining:
+        aug, dist, curnode, parent = heappop(queue)
+        if aug > limit:
+            break
+        node_counter += 1
+
+        if curnode in explored:
+            revisited += 1
+            # Do not override the parent of starting node, and skip bad paths enqueued before finding a better one
+            if explored[curnode] is None or distances[curnode] < dist:
+                continue
+            revis_continue += 1
+        explored[curnode] = parent
+
+        if curnode in remaining:
+            remaining.discard(curnode)
+            if dist <= bounds[curnode]:
+                path = [curnode]
+                node = parent
+                while node is not None:
+                    assert node not in path, "Node " + str(node) + " duplicated in discovered path"
+                    path.append(node)
+                    node = explored[node]
+                path.reverse()
+                paths[curnode] = path
+                costs[curnode] = dist
+            if 0 == len(remaining):
+                break
+            limit = max(bounds[item] for item in remaining)
+            new_upbounds += 1
+
+        start = indptr[curnode]
+        end = indptr[curnode + 1]
+        active_nodes = indices[start:end]
+        active_weights = dist + weights[start:end]
+        augmented_weights = active_weights + potentials[active_nodes]
+
+        keep = np.logical_and(active_weights < distances[active_nodes], augmented_weights <= limit)
+        active_nodes = active_nodes[keep]
+        if 0 == len(active_nodes):
+            g_exhausted += 1
+            continue
+        active_weights = active_weights[keep]
+        augmented_weights = augmented_weights[keep]
+        distances[active_nodes] = active_weights
+        queue_counter += len(active_nodes)
+
+        for i in range(len(active_nodes)):
+            heappush(queue, (augmented_weights[i], active_weights[i], active_nodes[i], curnode))
+
+    diag = {}
+    if diagnostics is True:
+        diag = _multi_diagnostics(paths, len(targets), node_counter, queue_counter, revisited, revis_continue,
+                                  g_exhausted, new_upbounds)
+
+    return paths, costs, diag
+
+
+def _multi_diagnostics(paths, num_targets, node_counter, queue_counter, revisited, revis_continue, g_exhausted,
+                       new_upbounds) -> dict:
+    # Same keys as astar_path_numpy reports, plus how many targets were settled and missed, so one-to-many searches
+    # can be folded into the same pathfinding summary
+    num_jumps = max([len(path) - 1 for path in paths.values()], default=0)
+    branch = _calc_branching_factor(queue_counter, num_jumps) if 0 < num_jumps else 1.0
+    neighbour_bound = node_counter - 1 + revis_continue - revisited
+    un_exhausted = neighbour_bound - g_exhausted
+    return {'nodes_expanded': node_counter, 'nodes_queued': queue_counter, 'branch_factor': branch,
+            'num_jumps': num_jumps, 'nodes_revisited': revisited, 'neighbour_bound': neighbour_bound,
+            'new_upbounds': new_upbounds, 'g_exhausted': g_exhausted, 'f_exhausted': 0, 'un_exhausted': un_exhausted,
+            'targ_exhausted': 0, 'targets_settled': len(paths), 'targets_missed': num_targets - len(paths)}
@@ -1,3 +1,48 @@
 # distutils: language = c++
 
 from minmaxheap cimport MinMaxHeap, dijkstra_t, astar_t
+
+
+cdef class AStarOpenList:
+    """
+    A* open list over the min-max heap, for Python-level pathfinders.  Entries are (augmented cost, cost to reach,
+    node, parent) - the root node's parent is -1.  Entries whose augmented cost busts a new upper bound sit at the
+    heap's max end, so prune() peels them off there, rather than rebuilding the whole heap.
+    """
+    cdef MinMaxHeap[astar_t] heap
+
+    def __len__(self):
+        return self.heap.size()
+
+    def push(self, double augment, double dist, int node, int parent):
+        cdef astar_t item
+        item.augment = augment
+        item.dist = dist
+        item.curnode = node
+        item.parent = parent
+        self.heap.insert(item)
+
+    def push_bulk(self, const double[:] augments, const double[:] dists, const long[:] nodes, int parent):
+        cdef astar_t item
+        cdef Py_ssize_t i
+        item.parent = parent
+        self.heap.reserve(self.heap.size() + nodes.shape[0])
+        for i in range(nodes.shape[0]):
+            item.augment = augments[i]
+            item.dist = dists[i]
+            item.curnode = nodes[i]
+            self.heap.insert(item)
+
+    def pop(self):
+        cdef astar_t item = self.heap.popmin()
+        return item.augment, item.dist, item.curnode, item.parent
+
+    def prune(self, double upbound):
+        """
+        Drop every entry whose augmented cost is upbound or more, returning how many were dropped
+        """
+        cdef int dropped = 0
+        while 0 < self.heap.size() and self.heap.peekmax().augment >= upbound:
+            self.heap.popmax()
+            dropped += 1
+        return dropped
@@ -0,0 +1,39 @@
+"""
+Created on Oct 18, 2026
+"""
+from heapq import heappop, heappush, heapify
+
+import numpy as np
+
+
+class AStarOpenList(object):
+    """
+    Pure-Python stand-in for the compiled minmaxheap.AStarOpenList, over heapq.  Without a max end to work from,
+    prune() has to filter the whole heap.
+    """
+
+    def __init__(self):
+        self.heap: list[tuple[float, float, int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, augment: float, dist: float, node: int, parent: int) -> None:
+        heappush(self.heap, (augment, dist, node, parent))
+
+    def push_bulk(self, augments: np.ndarray, dists: np.ndarray, nodes: np.ndarray, parent: int) -> None:
+        for item in zip(augments.tolist(), dists.tolist(), nodes.tolist()):
+            heappush(self.heap, (item[0], item[1], item[2], parent))
+
+    def pop(self) -> tuple[float, float, int, int]:
+        return heappop(self.heap)
+
+    def prune(self, upbound: float) -> int:
+        """
+        Drop every entry whose augmented cost is upbound or more, returning how many were dropped
+        """
+        old_len = len(self.heap)
+        self.heap = [item for item in self.heap if item[0] < upbound]
+        if len(self.heap) < old_len:
+            heapify(self.heap)
+        return old_len - len(self.heap)
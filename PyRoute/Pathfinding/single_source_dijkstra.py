@@ -52,6 +52,4 @@ def explicit_shortest_path_dijkstra_distance_graph(graph, source, distance_label
     min_cost = np.zeros(len(graph)) if min_cost is None else min_cost
     max_neighbour_labels = max_labels if max_labels is not None else np.ones(len(graph)) * float('+inf')  # pragma: no mutate
 
-    arcs = graph._arcs
-
-    return dijkstra_core(arcs, distance_labels, divisor, seeds, max_neighbour_labels, min_cost)
+    return dijkstra_core(graph.csr, distance_labels, divisor, seeds, max_neighbour_labels, min_cost)
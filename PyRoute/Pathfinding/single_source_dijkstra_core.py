@@ -20,8 +20,7 @@ ROOT_NODE: cython.const[cython.int] = -1
 @cython.initializedcheck(False)
 @cython.nonecheck(False)
 @cython.wraparound(False)
-def dijkstra_core(arcs: cython.list[cython.ctuple[cnp.ndarray[cython.int], cnp.ndarray[cython.float]]],
-                  distance_labels: cnp.ndarray[cython.float], divisor: cython.float,
+def dijkstra_core(csr: tuple, distance_labels: cnp.ndarray[cython.float], divisor: cython.float,
                   seeds: cython.list[cython.int],
                   max_neighbour_labels: cnp.ndarray[cython.float], min_cost: cnp.ndarray[cython.float]) -> tuple:
     if not isinstance(min_cost, cnp.ndarray):
@@ -33,19 +32,20 @@ def dijkstra_core(arcs: cython.list[cython.ctuple[cnp.ndarray[cython.int], cnp.n
     if not 0 < divisor <= 1.0:
         raise ValueError("divisor must be positive and <= 1.0")
 
-    neighbours: cython.ctuple[cnp.ndarray[cython.int], cnp.ndarray[cython.float]]
     act_wt: cython.float
     act_nod: cython.int
-    num_nodes: cython.size_t
     index: cython.size_t
+    start: cython.long
+    end: cython.long
+    indptr_view: cython.long[:] = csr[0]
+    indices_view: cython.long[:] = csr[1]
+    weights_view: cython.double[:] = csr[2]
     distance_labels_view: cython.double[:] = distance_labels
     max_neighbour_labels_view: cython.double[:] = max_neighbour_labels
     min_cost_view: cython.double[:] = min_cost
     # Using -100 to track "not considered during processing"
-    parents: cnp.ndarray[cython.int] = np.ones(len(arcs), dtype=np.int64) * -100
+    parents: cnp.ndarray[cython.int] = np.ones(len(indptr_view) - 1, dtype=np.int64) * -100
     parents_view: cython.long[:] = parents
-    active_nodes_view: cython.long[:]
-    active_costs_view: cython.double[:]
     tail: cython.int
     dist_tail: cython.float
     heap: MinMaxHeap[dijkstra_t]
@@ -84,17 +84,14 @@ def dijkstra_core(arcs: cython.list[cython.ctuple[cnp.ndarray[cython.int], cnp.n
         # the corresponding node's distance label at the other end of the candidate edge, trim that edge.  Such edges
         # cannot _possibly_ result in smaller distance labels.  By a similar argument, filter the remaining edges
         # when the sum of dist_tail and that edge's weight equals or exceeds the corresponding node's distance label.
-        neighbours = arcs[tail]
-        active_nodes_view = neighbours[0]
-        num_nodes = len(active_nodes_view)
-
-        active_costs_view = neighbours[1]
+        start = indptr_view[tail]
+        end = indptr_view[tail + 1]
         max_label = 0
 
         # update max_label while processing neighbours, as we've got the lid off anyway
-        for index in range(0, num_nodes):
-            act_nod = active_nodes_view[index]
-            act_cost = active_costs_view[index]
+        for index in range(start, end):
+            act_nod = indices_view[index]
+            act_cost = weights_view[index]
             if dist_tail + act_cost >= distance_labels_view[act_nod]:
                 if distance_labels_view[act_nod] > max_label:
                     max_label = distance_labels_view[act_nod]
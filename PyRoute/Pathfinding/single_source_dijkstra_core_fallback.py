@@ -7,7 +7,7 @@ import heapq
 import numpy as np
 
 
-def dijkstra_core(arcs, distance_labels, divisor, seeds, max_neighbour_labels, min_cost) -> tuple:
+def dijkstra_core(csr, distance_labels, divisor, seeds, max_neighbour_labels, min_cost) -> tuple:
     if not isinstance(min_cost, np.ndarray):
         raise ValueError("min_cost must be ndarray")
     if not isinstance(max_neighbour_labels, np.ndarray):
@@ -19,12 +19,13 @@ def dijkstra_core(arcs, distance_labels, divisor, seeds, max_neighbour_labels, m
     if not 0 < divisor <= 1.0:
         raise ValueError("divisor must be positive and <= 1.0")
 
-    heap = [(distance_labels[seed], seed) for seed in seeds if 0 < len(arcs[seed][0])]  # pragma: no mutate
+    indptr, indices, weights = csr
+    heap = [(distance_labels[seed], seed) for seed in seeds if indptr[seed] < indptr[seed + 1]]  # pragma: no mutate
     heapq.heapify(heap)
     diagnostics = {'nodes_processed': 0, 'nodes_queued': len(heap), 'nodes_exceeded': 0, 'nodes_min_exceeded': 0,
                    'nodes_tailed': 0}
 
-    parents = np.ones(len(arcs)) * -100  # Using -100 to track "not considered during processing"
+    parents = np.ones(len(indptr) - 1) * -100  # Using -100 to track "not considered during processing"
     parents[list(seeds)] = -1  # Using -1 to flag "root node of tree"
 
     while heap:
@@ -50,9 +51,11 @@ def dijkstra_core(arcs, distance_labels, divisor, seeds, max_neighbour_labels, m
         # the corresponding node's distance label at the other end of the candidate edge, trim that edge.  Such edges
         # cannot _possibly_ result in smaller distance labels.  By a similar argument, filter the remaining edges
         # when the sum of dist_tail and that edge's weight equals or exceeds the corresponding node's distance label.
-        neighbours = arcs[tail]
-        active_nodes = neighbours[0]
-        active_costs = neighbours[1]
+        start = indptr[tail]
+        end = indptr[tail + 1]
+        neighbours = indices[start:end]
+        active_nodes = neighbours
+        active_costs = weights[start:end]
         active_labels = distance_labels[active_nodes]
         # It's not worth (time wise) being cute and trying to break this up, forcing jumps in and out of numpy
         keep = active_costs < (active_labels - dist_tail)  # pragma: no mutate
@@ -69,7 +72,7 @@ def dijkstra_core(arcs, distance_labels, divisor, seeds, max_neighbour_labels, m
         parents[active_nodes] = tail
 
         # update max label _after_ neighbours are processed, to minimise the max_label as far as possible
-        max_neighbour_labels[tail] = max(distance_labels[neighbours[0]])
+        max_neighbour_labels[tail] = max(distance_labels[neighbours])
         diagnostics['nodes_queued'] += num_nodes
 
         if 1 == num_nodes:
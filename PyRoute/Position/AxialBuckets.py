@@ -0,0 +1,128 @@
+"""
+Created on Oct 18, 2026
+"""
+import numpy as np
+
+
+class AxialBuckets(object):
+    """
+    Bucket a set of axial (q, r) positions into square cells, cell_size hexes on a side, so that "every member within
+    radius of these query positions" only has to look at a handful of cells around each query, instead of every
+    member.
+
+    As the hex distance between two positions is never less than the larger of their absolute q and r differences,
+    any member within radius of a query lies at most ceil(radius / cell_size) cells away from the query's cell along
+    each axis.
+    """
+
+    # Upper limit on the number of (query, member) candidates materialised at once, to keep memory use bounded when
+    # radius is large relative to the member density
+    max_chunk = 4000000
+
+    def __init__(self, q, r, cell_size: int):
+        if 1 > cell_size:
+            raise ValueError("Cell size must be positive")
+        self._q = np.asarray(q, dtype=np.int64)
+        self._r = np.asarray(r, dtype=np.int64)
+        if self._q.shape != self._r.shape:
+            raise ValueError("q and r arrays must have the same shape")
+        self._cell = int(cell_size)
+
+        cq = self._q // self._cell
+        cr = self._r // self._cell
+        if 0 == len(self._q):
+            self._cq_min = self._cq_max = self._cr_min = self._cr_max = 0
+        else:
+            self._cq_min = int(cq.min())
+            self._cq_max = int(cq.max())
+            self._cr_min = int(cr.min())
+            self._cr_max = int(cr.max())
+        self._width = self._cr_max - self._cr_min + 1
+
+        keys = self._cell_key(cq, cr)
+        self._order = np.argsort(keys, kind='stable')
+        self._keys = keys[self._order]
+
+    def __len__(self) -> int:
+        return len(self._q)
+
+    @property
+    def cell_size(self) -> int:
+        return self._cell
+
+    def _cell_key(self, cq: np.ndarray, cr: np.ndarray) -> np.ndarray:
+        return (cq - self._cq_min) * self._width + (cr - self._cr_min)
+
+    def pairs_within(self, q, r, radius: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find every (query, member) combination no more than radius apart.
+
+        @param q: Query positions' q coordinates
+        @param r: Query positions' r coordinates
+        @param radius: Maximum hex distance, inclusive
+        @return: Tuple of query indexes, member indexes and the hex distances between them
+        """
+        q = np.asarray(q, dtype=np.int64)
+        r = np.asarray(r, dtype=np.int64)
+        empty = np.zeros(0, dtype=np.int64)
+        if 0 == len(self) or 0 == len(q) or 0 > radius:
+            return empty, empty, empty
+
+        span = -(-int(radius) // self._cell)
+        cq = q // self._cell
+        cr = r // self._cell
+
+        lefts = []
+        rights = []
+        dists = []
+        for dq in range(-span, span + 1):
+            tq = cq + dq
+            q_valid = (self._cq_min <= tq) & (tq <= self._cq_max)
+            for dr in range(-span, span + 1):
+                tr = cr + dr
+                query = np.flatnonzero(q_valid & (self._cr_min <= tr) & (tr <= self._cr_max))
+                if 0 == len(query):
+                    continue
+                keys = self._cell_key(tq[query], tr[query])
+                start = np.searchsorted(self._keys, keys, side='left')
+                counts = np.searchsorted(self._keys, keys, side='right') - start
+                occupied = 0 < counts
+                if not occupied.any():
+                    continue
+                query = query[occupied]
+                start = start[occupied]
+                counts = counts[occupied]
+
+                for left, right in self._expand(query, start, counts):
+                    dist = self._distance(q[left], r[left], self._q[right], self._r[right])
+                    close = dist <= radius
+                    lefts.append(left[close])
+                    rights.append(right[close])
+                    dists.append(dist[close])
+
+        if 0 == len(lefts):
+            return empty, empty, empty
+        return np.concatenate(lefts), np.concatenate(rights), np.concatenate(dists)
+
+    def _expand(self, query: np.ndarray, start: np.ndarray, counts: np.ndarray):  # noqa: ANN202
+        # Split the queries into runs that each generate no more than max_chunk candidates (a single query can bust
+        # that limit on its own, in which case it gets a run to itself)
+        ends = np.cumsum(counts)
+        first = 0
+        num_queries = len(query)
+        while first < num_queries:
+            base = ends[first] - counts[first]
+            last = max(first + 1, int(np.searchsorted(ends, base + self.max_chunk, side='right')))
+            run_counts = counts[first:last]
+            total = int(ends[last - 1] - base)
+            run_starts = np.cumsum(run_counts) - run_counts
+            left = np.repeat(query[first:last], run_counts)
+            positions = np.arange(total) - np.repeat(run_starts - start[first:last], run_counts)
+            yield left, self._order[positions]
+            first = last
+
+    @staticmethod
+    def _distance(q1: np.ndarray, r1: np.ndarray, q2: np.ndarray, r2: np.ndarray) -> np.ndarray:
+        dq = q1 - q2
+        dr = r1 - r2
+        return (np.abs(dq) + np.abs(dr) + np.abs(dq + dr)) // 2
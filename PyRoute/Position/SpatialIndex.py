@@ -0,0 +1,154 @@
+"""
+Created on Oct 18, 2026
+"""
+import functools
+from typing import Callable, Optional
+
+import numpy as np
+
+from PyRoute.Position.AxialBuckets import AxialBuckets
+from PyRoute.Position.Hex import Hex, HexPos
+
+
+class SpatialIndex(object):
+    """
+    Hex-grid index over a fixed list of stars, answering "which stars are near this one" questions without scanning
+    every star.  Stars are reported in the order they were supplied, so callers that used to scan that list in order
+    see the same ordering as before.
+    """
+
+    # Side length, in hexes, of the buckets the stars are hashed into
+    cell_size = 8
+
+    def __init__(self, stars: list):
+        self._stars = list(stars)
+        self._q = np.array([star.q for star in self._stars], dtype=np.int64)
+        self._r = np.array([star.r for star in self._stars], dtype=np.int64)
+        self._positions: dict[HexPos, int] = {}
+        for i, (q, r) in enumerate(zip(self._q.tolist(), self._r.tolist())):
+            self._positions.setdefault((q, r), i)
+        self._offsets = {id(star): i for (i, star) in enumerate(self._stars)}
+        self._buckets = AxialBuckets(self._q, self._r, self.cell_size)
+        # Single-position queries only touch a few cells, so look those up directly rather than going through the
+        # vectorised bucket search, whose set-up cost swamps the actual work for one query
+        self._cells: dict[HexPos, list[int]] = {}
+        for i, (q, r) in enumerate(zip(self._q.tolist(), self._r.tolist())):
+            self._cells.setdefault((q // self.cell_size, r // self.cell_size), []).append(i)
+        if 0 == len(self._stars):
+            self._extent = 0
+        else:
+            # Largest distance between any two indexed stars can't exceed the axis-aligned spread of q, r and q + r
+            s = self._q + self._r
+            self._extent = int(max(np.ptp(self._q), np.ptp(self._r), np.ptp(s)))
+
+    def __len__(self) -> int:
+        return len(self._stars)
+
+    def __contains__(self, star) -> bool:
+        return id(star) in self._offsets
+
+    @property
+    def stars(self) -> list:
+        return self._stars
+
+    def offset(self, star) -> int:
+        """
+        Position of the supplied star in the index's star list
+        """
+        return self._offsets[id(star)]
+
+    def at(self, q: int, r: int):  # noqa: ANN201
+        """
+        Return the star at axial position (q, r), or None if that hex is empty
+        """
+        i = self._positions.get((q, r))
+        return None if i is None else self._stars[i]
+
+    def within(self, star, radius: int) -> list:
+        """
+        Return every other indexed star no more than radius parsecs from star
+        """
+        return [self._stars[i] for i in self._within(star.q, star.r, radius)[0] if self._stars[i] is not star]
+
+    def _within(self, q: int, r: int, radius: int) -> tuple[np.ndarray, np.ndarray]:
+        empty = np.zeros(0, dtype=np.int64)
+        if 0 > radius:
+            return empty, empty
+        span = -(-radius // self.cell_size)
+        cq = q // self.cell_size
+        cr = r // self.cell_size
+        candidates: list[int] = []
+        for dq in range(-span, span + 1):
+            for dr in range(-span, span + 1):
+                members = self._cells.get((cq + dq, cr + dr))
+                if members is not None:
+                    candidates.extend(members)
+        if 0 == len(candidates):
+            return empty, empty
+        found = np.array(sorted(candidates), dtype=np.int64)
+        dq_arr = self._q[found] - q
+        dr_arr = self._r[found] - r
+        dist = (np.abs(dq_arr) + np.abs(dr_arr) + np.abs(dq_arr + dr_arr)) // 2
+        close = dist <= radius
+        return found[close], dist[close]
+
+    def nearest(self, star, predicate: Optional[Callable] = None, max_radius: Optional[int] = None,
+                tiebreak: Optional[Callable] = None) -> tuple:
+        """
+        Find the indexed star nearest to star (which can be star itself) satisfying predicate.
+
+        @param predicate: Filter applied to candidate stars, None to accept everything
+        @param max_radius: Furthest distance to search, None to search everything
+        @param tiebreak: Key function picking between candidates at the same distance - default is index order
+        @return: Tuple of nearest star and its distance, or (None, None) if nothing qualifies
+        """
+        limit = self._extent if max_radius is None else min(max_radius, self._extent)
+        q = star.q
+        r = star.r
+        radius = min(self.cell_size, limit)
+        while True:
+            found, dist = self._within(q, r, radius)
+            candidates = [(int(d), i) for (i, d) in zip(found.tolist(), dist.tolist())
+                          if predicate is None or predicate(self._stars[i])]
+            if 0 < len(candidates):
+                # Every star no more than radius away has been checked, so the closest candidate is the closest overall
+                min_dist = min(item[0] for item in candidates)
+                tied = [self._stars[i] for (d, i) in candidates if d == min_dist]
+                best = tied[0] if tiebreak is None else min(tied, key=tiebreak)
+                return best, min_dist
+            if radius >= limit:
+                return None, None
+            radius = min(2 * radius, limit)
+
+    def pairs_within(self, radius: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return every pair of indexed stars no more than radius apart, as index-order offset arrays (left < right) in
+        the same order itertools.combinations over the star list would produce them, plus their distances
+        """
+        left, right, dist = self._buckets.pairs_within(self._q, self._r, radius)
+        keep = left < right
+        left = left[keep]
+        right = right[keep]
+        dist = dist[keep]
+        order = np.lexsort((right, left))
+        return left[order], right[order], dist[order]
+
+    @staticmethod
+    def ring(cand_hex: HexPos, dist: int) -> list[HexPos]:
+        """
+        Return the hexes exactly dist away from cand_hex, walking the ring from its down-left corner, through each of
+        the six directions in turn
+        """
+        q, r = cand_hex
+        return [(q + dq, r + dr) for (dq, dr) in SpatialIndex._ring_offsets(dist)]
+
+    @staticmethod
+    @functools.cache
+    def _ring_offsets(dist: int) -> tuple[HexPos, ...]:
+        offsets = []
+        neighbour = Hex.get_neighbor((0, 0), 4, dist)
+        for direction in range(6):
+            for _ in range(dist):
+                offsets.append(neighbour)
+                neighbour = Hex.get_neighbor(neighbour, direction)
+        return tuple(offsets)
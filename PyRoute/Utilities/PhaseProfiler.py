@@ -0,0 +1,97 @@
+"""
+Created on Oct 18, 2026
+
+Per-phase resource usage of a route.py run - wall time, CPU time, peak resident set size and the top Python allocators
+of each phase, along with whatever counters the run records - so capacity can be planned and regressions pinned on the
+phase that caused them.
+"""
+import contextlib
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from typing import Any, Optional
+
+try:
+    import resource
+except ModuleNotFoundError:
+    resource = None  # type: ignore
+
+
+class PhaseProfiler(object):
+
+    def __init__(self, enabled: bool = True, top_allocators: int = 10):
+        self.logger = logging.getLogger('PyRoute.PhaseProfiler')
+        self.enabled = enabled
+        self.top_allocators = top_allocators
+        self.phases: list[dict[str, Any]] = []
+        self.counters: dict[str, int] = {}
+        # Leave tracemalloc be if someone else is already tracing
+        self._tracing = enabled and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):  # noqa: ANN201
+        """
+        Record the resources used by the body of the context as the phase called name.  Does nothing if the profiler
+        isn't enabled.
+        """
+        if not self.enabled:
+            yield
+            return
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            stats = after.compare_to(before, 'lineno')[:self.top_allocators]
+            self.phases.append({
+                'phase': name,
+                'wall_time': round(wall, 3),
+                'cpu_time': round(cpu, 3),
+                'peak_rss': self.peak_rss(),
+                'traced_current': current,
+                'traced_peak': peak,
+                'top_allocators': [{'location': '{}:{}'.format(stat.traceback[0].filename, stat.traceback[0].lineno),
+                                    'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+                                   for stat in stats]
+            })
+            self.logger.info("Phase {} took {:.2f}s wall, {:.2f}s CPU".format(name, wall, cpu))
+
+    def count(self, name: str, value: int) -> None:
+        if self.enabled:
+            self.counters[name] = int(value)
+
+    @staticmethod
+    def peak_rss() -> Optional[int]:
+        """
+        Peak resident set size of the process so far, in bytes, or None if the platform can't say
+        """
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if 'darwin' == sys.platform else peak * 1024
+
+    def write(self, path: str) -> None:
+        """
+        Write the recorded phases and counters to path as JSON
+        """
+        if not self.enabled:
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'phases': self.phases, 'counters': self.counters}, f, indent=2)
+        self.logger.info("Profile report written to {}".format(path))
+
+    def stop(self) -> None:
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
@@ -0,0 +1,250 @@
+#!/usr/bin/python3
+"""
+Created on Oct 18, 2026
+
+Time the pathfinding hot loops - landmark forest construction, lower_bound_bulk, update_edges, single A* queries and
+full trade route calculation - over fixture galaxies, once per backend (compiled Cython modules and their pure-Python
+fallbacks), and report the results as JSON so they can be compared between versions.
+"""
+import argparse
+import contextlib
+import glob
+import importlib
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from PyRoute.AreaItems.Galaxy import Galaxy
+from PyRoute.DataClasses.ReadSectorOptions import ReadSectorOptions
+from PyRoute.Inputs.ParseStarInput import ParseStarInput
+
+logger = logging.getLogger('PyRoute')
+
+# Backend name, module supplying astar_path_numpy and module supplying ApproximateShortestPathForestUnified
+BACKENDS = {
+    'cython': ('PyRoute.Pathfinding.astar_numpy', 'PyRoute.Pathfinding.ApproximateShortestPathForestUnified'),
+    'fallback': ('PyRoute.Pathfinding.astar_numpy_fallback',
+                 'PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback')
+}
+
+# Metrics where a bigger number is a better result - everything else is a time or a size, where smaller is better
+HIGHER_IS_BETTER = {'calls_per_sec', 'queries_per_sec', 'routes_per_sec'}
+
+
+def load_backend(name: str) -> tuple:
+    """
+    Return the astar_path_numpy function and ApproximateShortestPathForestUnified class for the named backend.
+    Raises ImportError if the backend isn't available, eg the compiled modules haven't been built.
+    """
+    astar_module, forest_module = BACKENDS[name]
+    astar = importlib.import_module(astar_module)
+    forest = importlib.import_module(forest_module)
+    if 'cython' == name and (astar.__file__.endswith('.py') or forest.__file__.endswith('.py')):
+        raise ImportError("Compiled pathfinding modules not built")
+    return astar.astar_path_numpy, forest.ApproximateShortestPathForestUnified
+
+
+@contextlib.contextmanager
+def use_forest(forest_class):  # noqa: ANN201
+    """
+    Have TradeCalculation build its landmark forests from forest_class for the duration of the context
+    """
+    from PyRoute.Calculation import TradeCalculation as trade_module
+    old_forest = trade_module.ApproximateShortestPathForestUnified
+    trade_module.ApproximateShortestPathForestUnified = forest_class
+    try:
+        yield
+    finally:
+        trade_module.ApproximateShortestPathForestUnified = old_forest
+
+
+def load_galaxy(sectors: list[str], min_btn: int, max_jump: int) -> Galaxy:
+    ParseStarInput.deep_space = {}
+    galaxy = Galaxy(min_btn, max_jump)
+    galaxy.read_sectors(ReadSectorOptions(sectors=sectors, route_btn=8, deep_space={}))
+    galaxy.generate_routes()
+    galaxy.trade.calculate_components()
+    return galaxy
+
+
+def best_time(repeat: int, func, *args, **kwargs) -> tuple:
+    """
+    Run func repeat times, returning its last result and the best elapsed wall-clock seconds
+    """
+    result = None
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def peak_memory(func, *args, **kwargs) -> int:
+    """
+    Run func once under tracemalloc, returning the peak traced memory in bytes.  Kept apart from the timed runs, as
+    tracing slows down allocation-heavy code considerably.
+    """
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def benchmark_backend(galaxy: Galaxy, sectors: list[str], backend: str, args) -> dict:
+    astar_path_numpy, forest_class = load_backend(backend)
+    trade = galaxy.trade
+    pairs = [(s.index, n.index) for (s, n) in galaxy.ranges.edges() if s.component == n.component][:args.pairs]
+    landmarks, _ = trade.get_landmarks()
+    results = {}
+
+    def build_forests():  # noqa: ANN202
+        path_tree = forest_class(0, galaxy.stars, trade.epsilon, sources=landmarks)
+        forest_class(0, galaxy.stars, 0, sources=landmarks, use_distances=True)
+        return path_tree
+
+    tree, elapsed = best_time(args.repeat, build_forests)
+    results['forest_build'] = {'seconds': elapsed, 'peak_bytes': peak_memory(build_forests), 'trees': tree.num_trees}
+
+    targets = sorted({target for (_, target) in pairs}) or [0]
+
+    def bound_all():  # noqa: ANN202
+        for target in targets:
+            tree.lower_bound_bulk(target)
+
+    _, elapsed = best_time(args.repeat, bound_all)
+    results['lower_bound_bulk'] = {'seconds': elapsed, 'calls': len(targets),
+                                   'calls_per_sec': len(targets) / max(elapsed, 1e-9)}
+
+    graph = tree.graph
+
+    def search_all():  # noqa: ANN202
+        nodes_expanded = 0
+        for (source, target) in pairs:
+            upbound = tree.triangle_upbound(source, target) * 1.005
+            _, diag = astar_path_numpy(graph, source, target, tree.lower_bound_bulk, upbound=upbound, diagnostics=True)
+            nodes_expanded += diag['nodes_expanded']
+        return nodes_expanded
+
+    nodes_expanded, elapsed = best_time(args.repeat, search_all)
+    results['astar'] = {'seconds': elapsed, 'queries': len(pairs),
+                        'queries_per_sec': len(pairs) / max(elapsed, 1e-9), 'nodes_expanded': nodes_expanded}
+
+    # Lighten the first arc out of each of the first few stars, the way route_update_simple does, and time the repair
+    edges = []
+    indptr, indices, weights = graph.csr
+    for u in range(min(len(graph), args.pairs)):
+        if indptr[u] == indptr[u + 1]:
+            continue
+        v = int(indices[indptr[u]])
+        edges.append((u, v, float(weights[indptr[u]])))
+    start = time.perf_counter()
+    for (u, v, weight) in edges:
+        graph.lighten_edge(u, v, weight * 0.9)
+        tree.update_edges([(u, v)])
+    elapsed = time.perf_counter() - start
+    results['update_edges'] = {'seconds': elapsed, 'calls': len(edges),
+                               'calls_per_sec': len(edges) / max(elapsed, 1e-9)}
+
+    # Each full route calculation needs a fresh galaxy, and the traced run for peak memory gets one of its own
+    timings = []
+    routes = 0
+    peak = 0
+    for run in range(args.repeat + 1):
+        fresh = load_galaxy(sectors, args.min_btn, args.max_jump)
+        fresh.trade.pathfinder = astar_path_numpy
+        with use_forest(forest_class):
+            if run == args.repeat:
+                peak = peak_memory(fresh.trade.calculate_routes)
+                continue
+            _, elapsed = best_time(1, fresh.trade.calculate_routes)
+        routes = sum(1 for (_, _, data) in fresh.ranges.edges(data=True) if 'actual distance' in data)
+        timings.append(elapsed)
+    results['calculate_routes'] = {'seconds': min(timings), 'routes': routes,
+                                   'routes_per_sec': routes / max(min(timings), 1e-9), 'peak_bytes': peak}
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[dict]:
+    """
+    List every metric that's worse than its counterpart in baseline by more than threshold (as a fraction)
+    """
+    regressions = []
+    for (fixture, backends) in current['fixtures'].items():
+        for (backend, phases) in backends.items():
+            old_phases = baseline.get('fixtures', {}).get(fixture, {}).get(backend, {})
+            for (phase, metrics) in phases.items():
+                for (metric, value) in metrics.items():
+                    old_value = old_phases.get(phase, {}).get(metric)
+                    if not old_value or metric not in HIGHER_IS_BETTER and metric not in ('seconds', 'peak_bytes'):
+                        continue
+                    ratio = value / old_value
+                    worse = ratio < 1 - threshold if metric in HIGHER_IS_BETTER else ratio > 1 + threshold
+                    if worse:
+                        regressions.append({'fixture': fixture, 'backend': backend, 'phase': phase,
+                                            'metric': metric, 'baseline': old_value, 'current': value,
+                                            'ratio': round(ratio, 3)})
+    return regressions
+
+
+def process() -> None:
+    parser = argparse.ArgumentParser(description='Pathfinding benchmark, compiled versus fallback backends.')
+    parser.add_argument('sector', nargs='*', help='T5SS sector file(s) to load into one benchmark galaxy, '
+                                                  'default [Tests/TradeMPFiles/*.sec]')
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=list(BACKENDS),
+                        help='Backends to benchmark, default [all]')
+    parser.add_argument('--min-btn', dest='min_btn', default=15, type=int, help='Minimum BTN, default [15]')
+    parser.add_argument('--max-jump', dest='max_jump', default=4, type=int, help='Maximum jump, default [4]')
+    parser.add_argument('--pairs', default=500, type=int,
+                        help='Number of trade pairs to time single A* queries over, default [500]')
+    parser.add_argument('--repeat', default=3, type=int, help='Repeats per timing, best is reported, default [3]')
+    parser.add_argument('--output', default=None, help='File to write JSON results to, default [stdout]')
+    parser.add_argument('--baseline', default=None, help='Earlier JSON results to check for regressions against')
+    parser.add_argument('--threshold', default=0.1, type=float,
+                        help='Fractional slow-down against baseline reported as a regression, default [0.1]')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+    logger.setLevel(args.log_level)
+
+    if 1 > args.repeat:
+        parser.error("--repeat must be at least 1")
+    sectors = args.sector
+    if 0 == len(sectors):
+        sectors = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'Tests', 'TradeMPFiles', '*.sec')))
+    fixture = '+'.join(os.path.splitext(os.path.basename(item))[0] for item in sectors)
+
+    report = {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+              'fixtures': {fixture: {}}, 'skipped': {}}
+    for backend in args.backends:
+        try:
+            load_backend(backend)
+        except ImportError as e:
+            report['skipped'][backend] = str(e)
+            continue
+        galaxy = load_galaxy(sectors, args.min_btn, args.max_jump)
+        report['fixtures'][fixture][backend] = benchmark_backend(galaxy, sectors, backend, args)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(report, json.load(f), args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        sys.stdout.write(text + '\n')
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+if __name__ == '__main__':
+    process()
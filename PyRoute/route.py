@@ -53,6 +53,30 @@ def process() -> None:
     cpucount: int = 1 if os.cpu_count() is None else max(1, os.cpu_count() - 1)  # type:ignore[operator]
     route.add_argument('--mp-threads', default=cpucount, type=int,
                        help=f"Number of processes to use for trade-mp processing, default {cpucount}")
+    route.add_argument('--bidirectional', dest='bidirectional', default=False, action=argparse.BooleanOptionalAction,
+                       help='Search for trade routes from both ends at once, default [no-bidirectional]')
+    route.add_argument('--group-by-source', dest='group_by_source', default=False,
+                       action=argparse.BooleanOptionalAction,
+                       help='Search for trade routes sharing a world in one pass, trade routes only, '
+                            'default [no-group-by-source]')
+    route.add_argument('--landmark-cache', dest='landmark_cache_dir', default=None,
+                       help='Directory to cache pathfinding landmark distances in between runs, default [none]')
+    route.add_argument('--speculative-batch', dest='speculative_batch', default=0, type=int,
+                       help='Search this many upcoming trade routes ahead of time in --mp-threads processes, '
+                            'keeping only results unaffected by earlier routes, trade routes only, default [0 - off]')
+    route.add_argument('--active-landmarks', dest='active_landmarks', default=0, type=int,
+                       help='Bound each trade route search with only this many of its tightest landmarks, '
+                            'trade routes only, default [0 - all landmarks]')
+    route.add_argument('--checkpoint-dir', dest='checkpoint_dir', default=None,
+                       help='Directory to periodically snapshot trade route progress in, trade routes only, '
+                            'default [none]')
+    route.add_argument('--resume', dest='resume', default=False, action=argparse.BooleanOptionalAction,
+                       help='Resume trade route processing from the snapshot in --checkpoint-dir, if it matches this '
+                            'run, default [no-resume]')
+    route.add_argument('--checkpoint-routes', dest='checkpoint_routes', default=10000, type=int,
+                       help='Snapshot trade route progress after this many routes, default [10000]')
+    route.add_argument('--checkpoint-minutes', dest='checkpoint_minutes', default=15.0, type=float,
+                       help='Snapshot trade route progress after this many minutes, default [15]')
 
     output = parser.add_argument_group('Output', 'Output options')
 
@@ -131,7 +155,14 @@ def process() -> None:
     readparms = ReadSectorOptions(sectors=sectors_list, pop_code=args.pop_code, ru_calc=args.ru_calc,
                                   route_reuse=args.route_reuse, trade_choice=args.routes, route_btn=args.route_btn,
                                   mp_threads=args.mp_threads, debug_flag=args.debug_flag, fix_pop=args.fix_pop,
-                                  deep_space=deep_space, map_type=args.map_type, fix_econ=args.fix_econ)
+                                  deep_space=deep_space, map_type=args.map_type, fix_econ=args.fix_econ,
+                                  bidirectional=args.bidirectional, group_by_source=args.group_by_source,
+                                  landmark_cache_dir=args.landmark_cache_dir,
+                                  speculative_batch=args.speculative_batch,
+                                  active_landmarks=args.active_landmarks,
+                                  checkpoint_dir=args.checkpoint_dir, resume=args.resume,
+                                  checkpoint_routes=args.checkpoint_routes,
+                                  checkpoint_minutes=args.checkpoint_minutes)
     galaxy.read_sectors(readparms)
 
     # galaxy.read_sectors(sectors_list, args.pop_code, args.ru_calc,
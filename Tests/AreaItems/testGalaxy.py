@@ -353,6 +353,18 @@ class testGalaxy(baseTest):
                 elif 'trade' == routes:
                     self.assertEqual(8, galaxy.trade.min_btn)
 
+    def test_set_trade_object_bidirectional(self) -> None:
+        for routes in ['trade', 'trade-mp']:
+            with self.subTest(routes):
+                galaxy = Galaxy(8)
+                galaxy._set_trade_object(10, routes, 8, 1, False, bidirectional=True)
+                self.assertTrue(galaxy.trade.bidirectional)
+
+    def test_set_trade_object_group_by_source(self) -> None:
+        galaxy = Galaxy(8)
+        galaxy._set_trade_object(10, 'trade', 8, 1, False, group_by_source=True)
+        self.assertTrue(galaxy.trade.group_by_source)
+
     def test_process_owned_worlds_1(self) -> None:
         sourcefile = self.unpack_filename('DeltaFiles/Zarushagar-Ibara.sec')
 
@@ -0,0 +1,71 @@
+"""
+Created on Oct 18, 2026
+"""
+import numpy as np
+
+from PyRoute.Calculation import SpeculativeSearch
+from PyRoute.DeltaDebug.DeltaDictionary import SectorDictionary, DeltaDictionary
+from PyRoute.DeltaDebug.DeltaGalaxy import DeltaGalaxy
+from PyRoute.Inputs.ParseStarInput import ParseStarInput
+from PyRoute.Pathfinding import ApproximateShortestPathForestUnifiedFallback
+from PyRoute.Pathfinding.LandmarkSchemes.LandmarksTriaxialExtremes import LandmarksTriaxialExtremes
+from PyRoute.Pathfinding import astar_numpy_fallback
+try:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnified import ApproximateShortestPathForestUnified
+except ModuleNotFoundError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+except ImportError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+except AttributeError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+from Tests.baseTest import baseTest
+
+
+class testSpeculativeSearch(baseTest):
+
+    def setUp(self) -> None:
+        ParseStarInput.deep_space = {}
+        sourcefile = self.unpack_filename('DeltaFiles/Zarushagar-Ibara.sec')
+        sector = SectorDictionary.load_traveller_map_file(sourcefile)
+        delta = DeltaDictionary()
+        delta[sector.name] = sector
+        args = self._make_args()
+        galaxy = DeltaGalaxy(args.btn, args.max_jump)
+        galaxy.read_sectors(delta, args.pop_code, args.ru_calc,
+                            args.route_reuse, args.routes, args.route_btn, args.mp_threads, args.debug_flag)
+        galaxy.output_path = args.output
+        galaxy.generate_routes()
+        galaxy.trade.calculate_components()
+        self.galaxy = galaxy
+        self.landmarks, _ = LandmarksTriaxialExtremes(galaxy).get_landmarks()
+
+    def test_lower_bound_bulk_matches_forests(self) -> None:
+        forests = [ApproximateShortestPathForestUnified,
+                   ApproximateShortestPathForestUnifiedFallback.ApproximateShortestPathForestUnified]
+        for forest in forests:
+            with self.subTest(msg=forest.__module__):
+                tree = forest(0, self.galaxy.stars, 0.1, sources=self.landmarks)
+                labels = np.array(tree.distances)
+                for target in range(len(self.galaxy.stars)):
+                    np.testing.assert_array_equal(tree.lower_bound_bulk(target),
+                                                  SpeculativeSearch.lower_bound_bulk(labels, target))
+
+    def test_search_batch_matches_direct_search(self) -> None:
+        tree = ApproximateShortestPathForestUnified(0, self.galaxy.stars, 0.1, sources=self.landmarks)
+        graph = tree.graph
+        indptr, indices, weights = graph.csr
+        SpeculativeSearch.init_worker(indptr, indices)
+        routes = [(i, source, target, tree.triangle_upbound(source, target) * 1.005)
+                  for (i, (source, target)) in enumerate([(0, 36), (3, 17), (12, 30)])]
+
+        results = SpeculativeSearch.search_batch((weights.copy(), np.array(tree.distances), routes))
+
+        self.assertEqual([0, 1, 2], [position for (position, _, _) in results])
+        for (position, source, target, upbound) in routes:
+            exp_route, exp_diag = astar_numpy_fallback.astar_path_numpy(graph, source, target, tree.lower_bound_bulk,
+                                                                        upbound=upbound, diagnostics=True,
+                                                                        explored_nodes=True)
+            _, act_route, act_diag = results[position]
+            self.assertEqual(exp_route, act_route)
+            self.assertEqual(sorted(exp_diag['explored']), sorted(act_diag['explored']))
+            self.assertIn(source, act_diag['explored'])
@@ -0,0 +1,124 @@
+"""
+Created on Oct 18, 2026
+"""
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+
+from PyRoute.AreaItems.Galaxy import Galaxy
+from PyRoute.Calculation.TradeCalculation import TradeCalculation
+from PyRoute.Calculation.TradeCheckpoint import TradeCheckpoint
+from PyRoute.DataClasses.ReadSectorOptions import ReadSectorOptions
+from Tests.baseTest import baseTest
+
+
+class testTradeCheckpoint(baseTest):
+
+    def setUp(self) -> None:
+        self.sectors = [self.unpack_filename('DeltaFiles/quadripoint_trade_write/' + item)
+                        for item in ['Corridor.sec', 'Deneb.sec', 'Provence.sec', 'Tuglikki.sec']]
+        self.checkpoint_dir = tempfile.mkdtemp()
+
+    def _galaxy(self, output: str, **kwargs) -> Galaxy:
+        args = self._make_args()
+        readparms = ReadSectorOptions(sectors=self.sectors, pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                      route_reuse=args.route_reuse, trade_choice=args.routes, route_btn=8,
+                                      mp_threads=1, debug_flag=False, fix_pop=False, deep_space={},
+                                      map_type=args.map_type, **kwargs)
+        galaxy = Galaxy(min_btn=13, max_jump=4)
+        galaxy.read_sectors(readparms)
+        galaxy.output_path = output
+        galaxy.generate_routes()
+        return galaxy
+
+    @staticmethod
+    def _outputs(galaxy: Galaxy) -> dict:
+        galaxy.write_routes('trade')
+        outputs = {}
+        for filename in ['stars.txt', 'ranges.txt']:
+            with open(os.path.join(galaxy.output_path, filename), 'rb') as f:
+                outputs[filename] = f.read()
+        outputs['stats'] = [(area.stats.trade, area.stats.tradeExt, area.stats.passengers, area.stats.tradeDton,
+                             area.stats.tradeDtonExt) for area in [galaxy] + list(galaxy.sectors.values())]
+        outputs['stars'] = [(star.tradeIn, star.tradeOver, star.tradeCount, star.passIn, star.passOver)
+                            for star in galaxy.star_mapping.values()]
+        return outputs
+
+    @staticmethod
+    def _calculate_routes(galaxy: Galaxy, crash_after: int = -1) -> int:
+        """
+        Calculate galaxy's trade routes, dying with a MemoryError if crash_after routes have been found, and return
+        the number of routes found
+        """
+        get_trade_between = galaxy.trade.get_trade_between
+        calls = []
+
+        def counted(star, target) -> None:
+            if crash_after == len(calls):
+                raise MemoryError
+            calls.append(star)
+            get_trade_between(star, target)
+
+        with patch.object(galaxy.trade, 'get_trade_between', counted):
+            galaxy.trade.calculate_routes()
+        return len(calls)
+
+    def test_resumed_run_writes_same_routes_as_uninterrupted_run(self) -> None:
+        galaxy = self._galaxy(tempfile.mkdtemp())
+        total = self._calculate_routes(galaxy)
+        expected = self._outputs(galaxy)
+        self.assertLess(0, len(galaxy.trade.route_edges))
+
+        # Die part-way through, after a few snapshots have been written
+        crashed = self._galaxy(tempfile.mkdtemp(), checkpoint_dir=self.checkpoint_dir, checkpoint_routes=50,
+                               checkpoint_minutes=0)
+        with self.assertRaises(MemoryError):
+            self._calculate_routes(crashed, 170)
+        self.assertEqual(3, crashed.trade.checkpoint.saves)
+
+        resumed = self._galaxy(tempfile.mkdtemp(), checkpoint_dir=self.checkpoint_dir, resume=True,
+                               checkpoint_routes=50, checkpoint_minutes=0)
+        # Routes up to the last snapshot aren't searched again
+        self.assertEqual(total - 150, self._calculate_routes(resumed))
+        self.assertEqual(galaxy.trade.penumbra_routes, resumed.trade.penumbra_routes)
+        self.assertEqual(expected, self._outputs(resumed))
+
+    def test_snapshot_from_different_settings_is_ignored(self) -> None:
+        galaxy = self._galaxy(tempfile.mkdtemp(), checkpoint_dir=self.checkpoint_dir, checkpoint_routes=50,
+                              checkpoint_minutes=0)
+        galaxy.trade.calculate_routes()
+        self.assertLess(0, galaxy.trade.checkpoint.saves)
+
+        checkpoint = TradeCheckpoint(self.checkpoint_dir, resume=True)
+        checkpoint.start('not the same run')
+        checkpoint.logger.manager.disable = 10
+        with self.assertLogs(checkpoint.logger, 'WARNING') as logs:
+            self.assertIsNone(checkpoint.load(galaxy.trade))
+        self.assertIn('is from a different galaxy or settings', logs.output[0])
+
+    def test_missing_snapshot_starts_from_scratch(self) -> None:
+        galaxy = self._galaxy(tempfile.mkdtemp(), checkpoint_dir=self.checkpoint_dir, resume=True,
+                              checkpoint_routes=0, checkpoint_minutes=0)
+        self.assertIsInstance(galaxy.trade, TradeCalculation)
+        logger = galaxy.trade.checkpoint.logger
+        logger.manager.disable = 10
+        with self.assertLogs(logger, 'WARNING') as logs:
+            galaxy.trade.calculate_routes()
+        self.assertIn('No usable trade checkpoint', logs.output[0])
+        self.assertEqual(0, galaxy.trade.checkpoint.saves)
+        self.assertFalse(os.path.exists(galaxy.trade.checkpoint.path))
+
+    def test_historic_cost_arcs_round_trip(self) -> None:
+        galaxy = self._galaxy(tempfile.mkdtemp())
+        galaxy.trade.calculate_routes()
+        historic = galaxy.historic_costs
+        tails, heads, weights = historic.arcs()
+        self.assertEqual(2 * len(galaxy.trade.route_edges), len(tails))
+
+        rebuilt = type(historic)(galaxy.stars)
+        rebuilt.add_arcs(tails, heads, weights)
+        for u in range(len(historic)):
+            np.testing.assert_array_equal(historic.neighbours(u)[0], rebuilt.neighbours(u)[0])
+            np.testing.assert_array_equal(historic.neighbours(u)[1], rebuilt.neighbours(u)[1])
@@ -0,0 +1,53 @@
+"""
+Created on Oct 18, 2026
+"""
+import numpy as np
+
+from PyRoute.Pathfinding import minmaxheap_fallback
+from Tests.baseTest import baseTest
+try:
+    from PyRoute.Pathfinding import minmaxheap
+except ModuleNotFoundError:
+    minmaxheap = None
+except ImportError:
+    minmaxheap = None
+
+
+class testAStarOpenList(baseTest):
+
+    def setUp(self) -> None:
+        self.open_lists = [minmaxheap_fallback.AStarOpenList]
+        if minmaxheap is not None:
+            self.open_lists.append(minmaxheap.AStarOpenList)
+
+    def test_pops_in_augmented_cost_order(self) -> None:
+        for open_list in self.open_lists:
+            with self.subTest(msg=open_list.__module__):
+                queue = open_list()
+                queue.push(5.0, 0.0, 0, -1)
+                queue.push_bulk(np.array([7.0, 3.0, 6.0]), np.array([2.0, 1.0, 4.0]), np.array([1, 2, 3], dtype=np.int64), 0)
+                self.assertEqual(4, len(queue))
+
+                popped = [queue.pop() for _ in range(4)]
+                self.assertEqual([(3.0, 1.0, 2, 0), (5.0, 0.0, 0, -1), (6.0, 4.0, 3, 0), (7.0, 2.0, 1, 0)], popped)
+                self.assertEqual(0, len(queue))
+
+    def test_equal_augmented_costs_pop_nearer_entry_first(self) -> None:
+        for open_list in self.open_lists:
+            with self.subTest(msg=open_list.__module__):
+                queue = open_list()
+                queue.push(4.0, 3.0, 1, 0)
+                queue.push(4.0, 1.0, 2, 0)
+                self.assertEqual(2, queue.pop()[2])
+
+    def test_prune_drops_entries_at_or_over_upbound(self) -> None:
+        for open_list in self.open_lists:
+            with self.subTest(msg=open_list.__module__):
+                queue = open_list()
+                augments = np.array([9.0, 1.0, 5.0, 8.0, 2.0, 5.0, 7.0])
+                queue.push_bulk(augments, np.zeros(7), np.arange(7, dtype=np.int64), -1)
+
+                self.assertEqual(5, queue.prune(5.0))
+                self.assertEqual(0, queue.prune(5.0))
+                self.assertEqual([1, 4], sorted(queue.pop()[2] for _ in range(len(queue))))
+                self.assertEqual(0, queue.prune(1.0))
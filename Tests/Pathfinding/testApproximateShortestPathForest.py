@@ -74,6 +74,32 @@ class testApproximateShortestPathForest(baseTest):
         np.testing.assert_array_almost_equal(expected, actual, 0.000001, "Unexpected bounds array")
         np.testing.assert_equal(expected_distance, distance, "Unexpected 2-80 distance")
 
+    def test_active_landmarks_bound_matches_full_set_at_source(self) -> None:
+        galaxy = self.set_up_zarushagar_sector()
+
+        foo = LandmarksTriaxialExtremes(galaxy)
+        landmarks, _ = foo.get_landmarks()
+        approx = ApproximateShortestPathForestUnified(0, galaxy.stars, 0.2, sources=landmarks)
+
+        source = 2
+        target = 80
+        columns = approx.select_landmarks(source, target, 2)
+        self.assertEqual(2, len(columns))
+        self.assertEqual(sorted(columns.tolist()), columns.tolist())
+
+        full = approx.lower_bound_bulk(target)
+        active = approx.lower_bound_bulk_columns(target, columns)
+        # The tightest landmark between the endpoints is always picked, so the bound at the source is unchanged ...
+        self.assertEqual(approx.lower_bound(source, target), active[source])
+        self.assertEqual(full[source], active[source])
+        # ... while every other node's bound can only loosen
+        self.assertTrue(np.all(active <= full))
+        self.assertEqual(0, active[target])
+
+        # Asking for more landmarks than there are gives every one of them
+        self.assertEqual(list(range(approx.num_trees)), approx.select_landmarks(source, target, 20).tolist())
+        np.testing.assert_array_equal(full, approx.lower_bound_bulk_columns(target, approx.select_landmarks(source, target, 20)))
+
     def test_unified_can_handle_singleton_landmarks(self) -> None:
         galaxy = self.set_up_zarushagar_sector()
 
@@ -3,6 +3,9 @@ Created on Sep 21, 2023
 
 @author: CyberiaResurrection
 """
+from networkx import NetworkXNoPath
+
+from PyRoute.Pathfinding import astar_numpy_fallback
 from PyRoute.Pathfinding.DistanceGraph import DistanceGraph
 from PyRoute.DeltaDebug.DeltaDictionary import SectorDictionary, DeltaDictionary
 from PyRoute.DeltaDebug.DeltaGalaxy import DeltaGalaxy
@@ -21,15 +24,15 @@ except AttributeError:
     from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
     goodimport = False
 try:
-    from PyRoute.Pathfinding.astar_numpy import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy import astar_path_numpy, astar_path_numpy_bidirectional
 except ModuleNotFoundError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_bidirectional
     goodimport = False
 except ImportError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_bidirectional
     goodimport = False
 except AttributeError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_bidirectional
     goodimport = False
 
 
@@ -79,3 +82,103 @@ class testAStarNumpy(baseTest):
                                                   diagnostics=True)
         self.assertEqual(exp_route, act_route)
         self.assertEqual(exp_diagnostics, diagnostics)
+
+    def testBidirectionalAStarOverSubsector(self) -> None:
+        galaxy = self._load_galaxy('DeltaFiles/Zarushagar-Ibara.sec')
+        dist_graph = DistanceGraph(galaxy.stars)
+
+        source = galaxy.star_mapping[0]
+        target = galaxy.star_mapping[36]
+
+        galaxy.trade.shortest_path_tree = ApproximateShortestPathForestUnified(source.index, galaxy.stars, 0)
+        heuristic = galaxy.heuristic_distance_bulk
+        upbound = galaxy.trade.shortest_path_tree.triangle_upbound(source.index, target.index) * 1.005
+
+        exp_route, exp_diagnostics = astar_path_numpy(dist_graph, source.index, target.index, heuristic,
+                                                      upbound=upbound, diagnostics=True)
+        for pathfinder in [astar_path_numpy_bidirectional, astar_numpy_fallback.astar_path_numpy_bidirectional]:
+            with self.subTest(msg=str(pathfinder.__module__)):
+                act_route, diagnostics = pathfinder(dist_graph, source.index, target.index, heuristic,
+                                                    upbound=upbound, diagnostics=True)
+                self.assertEqual(exp_route, act_route)
+                self.assertEqual(set(exp_diagnostics.keys()), set(diagnostics.keys()))
+                self.assertEqual(len(exp_route) - 1, diagnostics['num_jumps'])
+                self.assertLess(diagnostics['nodes_expanded'], exp_diagnostics['nodes_expanded'])
+
+                act_route, diagnostics = pathfinder(dist_graph, source.index, target.index, heuristic,
+                                                    upbound=upbound, diagnostics=False)
+                self.assertEqual(exp_route, act_route)
+                self.assertEqual({}, diagnostics)
+
+    def testBidirectionalAStarRespectsUpbound(self) -> None:
+        galaxy = self._load_galaxy('DeltaFiles/Zarushagar-Ibara.sec')
+        dist_graph = DistanceGraph(galaxy.stars)
+        galaxy.trade.shortest_path_tree = ApproximateShortestPathForestUnified(0, galaxy.stars, 0)
+        heuristic = galaxy.heuristic_distance_bulk
+
+        for pathfinder in [astar_path_numpy_bidirectional, astar_numpy_fallback.astar_path_numpy_bidirectional]:
+            with self.subTest(msg=str(pathfinder.__module__)):
+                msg = None
+                try:
+                    pathfinder(dist_graph, 0, 36, heuristic, upbound=10.0)
+                except NetworkXNoPath as e:
+                    msg = str(e)
+                self.assertEqual("Node 36 not reachable from 0", msg)
+                self.assertEqual(([4], {}), pathfinder(dist_graph, 4, 4, heuristic, upbound=10.0))
+
+    def testBidirectionalNodesExpandedOnRegressionFixtures(self) -> None:
+        # Compare total nodes expanded by unidirectional and bidirectional search over every same-component trade
+        # pair in each fixture, using the same landmark bounds that TradeCalculation does.  Both must find
+        # equal-cost routes, with the bidirectional search expanding fewer nodes in total.
+        fixtures = ['DeltaFiles/Zarushagar-Ibara.sec', 'DeltaFiles/dijkstra_restart_blowup/Lishun.sec',
+                    'DeltaFiles/dijkstra_restart_blowup/Lishun-jump4.sec',
+                    'DeltaFiles/dijkstra_restart_blowup/Lishun-jump4-1.sec']
+        for fixture in fixtures:
+            galaxy = self._load_galaxy(fixture)
+            dist_graph = DistanceGraph(galaxy.stars)
+            btn = [(s, n, d) for (s, n, d) in galaxy.ranges.edges(data=True) if s.component == n.component]
+            landmarks, _ = galaxy.trade.get_landmarks(btn=btn)
+            tree = ApproximateShortestPathForestUnified(0, galaxy.stars, 0.1, sources=landmarks)
+
+            for pathfinder in [astar_path_numpy_bidirectional, astar_numpy_fallback.astar_path_numpy_bidirectional]:
+                with self.subTest(msg=fixture + " " + str(pathfinder.__module__)):
+                    forward_expanded = 0
+                    both_expanded = 0
+                    for (star, neighbour, _) in btn:
+                        upbound = tree.triangle_upbound(star.index, neighbour.index) * 1.005
+                        exp_route, exp_diag = astar_path_numpy(dist_graph, star.index, neighbour.index,
+                                                               tree.lower_bound_bulk, upbound=upbound,
+                                                               diagnostics=True)
+                        act_route, act_diag = pathfinder(dist_graph, star.index, neighbour.index,
+                                                         tree.lower_bound_bulk, upbound=upbound, diagnostics=True)
+                        self.assertEqual(star.index, act_route[0])
+                        self.assertEqual(neighbour.index, act_route[-1])
+                        self.assertAlmostEqual(self._route_cost(dist_graph, exp_route),
+                                               self._route_cost(dist_graph, act_route), 7)
+                        forward_expanded += exp_diag['nodes_expanded']
+                        both_expanded += act_diag['nodes_expanded']
+                    msg = fixture + ": " + str(len(btn)) + " pairs, " + str(forward_expanded) + \
+                        " nodes expanded forward, " + str(both_expanded) + " bidirectional"
+                    self.assertLess(both_expanded, forward_expanded, msg)
+
+    def _load_galaxy(self, filename) -> DeltaGalaxy:
+        sourcefile = self.unpack_filename(filename)
+
+        sector = SectorDictionary.load_traveller_map_file(sourcefile)
+        delta = DeltaDictionary()
+        delta[sector.name] = sector
+
+        args = self._make_args()
+
+        galaxy = DeltaGalaxy(args.btn, args.max_jump)
+        galaxy.read_sectors(delta, args.pop_code, args.ru_calc,
+                            args.route_reuse, args.routes, args.route_btn, args.mp_threads, args.debug_flag)
+        galaxy.output_path = args.output
+
+        galaxy.generate_routes()
+        galaxy.trade.calculate_components()
+        return galaxy
+
+    @staticmethod
+    def _route_cost(graph, route) -> float:
+        return sum(graph.arc_weight(route[i], route[i + 1]) for i in range(len(route) - 1))
@@ -0,0 +1,122 @@
+"""
+Created on Oct 18, 2026
+"""
+from PyRoute.Pathfinding.DistanceGraph import DistanceGraph
+from PyRoute.DeltaDebug.DeltaDictionary import SectorDictionary, DeltaDictionary
+from PyRoute.DeltaDebug.DeltaGalaxy import DeltaGalaxy
+from PyRoute.Inputs.ParseStarInput import ParseStarInput
+from PyRoute.Pathfinding import astar_numpy_fallback
+from Tests.baseTest import baseTest
+try:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnified import ApproximateShortestPathForestUnified
+except ModuleNotFoundError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+except ImportError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+except AttributeError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+try:
+    from PyRoute.Pathfinding.astar_numpy import astar_path_numpy, astar_path_numpy_multi
+except ModuleNotFoundError:
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_multi
+except ImportError:
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_multi
+except AttributeError:
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_multi
+
+
+class testAstarNumpyMulti(baseTest):
+
+    def setUp(self) -> None:
+        ParseStarInput.deep_space = {}
+        sourcefile = self.unpack_filename('DeltaFiles/Zarushagar-Ibara.sec')
+
+        sector = SectorDictionary.load_traveller_map_file(sourcefile)
+        delta = DeltaDictionary()
+        delta[sector.name] = sector
+
+        args = self._make_args()
+
+        galaxy = DeltaGalaxy(args.btn, args.max_jump)
+        galaxy.read_sectors(delta, args.pop_code, args.ru_calc,
+                            args.route_reuse, args.routes, args.route_btn, args.mp_threads, args.debug_flag)
+        galaxy.output_path = args.output
+
+        galaxy.generate_routes()
+        galaxy.trade.calculate_components()
+        self.galaxy = galaxy
+        self.graph = DistanceGraph(galaxy.stars)
+        self.tree = ApproximateShortestPathForestUnified(0, galaxy.stars, 0)
+        self.pathfinders = [astar_path_numpy_multi, astar_numpy_fallback.astar_path_numpy_multi]
+
+    def path_cost(self, path) -> float:
+        return sum(self.graph.arc_weight(path[i], path[i + 1]) for i in range(len(path) - 1))
+
+    def test_multi_target_costs_match_single_target_search(self) -> None:
+        source = 0
+        targets = [36, 8, 15, 24, 9]
+        upbounds = [self.tree.triangle_upbound(source, target) * 1.005 for target in targets]
+
+        for pathfinder in self.pathfinders:
+            with self.subTest(msg=pathfinder.__module__):
+                paths, costs, diag = pathfinder(self.graph, source, targets, self.tree.lower_bound_bulk,
+                                                upbounds=upbounds, diagnostics=True)
+
+                self.assertEqual(set(targets), set(paths.keys()))
+                self.assertEqual(len(targets), diag['targets_settled'])
+                self.assertEqual(0, diag['targets_missed'])
+                single_expanded = 0
+                for target, upbound in zip(targets, upbounds):
+                    path = paths[target]
+                    self.assertEqual(source, path[0])
+                    self.assertEqual(target, path[-1])
+                    exp_path, exp_diag = astar_path_numpy(self.graph, source, target, self.tree.lower_bound_bulk,
+                                                          upbound=upbound, diagnostics=True)
+                    single_expanded += exp_diag['nodes_expanded']
+                    self.assertAlmostEqual(self.path_cost(exp_path), costs[target], 7)
+                    self.assertAlmostEqual(self.path_cost(path), costs[target], 7)
+                self.assertLess(diag['nodes_expanded'], single_expanded)
+
+    def test_backends_agree(self) -> None:
+        source = 0
+        targets = [36, 8, 15, 24, 9]
+        upbounds = [self.tree.triangle_upbound(source, target) * 1.005 for target in targets]
+
+        exp_paths, exp_costs, exp_diag = astar_numpy_fallback.astar_path_numpy_multi(
+            self.graph, source, targets, self.tree.lower_bound_bulk, upbounds=upbounds, diagnostics=True)
+        act_paths, act_costs, act_diag = astar_path_numpy_multi(self.graph, source, targets,
+                                                                self.tree.lower_bound_bulk, upbounds=upbounds,
+                                                                diagnostics=True)
+        self.assertEqual(exp_costs.keys(), act_costs.keys())
+        for target in exp_costs:
+            self.assertAlmostEqual(exp_costs[target], act_costs[target], 7)
+            self.assertAlmostEqual(self.path_cost(exp_paths[target]), self.path_cost(act_paths[target]), 7)
+        self.assertEqual(exp_diag.keys(), act_diag.keys())
+
+    def test_target_busting_upper_bound_is_missed(self) -> None:
+        source = 0
+        targets = [36, 8]
+        exp_cost = self.path_cost(astar_path_numpy(self.graph, source, 36, self.tree.lower_bound_bulk)[0])
+
+        for pathfinder in self.pathfinders:
+            with self.subTest(msg=pathfinder.__module__):
+                paths, costs, diag = pathfinder(self.graph, source, targets, self.tree.lower_bound_bulk,
+                                                upbounds=[exp_cost / 2, float('+inf')], diagnostics=True)
+                self.assertEqual([8], list(paths.keys()))
+                self.assertEqual([8], list(costs.keys()))
+                self.assertEqual(1, diag['targets_missed'])
+
+    def test_mismatched_upper_bounds_raise(self) -> None:
+        for pathfinder in self.pathfinders:
+            with self.subTest(msg=pathfinder.__module__):
+                msg = None
+                try:
+                    pathfinder(self.graph, 0, [36, 8], self.tree.lower_bound_bulk, upbounds=[1000.0])
+                except ValueError as e:
+                    msg = str(e)
+                self.assertEqual("Must supply exactly one upper bound per target", msg)
+
+    def test_no_targets(self) -> None:
+        for pathfinder in self.pathfinders:
+            with self.subTest(msg=pathfinder.__module__):
+                self.assertEqual(({}, {}, {}), pathfinder(self.graph, 0, [], self.tree.lower_bound_bulk))
@@ -0,0 +1,134 @@
+"""
+Created on Oct 18, 2026
+"""
+import numpy as np
+
+from PyRoute.DeltaDebug.DeltaDictionary import SectorDictionary, DeltaDictionary
+from PyRoute.DeltaDebug.DeltaGalaxy import DeltaGalaxy
+from PyRoute.Inputs.ParseStarInput import ParseStarInput
+from PyRoute.Pathfinding import ApproximateShortestPathForestUnifiedFallback
+from PyRoute.Pathfinding.BoundCache import BoundCache
+from PyRoute.Pathfinding.LandmarkSchemes.LandmarksTriaxialExtremes import LandmarksTriaxialExtremes
+try:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnified import ApproximateShortestPathForestUnified
+except ModuleNotFoundError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+except ImportError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+except AttributeError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+from Tests.baseTest import baseTest
+
+
+class testBoundCache(baseTest):
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        cache = BoundCache(2)
+        trees = np.array([True, False])
+        cache.put(1, 'one', trees)
+        cache.put(2, 'two', trees)
+        self.assertEqual('one', cache.get(1))
+        cache.put(3, 'three', trees)
+
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get(2))
+        self.assertEqual('one', cache.get(1))
+        self.assertEqual('three', cache.get(3))
+        self.assertEqual((3, 1), (cache.hits, cache.misses))
+
+    def test_invalidate_only_drops_dependent_entries(self) -> None:
+        cache = BoundCache()
+        cache.put(1, 'first tree', np.array([True, False, False]))
+        cache.put(2, 'second tree', np.array([False, True, False]))
+        cache.put(3, 'every tree', np.array([True, True, True]))
+
+        cache.invalidate([1])
+        self.assertEqual('first tree', cache.get(1))
+        self.assertIsNone(cache.get(2))
+        self.assertIsNone(cache.get(3))
+
+    def test_disabled_cache_neither_stores_nor_serves(self) -> None:
+        cache = BoundCache()
+        trees = np.array([True])
+        cache.put(1, 'one', trees)
+        with cache.disabled():
+            self.assertIsNone(cache.get(1))
+            cache.put(2, 'two', trees)
+            self.assertEqual(0, len(cache))
+        self.assertEqual(64, cache.maxsize)
+        self.assertIsNone(cache.get(2))
+
+
+class testForestBoundCache(baseTest):
+
+    def setUp(self) -> None:
+        ParseStarInput.deep_space = {}
+        sourcefile = self.unpack_filename('DeltaFiles/Zarushagar-Ibara.sec')
+        sector = SectorDictionary.load_traveller_map_file(sourcefile)
+        delta = DeltaDictionary()
+        delta[sector.name] = sector
+        args = self._make_args()
+        galaxy = DeltaGalaxy(args.btn, args.max_jump)
+        galaxy.read_sectors(delta, args.pop_code, args.ru_calc,
+                            args.route_reuse, args.routes, args.route_btn, args.mp_threads, args.debug_flag)
+        galaxy.output_path = args.output
+        galaxy.generate_routes()
+        galaxy.trade.calculate_components()
+        self.galaxy = galaxy
+        self.landmarks, _ = LandmarksTriaxialExtremes(galaxy).get_landmarks()
+        self.forests = [ApproximateShortestPathForestUnified,
+                        ApproximateShortestPathForestUnifiedFallback.ApproximateShortestPathForestUnified]
+
+    def test_repeat_target_is_served_from_cache(self) -> None:
+        for forest in self.forests:
+            with self.subTest(msg=forest.__module__):
+                approx = forest(0, self.galaxy.stars, 0.1, sources=self.landmarks)
+                first = approx.lower_bound_bulk(17)
+                second = approx.lower_bound_bulk(17)
+                self.assertIs(first, second)
+                self.assertEqual((1, 1), (approx.bound_cache.hits, approx.bound_cache.misses))
+
+    def test_relabelled_tree_invalidates_cached_bounds(self) -> None:
+        for forest in self.forests:
+            with self.subTest(msg=forest.__module__):
+                approx = forest(0, self.galaxy.stars, 0.1, sources=self.landmarks)
+                targets = [0, 17, 36]
+                for target in targets:
+                    approx.lower_bound_bulk(target)
+                self.assertEqual(len(targets), len(approx.bound_cache))
+
+                # Slash the weight of an arc out of a landmark, so at least one tree has to be relabelled
+                indptr, indices, _ = approx.graph.csr
+                u = int(np.flatnonzero(0 == approx.distances[:, 0])[0])
+                v = int(indices[indptr[u]])
+                approx.lighten_edge(u, v, 1)
+                approx.update_edges([(u, v)])
+
+                # Every target here is reachable by every tree, so every entry depended on the relabelled tree
+                for target in targets:
+                    self.assertIsNone(approx.bound_cache.get(target))
+                fresh = forest(0, self.galaxy.stars, 0.1, sources=self.landmarks, bound_cache_size=0)
+                fresh.lighten_edge(u, v, 1)
+                fresh.update_edges([(u, v)])
+                for target in targets:
+                    np.testing.assert_array_equal(fresh.lower_bound_bulk(target), approx.lower_bound_bulk(target))
+
+    def test_unchanged_trees_keep_cached_bounds(self) -> None:
+        for forest in self.forests:
+            with self.subTest(msg=forest.__module__):
+                approx = forest(0, self.galaxy.stars, 0.1, sources=self.landmarks)
+                approx.lower_bound_bulk(17)
+                # An edge update that doesn't bust any tree's bounds leaves the cache alone
+                indptr, indices, weights = approx.graph.csr
+                v = int(indices[indptr[0]])
+                approx.update_edges([(0, v)])
+                self.assertIs(approx.lower_bound_bulk(17), approx.bound_cache.get(17))
+                self.assertEqual(2, approx.bound_cache.hits)
+
+    def test_expanding_forest_empties_cache(self) -> None:
+        approx = ApproximateShortestPathForestUnifiedFallback.ApproximateShortestPathForestUnified(
+            0, self.galaxy.stars, 0.1, sources=self.landmarks)
+        approx.lower_bound_bulk(17)
+        approx.expand_forest([36])
+        self.assertEqual(0, len(approx.bound_cache))
+        self.assertEqual(approx.num_trees, len(approx._mona_lisa_overdrive(17)[0]))
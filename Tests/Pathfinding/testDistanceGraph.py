@@ -103,6 +103,29 @@ class testDistanceGraph(baseTest):
         actual = distgraph.min_cost(0, indirect=True)
         self.assertEqual(expected, list(actual), 'Unexpected indirect min-cost vector')
 
+    def test_csr_matches_source_graph(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/Zarushagar.sec')
+        galaxy, graph, _, _ = self._setup_graph(sourcefile)
+
+        distgraph = DistanceGraph(graph)
+        indptr, indices, weights = distgraph.csr
+        self.assertEqual(len(graph) + 1, len(indptr))
+        self.assertEqual(2 * graph.number_of_edges(), len(indices))
+        self.assertEqual(len(indices), len(weights))
+
+        for u in graph.nodes:
+            neighbours, costs = distgraph.neighbours(u)
+            self.assertEqual(list(graph.adj[u]), neighbours.tolist())
+            self.assertEqual([data['weight'] for data in graph.adj[u].values()], costs.tolist())
+            for v, data in graph.adj[u].items():
+                self.assertEqual(data['weight'], distgraph.arc_weight(u, v))
+
+        u, v = next(iter(graph.edges))
+        distgraph.lighten_edge(u, v, 7)
+        self.assertEqual(7, distgraph.arc_weight(u, v))
+        self.assertEqual(7, distgraph.arc_weight(v, u))
+        self.assertIsNone(distgraph.arc_weight(u, u))
+
     def _setup_graph(self, sourcefile):
         sector = SectorDictionary.load_traveller_map_file(sourcefile)
         delta = DeltaDictionary()
@@ -0,0 +1,120 @@
+"""
+Created on Oct 18, 2026
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from PyRoute.DeltaDebug.DeltaDictionary import SectorDictionary, DeltaDictionary
+from PyRoute.DeltaDebug.DeltaGalaxy import DeltaGalaxy
+from PyRoute.Inputs.ParseStarInput import ParseStarInput
+from PyRoute.Pathfinding import ApproximateShortestPathForestUnifiedFallback
+from PyRoute.Pathfinding.LandmarkCache import LandmarkCache
+from PyRoute.Pathfinding.LandmarkSchemes.LandmarksTriaxialExtremes import LandmarksTriaxialExtremes
+try:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnified import ApproximateShortestPathForestUnified
+except ModuleNotFoundError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+except ImportError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+except AttributeError:
+    from PyRoute.Pathfinding.ApproximateShortestPathForestUnifiedFallback import ApproximateShortestPathForestUnified
+from Tests.baseTest import baseTest
+
+
+class testLandmarkCache(baseTest):
+
+    def setUp(self) -> None:
+        ParseStarInput.deep_space = {}
+        sourcefile = self.unpack_filename('DeltaFiles/Zarushagar-Ibara.sec')
+        sector = SectorDictionary.load_traveller_map_file(sourcefile)
+        delta = DeltaDictionary()
+        delta[sector.name] = sector
+        args = self._make_args()
+        galaxy = DeltaGalaxy(args.btn, args.max_jump)
+        galaxy.read_sectors(delta, args.pop_code, args.ru_calc,
+                            args.route_reuse, args.routes, args.route_btn, args.mp_threads, args.debug_flag)
+        galaxy.output_path = args.output
+        galaxy.generate_routes()
+        galaxy.trade.calculate_components()
+        self.galaxy = galaxy
+        self.landmarks, _ = LandmarksTriaxialExtremes(galaxy).get_landmarks()
+        self.forests = [ApproximateShortestPathForestUnified,
+                        ApproximateShortestPathForestUnifiedFallback.ApproximateShortestPathForestUnified]
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+
+    def test_second_build_loads_from_cache(self) -> None:
+        for forest in self.forests:
+            for use_distances in [False, True]:
+                with self.subTest(msg=forest.__module__ + " use_distances " + str(use_distances)):
+                    cache = LandmarkCache(os.path.join(self.tempdir.name, forest.__module__ + str(use_distances)))
+                    expected = forest(0, self.galaxy.stars, 0.1, sources=self.landmarks, use_distances=use_distances)
+                    first = forest(0, self.galaxy.stars, 0.1, sources=self.landmarks, use_distances=use_distances,
+                                   cache=cache)
+                    self.assertEqual((0, 1), (cache.hits, cache.misses))
+                    second = forest(0, self.galaxy.stars, 0.1, sources=self.landmarks, use_distances=use_distances,
+                                    cache=cache)
+                    self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+                    np.testing.assert_array_equal(expected.distances, first.distances)
+                    np.testing.assert_array_equal(expected.distances, second.distances)
+                    for target in [0, 17, 36]:
+                        np.testing.assert_array_equal(expected.lower_bound_bulk(target),
+                                                      second.lower_bound_bulk(target))
+
+    def test_key_depends_on_weights_landmarks_and_epsilon(self) -> None:
+        forest = ApproximateShortestPathForestUnified(0, self.galaxy.stars, 0.1, sources=self.landmarks)
+        graph = forest.graph
+        seeds = [[item] for item in range(3)]
+        base = LandmarkCache.key(graph, seeds, 1 / 1.1)
+        self.assertEqual(base, LandmarkCache.key(graph, seeds, 1 / 1.1))
+        self.assertNotEqual(base, LandmarkCache.key(graph, seeds[:2], 1 / 1.1))
+        self.assertNotEqual(base, LandmarkCache.key(graph, seeds, 1.0))
+
+        indptr, indices, weights = graph.csr
+        u = 0
+        v = int(indices[indptr[u]])
+        graph.lighten_edge(u, v, weights[indptr[u]] - 1)
+        self.assertNotEqual(base, LandmarkCache.key(graph, seeds, 1 / 1.1))
+
+    def test_updating_loaded_tree_leaves_cache_untouched(self) -> None:
+        cache = LandmarkCache(self.tempdir.name)
+        ApproximateShortestPathForestUnified(0, self.galaxy.stars, 0.1, sources=self.landmarks, cache=cache)
+        loaded = ApproximateShortestPathForestUnified(0, self.galaxy.stars, 0.1, sources=self.landmarks, cache=cache)
+        self.assertEqual(1, cache.hits)
+        before = loaded.distances.copy()
+
+        # Slash the weight of an arc out of a landmark, so its neighbour's label has to drop
+        indptr, indices, weights = loaded.graph.csr
+        u = int(np.flatnonzero(0 == before[:, 0])[0])
+        v = int(indices[indptr[u]])
+        loaded.graph.lighten_edge(u, v, 1)
+        loaded.update_edges([(u, v)])
+        self.assertFalse(np.array_equal(before, loaded.distances))
+
+        reloaded = ApproximateShortestPathForestUnified(0, self.galaxy.stars, 0.1, sources=self.landmarks,
+                                                        cache=cache)
+        self.assertEqual(2, cache.hits)
+        np.testing.assert_array_equal(before, reloaded.distances)
+
+    def test_unreadable_entry_falls_back_to_recompute(self) -> None:
+        cache = LandmarkCache(self.tempdir.name)
+        expected = ApproximateShortestPathForestUnified(0, self.galaxy.stars, 0.1, sources=self.landmarks, cache=cache)
+        for filename in os.listdir(self.tempdir.name):
+            with open(os.path.join(self.tempdir.name, filename), 'wb') as f:
+                f.write(b'not a numpy file')
+
+        actual = ApproximateShortestPathForestUnified(0, self.galaxy.stars, 0.1, sources=self.landmarks, cache=cache)
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+        np.testing.assert_array_equal(expected.distances, actual.distances)
+
+    def test_wrong_shaped_entry_is_ignored(self) -> None:
+        cache = LandmarkCache(self.tempdir.name)
+        key = 'abc'
+        cache.save(key, np.zeros((3, 2)), np.zeros((3, 2)))
+        self.assertIsNotNone(cache.load(key, (3, 2)))
+        self.assertIsNone(cache.load(key, (4, 2)))
+        self.assertIsNone(cache.load('missing', (3, 2)))
+        self.assertEqual((1, 2), (cache.hits, cache.misses))
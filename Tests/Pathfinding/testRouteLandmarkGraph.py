@@ -103,6 +103,40 @@ class testRouteLandmarkGraph(baseTest):
         self.assertEqual([1], actual[0], "v - index nodelist not updated")
         self.assertEqual([7.5], actual[1], "v - value list not updated")
 
+    def test_add_many_edges_grows_rows(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/Zarushagar-Ibara.sec')
+        graph, _, stars = self._setup_graph(sourcefile)
+        num_stars = len(stars)
+
+        rlg = RouteLandmarkGraph(graph)
+        expected: dict[int, dict[int, float]] = {i: {} for i in range(num_stars)}
+        # Node 0 gets an edge to every other node, forcing its row to be moved and grown several times
+        for i in range(1, num_stars):
+            rlg.add_edge(0, i, 100 + i)
+            expected[0][i] = 100 + i
+            expected[i][0] = 100 + i
+            if 0 == i % 3:
+                rlg.add_edge(i, i - 1, 50 + i)
+                expected[i][i - 1] = 50 + i
+                expected[i - 1][i] = 50 + i
+
+        rlg.add_edge(0, 5, 3.5)
+        expected[0][5] = 3.5
+        expected[5][0] = 3.5
+        rlg.lighten_edge(3, 2, 1.5)
+        expected[3][2] = 1.5
+        expected[2][3] = 1.5
+
+        for i in range(num_stars):
+            with self.subTest(str(i)):
+                actual = rlg[i]
+                self.assertEqual(list(expected[i].keys()), actual[0].tolist(), "Unexpected neighbours")
+                self.assertEqual(list(expected[i].values()), actual[1].tolist(), "Unexpected weights")
+                self.assertEqual({v: k for (k, v) in enumerate(expected[i])}, actual[2], "Unexpected positions")
+                for neighbour, weight in expected[i].items():
+                    self.assertEqual(weight, rlg.arc_weight(i, neighbour))
+        self.assertIsNone(rlg.arc_weight(1, 2))
+
     def test_verify_position_creation(self) -> None:
         sourcefile = self.unpack_filename('DeltaFiles/Zarushagar-Ibara.sec')
         graph, _, stars = self._setup_graph(sourcefile)
@@ -39,7 +39,7 @@ class testSingleSourceDijkstraCoreFallback(baseTest):
         max_labels = np.ones((graph_len), dtype=float) * float('+inf')
         min_cost = dist_graph.min_cost(0, True)
 
-        nu_labels, nu_parents, nu_max, nu_diagnostics = dijkstra_core(dist_graph._arcs, dist_labels, float(1.0 / 1.1),
+        nu_labels, nu_parents, nu_max, nu_diagnostics = dijkstra_core(dist_graph.csr, dist_labels, float(1.0 / 1.1),
                                                         [source], max_labels, min_cost)
         exp_labels = [0.0, 158.18181818181816, 199.99999999999997, 222.7272727272727, 241.81818181818178,
                       49.090909090909086, 114.54545454545453, 241.81818181818178, 67.27272727272727, 108.18181818181817,
@@ -143,7 +143,7 @@ class testSingleSourceDijkstraCoreFallback(baseTest):
         max_labels = np.ones((graph_len), dtype=float) * float('+inf')
         min_cost = dist_graph.min_cost(0, True)
 
-        _, nu_parents, _, _ = dijkstra_core(dist_graph._arcs, dist_labels, 1.0, [source], max_labels, min_cost)
+        _, nu_parents, _, _ = dijkstra_core(dist_graph.csr, dist_labels, 1.0, [source], max_labels, min_cost)
         exp_parents = [-1, -100, -100, -100, -100, 0, 9, -100, 5, 15, 15, 10, -100, -100, 8, 21, 15, 11, 17, 14, 14, 20,
                        17, -100, 25, 22, 22, -100, -100, 26, -100, -100, -100, -100, -100, -100, -100]
         self.assertEqual(exp_parents, list(nu_parents))
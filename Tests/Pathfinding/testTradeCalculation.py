@@ -3,18 +3,23 @@ Created on Aug 08, 2024
 
 @author: CyberiaResurrection
 """
+import itertools
+import tempfile
+import numpy as np
+
 from PyRoute.AreaItems.Galaxy import Galaxy
+from PyRoute.Calculation.TradeCalculation import TradeCalculation
 from PyRoute.DataClasses.ReadSectorOptions import ReadSectorOptions
 from PyRoute.Pathfinding.DistanceGraph import DistanceGraph
 from Tests.baseTest import baseTest
 try:
-    from PyRoute.Pathfinding.astar_numpy import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy import astar_path_numpy, astar_path_numpy_bidirectional
 except ModuleNotFoundError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_bidirectional
 except ImportError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_bidirectional
 except AttributeError:
-    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy, astar_path_numpy_bidirectional
 try:
     from PyRoute.Pathfinding.ApproximateShortestPathForestUnified import ApproximateShortestPathForestUnified
 except ModuleNotFoundError:
@@ -173,3 +178,225 @@ class testTradeCalculation(baseTest):
         galaxy.read_sectors(readparms)
         galaxy.output_path = args.output
         galaxy.generate_routes()
+
+    def test_raw_ranges_match_all_pairs_scan(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/Zarushagar.sec')
+        args = self._make_args()
+
+        for min_btn, route_btn, max_jump in [(13, 8, 4), (15, 8, 2), (8, 10, 6), (14, 13, 1)]:
+            with self.subTest(msg="Min BTN " + str(min_btn) + ", route BTN " + str(route_btn) + ", max jump " +
+                                  str(max_jump)):
+                readparms = ReadSectorOptions(sectors=[sourcefile], pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                              route_reuse=args.route_reuse, trade_choice=args.routes,
+                                              route_btn=route_btn, mp_threads=args.mp_threads,
+                                              debug_flag=args.debug_flag, fix_pop=False, deep_space={},
+                                              map_type=args.map_type)
+
+                galaxy = Galaxy(min_btn=min_btn, max_jump=max_jump)
+                galaxy.read_sectors(readparms)
+                expected = self._all_pairs_raw_ranges(galaxy.trade)
+                actual = galaxy.trade._raw_ranges()
+                self.assertEqual(len(expected), len(actual))
+                self.assertEqual(expected, actual)
+
+    def test_group_routes_by_source(self) -> None:
+        alpha, beta, gamma, delta, epsilon = object(), object(), object(), object(), object()
+        btn = [(alpha, beta, {'btn': 20}), (alpha, gamma, {'btn': 20}), (delta, alpha, {'btn': 20}),
+               (alpha, epsilon, {'btn': 19}), (beta, gamma, {'btn': 19}), (delta, gamma, {'btn': 19}),
+               (gamma, epsilon, {'btn': 19}), (delta, epsilon, {'btn': 19})]
+
+        groups = TradeCalculation.group_routes_by_source(btn)
+        actual = [(source, pairs, data['btn']) for (source, pairs, data) in groups]
+        expected = [(alpha, [(alpha, beta), (alpha, gamma), (delta, alpha)], 20),
+                    (alpha, [(alpha, epsilon)], 19),
+                    (gamma, [(beta, gamma), (delta, gamma), (gamma, epsilon)], 19),
+                    (delta, [(delta, epsilon)], 19)]
+        self.assertEqual(expected, actual)
+        # Grouping must not reorder pairs
+        self.assertEqual([(s, n) for (s, n, _) in btn], [pair for (_, pairs, _) in groups for pair in pairs])
+
+    def test_grouped_routes_match_per_pair_routes(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/duplicate_node_blowup/Trojan Reach.sec')
+        results = {}
+        recorded = {}
+        stats = None
+
+        for group_by_source in [False, True]:
+            args = self._make_args()
+            readparms = ReadSectorOptions(sectors=[sourcefile], pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                          route_reuse=args.route_reuse, trade_choice=args.routes,
+                                          route_btn=args.route_btn, mp_threads=args.mp_threads,
+                                          debug_flag=True, fix_pop=False, deep_space={},
+                                          map_type=args.map_type, group_by_source=group_by_source)
+
+            galaxy = Galaxy(min_btn=13, max_jump=4)
+            galaxy.read_sectors(readparms)
+            galaxy.output_path = args.output
+            self.assertEqual(group_by_source, galaxy.trade.group_by_source)
+            galaxy.generate_routes()
+            galaxy.trade.calculate_routes()
+
+            ranges = {(s.index, n.index): d.get('actual distance') for (s, n, d) in galaxy.ranges.edges(data=True)}
+            trade = {(u, v): d['trade'] for (u, v, d) in galaxy.stars.edges(data=True)}
+            results[group_by_source] = (ranges, trade)
+            recorded[group_by_source] = int(np.sum(galaxy.trade.pathfinding_data['nodes_expanded'] != -1))
+            stats = galaxy.trade.group_stats
+
+        self.assertEqual(results[False], results[True])
+        self.assertEqual({'searches': 2, 'reused': 4, 'researched': 0}, stats)
+        # Each grouped search fills one diagnostic slot, in place of the per-pair searches for the routes it supplied
+        self.assertEqual(recorded[False] - stats['reused'] + stats['searches'], recorded[True])
+
+    def test_landmark_cache_reused_between_runs(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/duplicate_node_blowup/Trojan Reach.sec')
+        results = []
+        stats = []
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for _ in range(3):
+                args = self._make_args()
+                readparms = ReadSectorOptions(sectors=[sourcefile], pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                              route_reuse=args.route_reuse, trade_choice=args.routes,
+                                              route_btn=args.route_btn, mp_threads=args.mp_threads,
+                                              debug_flag=args.debug_flag, fix_pop=False, deep_space={},
+                                              map_type=args.map_type, landmark_cache_dir=cache_dir)
+
+                galaxy = Galaxy(min_btn=13, max_jump=4)
+                galaxy.read_sectors(readparms)
+                galaxy.output_path = args.output
+                galaxy.generate_routes()
+                galaxy.trade.calculate_routes()
+
+                ranges = {(s.index, n.index): d.get('actual distance') for (s, n, d) in galaxy.ranges.edges(data=True)}
+                trade = {(u, v): d['trade'] for (u, v, d) in galaxy.stars.edges(data=True)}
+                results.append((ranges, trade))
+                stats.append((galaxy.trade.landmark_cache.hits, galaxy.trade.landmark_cache.misses))
+
+        # Both landmark trees are computed on the first run, and loaded on every run after that
+        self.assertEqual([(0, 2), (2, 0), (2, 0)], stats)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    def test_bidirectional_routes_match_forward_routes(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/duplicate_node_blowup/Trojan Reach.sec')
+        results = {}
+
+        for bidirectional in [False, True]:
+            args = self._make_args()
+            readparms = ReadSectorOptions(sectors=[sourcefile], pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                          route_reuse=args.route_reuse, trade_choice=args.routes,
+                                          route_btn=args.route_btn, mp_threads=args.mp_threads,
+                                          debug_flag=args.debug_flag, fix_pop=False, deep_space={},
+                                          map_type=args.map_type)
+
+            galaxy = Galaxy(min_btn=13, max_jump=4)
+            galaxy.read_sectors(readparms)
+            galaxy.output_path = args.output
+            galaxy.trade = TradeCalculation(galaxy, galaxy.min_btn, args.route_btn, args.route_reuse,
+                                            args.debug_flag, bidirectional=bidirectional)
+            exp_pathfinder = astar_path_numpy_bidirectional if bidirectional else astar_path_numpy
+            self.assertEqual(exp_pathfinder, galaxy.trade.pathfinder)
+            galaxy.generate_routes()
+            galaxy.trade.calculate_routes()
+
+            ranges = {(s.index, n.index): d.get('actual distance') for (s, n, d) in galaxy.ranges.edges(data=True)}
+            trade = {(u, v): d['trade'] for (u, v, d) in galaxy.stars.edges(data=True)}
+            results[bidirectional] = (ranges, trade)
+
+        self.assertEqual(results[False], results[True])
+
+    def test_speculative_routes_match_sequential_routes(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/duplicate_node_blowup/Trojan Reach.sec')
+        results = {}
+        stats = {}
+
+        for batch in [0, 4]:
+            args = self._make_args()
+            readparms = ReadSectorOptions(sectors=[sourcefile], pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                          route_reuse=args.route_reuse, trade_choice=args.routes,
+                                          route_btn=args.route_btn, mp_threads=2, debug_flag=True, fix_pop=False,
+                                          deep_space={}, map_type=args.map_type, speculative_batch=batch)
+
+            galaxy = Galaxy(min_btn=13, max_jump=4)
+            galaxy.read_sectors(readparms)
+            galaxy.output_path = args.output
+            self.assertEqual(batch, galaxy.trade.speculative_batch)
+            self.assertEqual(2, galaxy.trade.speculative_workers)
+            galaxy.generate_routes()
+            galaxy.trade.calculate_routes()
+
+            ranges = {(s.index, n.index): (d.get('actual distance'), d.get('jumps'))
+                      for (s, n, d) in galaxy.ranges.edges(data=True)}
+            edges = {(u, v): (d['trade'], d['count'], d['weight']) for (u, v, d) in galaxy.stars.edges(data=True)}
+            stars = {star.index: (star.tradeIn, star.tradeOver, star.passIn, star.passOver)
+                     for star in galaxy.star_mapping.values()}
+            # Reused routes record the diagnostics of their ahead-of-time search, which has to have gone step for
+            # step the same as a search at commit time would have
+            expanded = galaxy.trade.pathfinding_data['nodes_expanded'].tolist()
+            results[batch] = (ranges, edges, stars, expanded)
+            stats[batch] = galaxy.trade.speculative_stats
+
+        self.assertEqual(results[0], results[4])
+        self.assertEqual(0, stats[0]['batches'])
+        self.assertLess(0, stats[4]['reused'])
+
+    def test_active_landmarks_find_same_length_routes(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/duplicate_node_blowup/Trojan Reach.sec')
+        results = {}
+        stats = {}
+
+        for active in [0, 2]:
+            args = self._make_args()
+            readparms = ReadSectorOptions(sectors=[sourcefile], pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                          route_reuse=args.route_reuse, trade_choice=args.routes,
+                                          route_btn=args.route_btn, mp_threads=1, debug_flag=True, fix_pop=False,
+                                          deep_space={}, map_type=args.map_type, active_landmarks=active)
+
+            galaxy = Galaxy(min_btn=13, max_jump=4)
+            galaxy.read_sectors(readparms)
+            galaxy.output_path = args.output
+            self.assertEqual(active, galaxy.trade.active_landmarks)
+            galaxy.generate_routes()
+            galaxy.trade.calculate_routes()
+
+            results[active] = {(s.index, n.index): d.get('actual distance')
+                               for (s, n, d) in galaxy.ranges.edges(data=True)}
+            stats[active] = galaxy.trade.landmark_stats
+
+        # Fewer landmarks only loosen the bounds, so every route costs the same - though equal-cost ties can break
+        # differently
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(0, stats[0]['queries'])
+        self.assertLess(0, stats[2]['queries'])
+        self.assertLess(0, stats[2]['active_bound'])
+        self.assertLessEqual(stats[2]['active_bound'], stats[2]['full_bound'])
+
+    @staticmethod
+    def _all_pairs_raw_ranges(trade) -> list:
+        max_range = trade.galaxy.max_jump_range
+        min_btn = trade.min_btn
+        hiball = [item for item in trade.galaxy.ranges if item.wtn >= trade.min_route_wtn and not item.is_redzone]
+        loball = [item for item in trade.galaxy.ranges if item.wtn < trade.min_route_wtn and not item.is_redzone]
+
+        def boosts(star, neighbour) -> int:
+            code1 = star.tradeCode
+            code2 = neighbour.tradeCode
+            ag_boost = code1.ag_code_boost and code2.ag_code_boost and (code1.agricultural or code2.agricultural)
+            in_boost = code1.in_code_boost and code2.in_code_boost and (code1.industrial or code2.industrial)
+            return int(ag_boost) + int(in_boost)
+
+        hi_hi = {2: [], 1: [], 0: []}
+        for star, neighbour in itertools.combinations(hiball, 2):
+            dist = star.distance(neighbour)
+            if dist > trade._max_dist(star.wtn, neighbour.wtn, True):
+                continue
+            offset = boosts(star, neighbour)
+            if trade._get_btn_upper_bound(star, neighbour, max_range, min_btn, distance=dist, offset=offset) >= min_btn:
+                hi_hi[offset].append((star, neighbour))
+
+        result = hi_hi[2]
+        result.extend([(s, n) for (s, n) in itertools.combinations(loball, 2) if s.distance(n) <= max_range])
+        result.extend([(s, n) for (s, n) in itertools.product(hiball, loball) if s.distance(n) <= max_range])
+        result.extend(hi_hi[1])
+        result.extend(hi_hi[0])
+        return result
@@ -3,9 +3,28 @@ Created on Aug 08, 2024
 
 @author: CyberiaResurrection
 """
+from multiprocessing import Pool
+
+import numpy as np
+
 from PyRoute.AreaItems.Galaxy import Galaxy
+from PyRoute.Calculation import TradeMPCalculation as trade_mp_module
+from PyRoute.Calculation.TradeMPCalculation import TradeMPCalculation, pack_routes, unpack_routes
 from PyRoute.DataClasses.ReadSectorOptions import ReadSectorOptions
 from Tests.baseTest import baseTest
+try:
+    from PyRoute.Pathfinding.astar_numpy import astar_path_numpy_bidirectional
+except ModuleNotFoundError:
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy_bidirectional
+except ImportError:
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy_bidirectional
+except AttributeError:
+    from PyRoute.Pathfinding.astar_numpy_fallback import astar_path_numpy_bidirectional
+
+
+def _child_view(offset, node) -> tuple[float, float]:
+    trade = trade_mp_module.tradeCalculation
+    return float(trade.star_graph.csr[2][offset]), float(trade.shortest_path_tree.distances[node, 0])
 
 
 class testTradeMPCalculation(baseTest):
@@ -52,3 +71,106 @@ class testTradeMPCalculation(baseTest):
         galaxy.generate_routes()
         galaxy.set_borders(args.borders, args.ally_match)
         galaxy.trade.calculate_routes()
+
+    def test_bidirectional_routes_match_forward_routes(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/direct_routes_on_trade_mp/Lishun.sec')
+        results = {}
+
+        for bidirectional in [False, True]:
+            args = self._make_args()
+            args.route_reuse = 30
+            args.route_btn = 8
+            args.mp_threads = 2
+            args.routes = "trade-mp"
+
+            readparms = ReadSectorOptions(sectors=[sourcefile], pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                          route_reuse=args.route_reuse, trade_choice=args.routes,
+                                          route_btn=args.route_btn, mp_threads=args.mp_threads,
+                                          debug_flag=args.debug_flag, fix_pop=False, deep_space={},
+                                          map_type=args.map_type, bidirectional=bidirectional)
+
+            galaxy = Galaxy(min_btn=15, max_jump=4)
+            galaxy.read_sectors(readparms)
+            galaxy.output_path = args.output
+            self.assertIsInstance(galaxy.trade, TradeMPCalculation)
+            self.assertEqual(bidirectional, galaxy.trade.bidirectional)
+            if bidirectional:
+                self.assertEqual(astar_path_numpy_bidirectional, galaxy.trade.pathfinder)
+
+            galaxy.generate_routes()
+            galaxy.set_borders(args.borders, args.ally_match)
+            galaxy.trade.calculate_routes()
+
+            ranges = {(s.index, n.index): d.get('actual distance') for (s, n, d) in galaxy.ranges.edges(data=True)}
+            trade = sum(d['trade'] for (_, _, d) in galaxy.stars.edges(data=True))
+            results[bidirectional] = (ranges, trade)
+
+        # Every route must cost the same both ways, and so carry the same total trade.  Individual jumps can
+        # differ, as the searches break equal-cost ties differently - eg Lishun 18 to 20 costs 179 via either 3 or 7
+        self.assertEqual(results[False], results[True])
+
+    def test_children_read_current_weights_and_labels(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/direct_routes_on_trade_mp/Lishun.sec')
+
+        args = self._make_args()
+        readparms = ReadSectorOptions(sectors=[sourcefile], pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                      route_reuse=30, trade_choice="trade-mp", route_btn=8, mp_threads=2,
+                                      debug_flag=args.debug_flag, fix_pop=False, deep_space={}, map_type=args.map_type)
+
+        galaxy = Galaxy(min_btn=15, max_jump=4)
+        galaxy.read_sectors(readparms)
+        galaxy.output_path = args.output
+        galaxy.generate_routes()
+        galaxy.trade.calculate_routes()
+        trade = galaxy.trade
+        trade_mp_module.tradeCalculation = trade
+
+        indptr, indices, _ = trade.star_graph.csr
+        u = int(next(item for item in range(len(indptr) - 1) if indptr[item] < indptr[item + 1]))
+        v = int(indices[indptr[u]])
+        label = float(trade.shortest_path_tree.distances[v, 0])
+
+        with trade.shared_pathfinding_arrays(), Pool(processes=1) as pool:
+            self.assertEqual((trade.star_graph.csr[2][indptr[u]], label), pool.apply(_child_view, (int(indptr[u]), v)))
+            # Changes the parent makes after the child is forked have to show up in the child
+            trade.star_graph.lighten_edge(u, v, 1.0)
+            trade.shortest_path_tree.distances[v, 0] = label / 2
+            self.assertEqual((1.0, label / 2), pool.apply(_child_view, (int(indptr[u]), v)))
+
+        # Afterwards, both arrays are back in private memory, with the parent's changes intact
+        self.assertIsNone(trade.star_graph.csr[2].base)
+        self.assertIsNone(trade.shortest_path_tree.distances.base)
+        self.assertEqual(1.0, trade.star_graph.arc_weight(u, v))
+        self.assertEqual(label / 2, trade.shortest_path_tree.distances[v, 0])
+
+    def test_pack_routes_round_trips(self) -> None:
+        routes = [[3, 1, 4], [1, 5], [9, 2, 6, 5, 3]]
+        packed = pack_routes(routes)
+        self.assertEqual(np.int64, packed.dtype)
+        self.assertEqual([3, 3, 1, 4, 2, 1, 5, 5, 9, 2, 6, 5, 3], packed.tolist())
+        self.assertEqual(routes, unpack_routes(packed))
+        self.assertEqual([], unpack_routes(pack_routes([])))
+
+    def test_each_child_reports_its_throughput(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/direct_routes_on_trade_mp/Lishun.sec')
+
+        args = self._make_args()
+        readparms = ReadSectorOptions(sectors=[sourcefile], pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                      route_reuse=30, trade_choice="trade-mp", route_btn=8, mp_threads=2,
+                                      debug_flag=args.debug_flag, fix_pop=False, deep_space={}, map_type=args.map_type)
+
+        galaxy = Galaxy(min_btn=15, max_jump=4)
+        galaxy.read_sectors(readparms)
+        galaxy.output_path = args.output
+        galaxy.generate_routes()
+        logger = galaxy.trade.logger
+        logger.manager.disable = 10
+        with self.assertLogs(logger, 'INFO') as logs:
+            galaxy.trade.calculate_routes()
+
+        # Both children report once each for the intra-sector routes, and again for the long routes
+        reports = [line for line in logs.output if 'routes/sec' in line]
+        self.assertEqual(4, len(reports), reports)
+        # Every route the children found has been applied, with none lost between the batches
+        routed = sum(1 for (_, _, data) in galaxy.ranges.edges(data=True) if data.get('jumps'))
+        self.assertEqual(galaxy.ranges.number_of_edges(), routed)
@@ -0,0 +1,68 @@
+"""
+Created on Oct 18, 2026
+"""
+import unittest
+
+import numpy as np
+
+from PyRoute.Position.AxialBuckets import AxialBuckets
+from PyRoute.Position.Hex import Hex
+
+
+class testAxialBuckets(unittest.TestCase):
+
+    def test_bad_cell_size(self) -> None:
+        msg = None
+        try:
+            AxialBuckets([0], [0], 0)
+        except ValueError as e:
+            msg = str(e)
+        self.assertEqual("Cell size must be positive", msg)
+
+    def test_empty_members(self) -> None:
+        buckets = AxialBuckets([], [], 4)
+        left, right, dist = buckets.pairs_within([0, 1], [0, 1], 4)
+        self.assertEqual(0, len(left))
+        self.assertEqual(0, len(right))
+        self.assertEqual(0, len(dist))
+
+    def test_pairs_within_matches_brute_force(self) -> None:
+        rng = np.random.default_rng(seed=1013)
+        member_q = rng.integers(-70, 70, size=400)
+        member_r = rng.integers(-70, 70, size=400)
+        query_q = rng.integers(-90, 90, size=150)
+        query_r = rng.integers(-90, 90, size=150)
+
+        for cell_size, radius in [(1, 3), (4, 4), (4, 9), (10, 6), (30, 29), (200, 99)]:
+            with self.subTest(msg="Cell size " + str(cell_size) + ", radius " + str(radius)):
+                expected = set()
+                for i in range(len(query_q)):
+                    for j in range(len(member_q)):
+                        dist = Hex.axial_distance((query_q[i], query_r[i]), (member_q[j], member_r[j]))
+                        if dist <= radius:
+                            expected.add((i, j, dist))
+
+                buckets = AxialBuckets(member_q, member_r, cell_size)
+                left, right, dist = buckets.pairs_within(query_q, query_r, radius)
+                actual = set(zip(left.tolist(), right.tolist(), dist.tolist()))
+                self.assertEqual(len(actual), len(left), "Duplicate pairs found")
+                self.assertEqual(expected, actual)
+
+    def test_pairs_within_chunked(self) -> None:
+        rng = np.random.default_rng(seed=599)
+        member_q = rng.integers(-20, 20, size=300)
+        member_r = rng.integers(-20, 20, size=300)
+
+        buckets = AxialBuckets(member_q, member_r, 8)
+        left, right, dist = buckets.pairs_within(member_q, member_r, 12)
+        expected = set(zip(left.tolist(), right.tolist(), dist.tolist()))
+
+        buckets.max_chunk = 7
+        left, right, dist = buckets.pairs_within(member_q, member_r, 12)
+        actual = set(zip(left.tolist(), right.tolist(), dist.tolist()))
+        self.assertEqual(len(actual), len(left), "Duplicate pairs found")
+        self.assertEqual(expected, actual)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Created on Oct 18, 2026
+"""
+import itertools
+
+from PyRoute.AreaItems.Galaxy import Galaxy
+from PyRoute.DataClasses.ReadSectorOptions import ReadSectorOptions
+from PyRoute.Position.Hex import Hex
+from PyRoute.Position.SpatialIndex import SpatialIndex
+from Tests.baseTest import baseTest
+
+
+class testSpatialIndex(baseTest):
+
+    def setUp(self) -> None:
+        sourcefile = self.unpack_filename('DeltaFiles/Zarushagar.sec')
+        args = self._make_args()
+        readparms = ReadSectorOptions(sectors=[sourcefile], pop_code=args.pop_code, ru_calc=args.ru_calc,
+                                      route_reuse=args.route_reuse, trade_choice=args.routes,
+                                      route_btn=args.route_btn, mp_threads=args.mp_threads,
+                                      debug_flag=args.debug_flag, fix_pop=False, deep_space={},
+                                      map_type=args.map_type)
+        self.galaxy = Galaxy(min_btn=13, max_jump=4)
+        self.galaxy.read_sectors(readparms)
+        self.stars = list(self.galaxy.ranges)
+
+    def test_built_by_set_positions(self) -> None:
+        index = self.galaxy.spatial_index
+        self.assertIsInstance(index, SpatialIndex)
+        self.assertEqual(self.stars, index.stars)
+        self.assertNotIn('spatial_index', self.galaxy.__getstate__())
+
+    def test_at(self) -> None:
+        index = self.galaxy.spatial_index
+        for star in self.stars:
+            self.assertEqual(star, index.at(star.q, star.r))
+            self.assertIn(star, index)
+
+        occupied = {(star.q, star.r) for star in self.stars}
+        empty = [(q, r) for (q, r) in itertools.product(range(-40, 40), range(-40, 40)) if (q, r) not in occupied]
+        self.assertLess(0, len(empty))
+        for q, r in empty:
+            self.assertIsNone(index.at(q, r))
+
+    def test_within_matches_scan(self) -> None:
+        index = self.galaxy.spatial_index
+        for radius in [0, 1, 4, 9, 30]:
+            with self.subTest(msg="Radius " + str(radius)):
+                for star in self.stars[::7]:
+                    expected = [item for item in self.stars if item is not star and star.distance(item) <= radius]
+                    self.assertEqual(expected, index.within(star, radius))
+
+    def test_nearest_matches_scan(self) -> None:
+        index = self.galaxy.spatial_index
+        predicates = {
+            'none': lambda origin: None,
+            'others': lambda origin: (lambda item: item is not origin),
+            'starport A': lambda origin: (lambda item: 'A' == item.port),
+            'capitals': lambda origin: (lambda item: item.tradeCode.capital),
+            'nothing': lambda origin: (lambda item: False)
+        }
+        for name, make_predicate in predicates.items():
+            with self.subTest(msg="Predicate " + name):
+                for star in self.stars[::5]:
+                    predicate = make_predicate(star)
+                    candidates = [item for item in self.stars if predicate is None or predicate(item)]
+                    expected: tuple = (None, None)
+                    for item in candidates:
+                        dist = star.distance(item)
+                        if expected[0] is None or dist < expected[1]:
+                            expected = (item, dist)
+                    self.assertEqual(expected, index.nearest(star, predicate=predicate))
+
+    def test_nearest_max_radius(self) -> None:
+        index = self.galaxy.spatial_index
+        star = self.stars[0]
+        target, dist = index.nearest(star, predicate=lambda item: 'A' == item.port and item is not star)
+        self.assertIsNotNone(target)
+        self.assertEqual((target, dist), index.nearest(star, predicate=lambda item: 'A' == item.port and
+                                                       item is not star, max_radius=dist))
+        self.assertEqual((None, None), index.nearest(star, predicate=lambda item: 'A' == item.port and
+                                                     item is not star, max_radius=dist - 1))
+
+    def test_nearest_tiebreak(self) -> None:
+        index = self.galaxy.spatial_index
+        star = self.stars[len(self.stars) // 2]
+        ring = [item for item in self.stars if 1 == star.distance(item)]
+        self.assertLess(1, len(ring), "Need at least two stars at distance 1")
+        target, dist = index.nearest(star, predicate=lambda item: item is not star)
+        self.assertEqual((ring[0], 1), (target, dist))
+        target, dist = index.nearest(star, predicate=lambda item: item is not star, tiebreak=lambda item: -item.index)
+        self.assertEqual((max(ring, key=lambda item: item.index), 1), (target, dist))
+
+    def test_pairs_within_matches_combinations(self) -> None:
+        index = self.galaxy.spatial_index
+        for radius in [1, 4, 12]:
+            with self.subTest(msg="Radius " + str(radius)):
+                expected = [(i, j, self.stars[i].distance(self.stars[j]))
+                            for (i, j) in itertools.combinations(range(len(self.stars)), 2)
+                            if self.stars[i].distance(self.stars[j]) <= radius]
+                left, right, dist = index.pairs_within(radius)
+                self.assertEqual(expected, list(zip(left.tolist(), right.tolist(), dist.tolist())))
+
+    def test_ring_matches_walk(self) -> None:
+        for cand_hex in [(0, 0), (-13, 27), (40, -7)]:
+            for dist in range(0, 6):
+                with self.subTest(msg="Hex " + str(cand_hex) + ", distance " + str(dist)):
+                    expected = []
+                    neighbour = Hex.get_neighbor(cand_hex, 4, dist)
+                    for direction in range(6):
+                        for _ in range(dist):
+                            expected.append(neighbour)
+                            neighbour = Hex.get_neighbor(neighbour, direction)
+                    actual = SpatialIndex.ring(cand_hex, dist)
+                    self.assertEqual(expected, actual)
+                    for item in actual:
+                        self.assertEqual(dist, Hex.axial_distance(cand_hex, item))
+
+    def test_galaxy_find_world_by_pos(self) -> None:
+        sector = list(self.galaxy.sectors.values())[0]
+        for col, row in itertools.product(range(1, 33), range(1, 41)):
+            pos = f"{col:02d}{row:02d}"
+            self.assertEqual(sector.find_world_by_pos(pos), self.galaxy.find_world_by_pos(sector, pos))
+        self.assertIsNone(self.galaxy.find_world_by_pos(sector, 'foo'))
+
+    def test_empty_index(self) -> None:
+        index = SpatialIndex([])
+        self.assertEqual(0, len(index))
+        self.assertIsNone(index.at(0, 0))
+        left, right, dist = index.pairs_within(4)
+        self.assertEqual(0, len(left))
@@ -0,0 +1,67 @@
+"""
+Created on Oct 18, 2026
+"""
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+from PyRoute.Utilities.PhaseProfiler import PhaseProfiler
+
+
+class testPhaseProfiler(unittest.TestCase):
+
+    def tearDown(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def test_phases_and_counters_written_as_json(self) -> None:
+        profiler = PhaseProfiler()
+        with profiler.phase('first'):
+            pass
+        with profiler.phase('second'):
+            hoard = [str(item) for item in range(20000)]
+        profiler.count('stars', 17)
+        profiler.stop()
+        self.assertFalse(tracemalloc.is_tracing())
+
+        path = os.path.join(tempfile.mkdtemp(), 'profile-report.json')
+        profiler.write(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+
+        self.assertEqual(['first', 'second'], [item['phase'] for item in report['phases']])
+        self.assertEqual({'stars': 17}, report['counters'])
+        second = report['phases'][1]
+        for key in ['wall_time', 'cpu_time', 'peak_rss', 'traced_current', 'traced_peak']:
+            self.assertIn(key, second)
+        # The hoard is by far the biggest thing allocated in the second phase
+        self.assertLess(0, len(hoard))
+        self.assertIn(os.path.basename(__file__), second['top_allocators'][0]['location'])
+        self.assertLess(20000, second['top_allocators'][0]['count_diff'])
+
+    def test_disabled_profiler_records_nothing(self) -> None:
+        profiler = PhaseProfiler(enabled=False)
+        self.assertFalse(tracemalloc.is_tracing())
+        with profiler.phase('first'):
+            pass
+        profiler.count('stars', 17)
+        path = os.path.join(tempfile.mkdtemp(), 'profile-report.json')
+        profiler.write(path)
+
+        self.assertEqual([], profiler.phases)
+        self.assertEqual({}, profiler.counters)
+        self.assertFalse(os.path.exists(path))
+
+    def test_leaves_existing_tracing_running(self) -> None:
+        tracemalloc.start()
+        profiler = PhaseProfiler()
+        with profiler.phase('first'):
+            pass
+        profiler.stop()
+        self.assertTrue(tracemalloc.is_tracing())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Created on Oct 18, 2026
+"""
+import argparse
+import json
+
+from PyRoute import benchmark_pathfinding
+from Tests.baseTest import baseTest
+
+
+class testBenchmarkPathfinding(baseTest):
+
+    def setUp(self) -> None:
+        self.sectors = [self.unpack_filename('DeltaFiles/Zarushagar-Ibara.sec')]
+        self.args = argparse.Namespace(min_btn=8, max_jump=4, pairs=20, repeat=1)
+
+    def test_benchmark_backend_reports_every_phase(self) -> None:
+        galaxy = benchmark_pathfinding.load_galaxy(self.sectors, self.args.min_btn, self.args.max_jump)
+        results = benchmark_pathfinding.benchmark_backend(galaxy, self.sectors, 'fallback', self.args)
+
+        expected = {
+            'forest_build': {'seconds', 'peak_bytes', 'trees'},
+            'lower_bound_bulk': {'seconds', 'calls', 'calls_per_sec'},
+            'astar': {'seconds', 'queries', 'queries_per_sec', 'nodes_expanded'},
+            'update_edges': {'seconds', 'calls', 'calls_per_sec'},
+            'calculate_routes': {'seconds', 'routes', 'routes_per_sec', 'peak_bytes'}
+        }
+        self.assertEqual(set(expected), set(results))
+        for (phase, metrics) in expected.items():
+            self.assertEqual(metrics, set(results[phase]), phase)
+        self.assertLess(0, results['astar']['nodes_expanded'])
+        self.assertLess(0, results['calculate_routes']['routes'])
+        self.assertLess(0, results['calculate_routes']['peak_bytes'])
+        # Results have to round-trip through JSON to be compared between versions
+        self.assertEqual(results, json.loads(json.dumps(results)))
+
+    def test_backends_find_same_number_of_routes(self) -> None:
+        try:
+            benchmark_pathfinding.load_backend('cython')
+        except ImportError:
+            self.skipTest("Compiled pathfinding modules not built")
+        routes = {}
+        for backend in ['cython', 'fallback']:
+            galaxy = benchmark_pathfinding.load_galaxy(self.sectors, self.args.min_btn, self.args.max_jump)
+            results = benchmark_pathfinding.benchmark_backend(galaxy, self.sectors, backend, self.args)
+            routes[backend] = results['calculate_routes']['routes']
+        # Expanded node counts can drift apart, as the compiled forest's divisor is single-precision and breaks
+        # heuristic ties differently, but both backends have to settle the same routes
+        self.assertEqual(routes['fallback'], routes['cython'])
+
+    def test_compare_flags_only_regressions_past_threshold(self) -> None:
+        baseline = {'fixtures': {'Ibara': {'cython': {
+            'astar': {'seconds': 1.0, 'queries_per_sec': 100.0, 'nodes_expanded': 50},
+            'calculate_routes': {'seconds': 2.0, 'peak_bytes': 1000}
+        }}}}
+        current = {'fixtures': {'Ibara': {'cython': {
+            'astar': {'seconds': 1.05, 'queries_per_sec': 80.0, 'nodes_expanded': 500},
+            'calculate_routes': {'seconds': 1.0, 'peak_bytes': 1500}
+        }, 'fallback': {
+            'astar': {'seconds': 10.0}
+        }}}}
+
+        regressions = benchmark_pathfinding.compare(current, baseline, 0.1)
+        flagged = sorted((item['phase'], item['metric']) for item in regressions)
+        # Slower query rate and higher peak memory are regressions, a 5% slow-down is inside the threshold, faster
+        # runs aren't regressions, counts aren't compared and nothing is flagged for a backend without a baseline
+        self.assertEqual([('astar', 'queries_per_sec'), ('calculate_routes', 'peak_bytes')], flagged)
@@ -391,7 +391,7 @@ class testDeltaPasses(baseTest):
         args.speculative_version = 'CT'
         args.ally_count = 10
         args.json_data = False
-        args.output = ''
+        args.output = tempfile.gettempdir()
         args.mp_threads = 1
         args.debug_flag = False
         args.mindir = tempfile.gettempdir()